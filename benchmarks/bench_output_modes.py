@@ -0,0 +1,91 @@
+"""Benchmark command output throughput in text mode vs. bytes mode.
+
+Fetches ``--size`` MB of command output from a local SSH server, ``--runs``
+times per mode, and reports the best MB/s:
+
+- text: execute_command, which decodes the output to str
+- bytes: execute_command_bytes, which returns the output undecoded
+- stream: stream_command_bytes, consuming the raw chunks as they arrive
+
+Text mode is measured on log text only, since random binary output is not
+valid UTF-8; bytes modes are also measured on random bytes.
+
+Usage:
+    uv run python benchmarks/bench_output_modes.py --size 32 --runs 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from harness import bench_settings, local_ssh_server
+
+from ssh_remote_control.server import SSHConnectionManager
+
+LOG_LINE = "2024-01-01T00:00:00 web-1 nginx[1234]: GET /api/status 200 0.004s"
+
+
+async def fetch_text(manager: SSHConnectionManager, command: str) -> int:
+    return len((await manager.execute_command("bench", command)).encode())
+
+
+async def fetch_bytes(manager: SSHConnectionManager, command: str) -> int:
+    return len(await manager.execute_command_bytes("bench", command))
+
+
+async def fetch_stream(manager: SSHConnectionManager, command: str) -> int:
+    total = 0
+    async for chunk in manager.stream_command_bytes("bench", command):
+        total += len(chunk)
+    return total
+
+
+MODES: dict[str, Callable[[SSHConnectionManager, str], Awaitable[int]]] = {
+    "text": fetch_text,
+    "bytes": fetch_bytes,
+    "stream": fetch_stream,
+}
+
+
+async def run(size_mb: float, runs: int) -> None:
+    size = int(size_mb * 1024 * 1024)
+    payloads = {
+        "log text": f"yes '{LOG_LINE}' | head -c {size}",
+        "random": f"head -c {size} /dev/urandom",
+    }
+    async with local_ssh_server() as port:
+        manager = SSHConnectionManager(bench_settings({"bench": port}))
+        await manager.execute_command("bench", "true")
+        print(f"{size_mb:g} MB per transfer, best of {runs}")
+        header = "".join(f"{f'{p} MB/s':>18}" for p in payloads)
+        print(f"{'mode':<10}{header}")
+        for mode, fetch in MODES.items():
+            cells = ""
+            for payload, command in payloads.items():
+                if mode == "text" and payload == "random":
+                    cells += f"{'-':>18}"
+                    continue
+                best = 0.0
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    received = await fetch(manager, command)
+                    elapsed = time.perf_counter() - start
+                    best = max(best, received / elapsed / 1024 / 1024)
+                cells += f"{best:>18.1f}"
+            print(f"{mode:<10}{cells}")
+        await manager.close_all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=float, default=32.0, help="MB per transfer")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.runs))
+
+
+if __name__ == "__main__":
+    main()
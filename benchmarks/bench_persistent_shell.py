@@ -0,0 +1,63 @@
+"""Benchmark many tiny commands: a channel per command vs. a persistent shell.
+
+Runs ``--commands`` short commands through a local SSH server behind a proxy
+that adds ``--rtt`` milliseconds of round-trip latency, first one after
+another and then all at once, with ssh_persistent_shell off and on.
+
+Usage:
+    uv run python benchmarks/bench_persistent_shell.py --commands 50 --rtt 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from harness import bench_settings, latency_proxy, local_ssh_server
+
+from ssh_remote_control.server import SSHConnectionManager
+
+
+async def run(command_count: int, rtt_ms: float) -> None:
+    async with (
+        local_ssh_server() as ssh_port,
+        latency_proxy(ssh_port, rtt_ms=rtt_ms) as port,
+    ):
+        print(f"{command_count} commands, RTT {rtt_ms:.0f} ms")
+        print(f"{'mode':<12}{'sequential s':>14}{'concurrent s':>14}")
+        for name, persistent in (("channel", False), ("shell", True)):
+            manager = SSHConnectionManager(
+                bench_settings({"bench": port}, ssh_persistent_shell=persistent)
+            )
+            # Warm up the connection (and the shell) before timing
+            await manager.execute_command("bench", "true")
+
+            start = time.perf_counter()
+            for i in range(command_count):
+                await manager.execute_command("bench", f"echo {i}")
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    manager.execute_command("bench", f"echo {i}")
+                    for i in range(command_count)
+                )
+            )
+            concurrent = time.perf_counter() - start
+
+            await manager.close_all()
+            print(f"{name:<12}{sequential:>14.2f}{concurrent:>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=50)
+    parser.add_argument("--rtt", type=float, default=50.0, help="RTT in ms")
+    args = parser.parse_args()
+    asyncio.run(run(args.commands, args.rtt))
+
+
+if __name__ == "__main__":
+    main()
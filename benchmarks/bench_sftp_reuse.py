@@ -0,0 +1,73 @@
+"""Benchmark many small remote file reads: new SFTP session per read vs. cached.
+
+Reads ``--files`` small files through a local SSH server behind a proxy
+that adds ``--rtt`` milliseconds of round-trip latency. The per-call mode
+starts and tears down an SFTP session for every read, as read_file used to;
+the cached mode goes through SSHConnectionManager.read_file.
+
+Usage:
+    uv run python benchmarks/bench_sftp_reuse.py --files 100 --rtt 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from harness import bench_settings, latency_proxy, local_ssh_server
+
+from ssh_remote_control.server import SSHConnectionManager
+
+
+async def read_per_call(manager: SSHConnectionManager, paths: list[str]) -> None:
+    """Read each file over its own SFTP session."""
+    conn = await manager.connect("bench")
+    for path in paths:
+        async with conn.start_sftp_client() as sftp, sftp.open(path, "r") as f:
+            await f.read()
+
+
+async def read_cached(manager: SSHConnectionManager, paths: list[str]) -> None:
+    """Read each file over the manager's cached SFTP session."""
+    for path in paths:
+        await manager.read_file("bench", path)
+
+
+async def run(file_count: int, size: int, rtt_ms: float) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for i in range(file_count):
+            path = Path(temp_dir) / f"file{i}.txt"
+            path.write_text("x" * size)
+            paths.append(str(path))
+
+        async with (
+            local_ssh_server() as ssh_port,
+            latency_proxy(ssh_port, rtt_ms=rtt_ms) as port,
+        ):
+            print(f"{file_count} reads of {size} bytes, RTT {rtt_ms:.0f} ms")
+            print(f"{'mode':<10}{'total s':>10}{'per read ms':>14}")
+            for name, reader in (("per-call", read_per_call), ("cached", read_cached)):
+                manager = SSHConnectionManager(bench_settings({"bench": port}))
+                await manager.connect("bench")
+                start = time.perf_counter()
+                await reader(manager, paths)
+                elapsed = time.perf_counter() - start
+                await manager.close_all()
+                print(f"{name:<10}{elapsed:>10.2f}{elapsed / file_count * 1000:>14.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size", type=int, default=1024, help="Bytes per file")
+    parser.add_argument("--rtt", type=float, default=50.0, help="RTT in ms")
+    args = parser.parse_args()
+    asyncio.run(run(args.files, args.size, args.rtt))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark get_system_info round trips: one channel per probe vs. one batch.
+
+Each channel open on the fake connection sleeps for ``--rtt`` milliseconds
+before running the command in a local ``sh``. This models the cost of a
+cross-region link without needing a remote host.
+
+Usage:
+    uv run python benchmarks/bench_system_info.py --rtt 200 --iterations 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any
+
+from ssh_remote_control.config import Settings
+from ssh_remote_control.server import SYSTEM_INFO_COMMANDS, SSHConnectionManager
+
+
+class _Result:
+    def __init__(self, stdout: str, stderr: str, exit_status: int | None) -> None:
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_status = exit_status
+
+
+class LatencyConnection:
+    """Stand-in for SSHClientConnection that runs commands locally."""
+
+    def __init__(self, rtt: float) -> None:
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def is_closed(self) -> bool:
+        return False
+
+    async def run(self, command: str, **_kwargs: Any) -> _Result:
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        return _Result(stdout.decode(), stderr.decode(), proc.returncode)
+
+
+async def legacy_system_info(
+    manager: SSHConnectionManager, server_name: str
+) -> dict[str, str]:
+    """Collect system info the old way: one execute_command per probe."""
+    info: dict[str, str] = {}
+    for key, command in SYSTEM_INFO_COMMANDS.items():
+        try:
+            info[key] = (await manager.execute_command(server_name, command)).strip()
+        except RuntimeError:
+            info[key] = "N/A"
+    return info
+
+
+async def run(rtt_ms: float, iterations: int) -> None:
+    settings = Settings()
+    settings.ssh_servers = {"bench": {"host": "localhost", "username": "bench"}}
+    manager = SSHConnectionManager(settings)
+    conn = LatencyConnection(rtt_ms / 1000)
+    manager.connections["bench"] = conn  # type: ignore[assignment]
+
+    modes = {
+        "per-probe": lambda: legacy_system_info(manager, "bench"),
+        # Bypasses the probe cache, which would answer every call but the first
+        "batched": lambda: manager._fetch_system_info("bench"),
+    }
+
+    print(f"RTT {rtt_ms:.0f} ms, {iterations} iterations")
+    print(f"{'mode':<12}{'round trips':>12}{'median ms':>12}{'min ms':>10}")
+    for name, collect in modes.items():
+        timings = []
+        conn.round_trips = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await collect()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{name:<12}{conn.round_trips // iterations:>12}"
+            f"{statistics.median(timings):>12.1f}{min(timings):>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt", type=float, default=200.0, help="RTT in ms")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rtt, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark command output throughput under different transport profiles.
+
+Streams ``--size`` MB of command output from a local SSH server, once as
+compressible log text and once as base64 of random bytes, for each transport
+profile. Every profile is measured over a direct "lan" link and over a "wan"
+link behind a proxy adding ``--rtt`` ms of round-trip latency and capped at
+``--bandwidth`` Mbit/s. The server runs in the same process, so CPU spent on
+encryption and compression on both ends counts towards the time.
+
+Usage:
+    uv run python benchmarks/bench_transport.py --size 8 --rtt 50 --bandwidth 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from harness import bench_settings, latency_proxy, local_ssh_server
+
+from ssh_remote_control.server import SSHConnectionManager
+
+PROFILES: dict[str, dict[str, Any]] = {
+    "default": {},
+    "compressed": {"ssh_compression": True},
+    "aes-gcm": {"ssh_encryption_algs": ["aes128-gcm@openssh.com"]},
+    "large-window": {
+        "ssh_window_size": 16 * 1024 * 1024,
+        "ssh_max_packet_size": 128 * 1024,
+    },
+    "wan": {
+        "ssh_compression": True,
+        "ssh_window_size": 16 * 1024 * 1024,
+        "ssh_max_packet_size": 128 * 1024,
+    },
+}
+
+LOG_LINE = "2024-01-01T00:00:00 web-1 nginx[1234]: GET /api/status 200 0.004s"
+
+
+def payload_commands(size: int) -> dict[str, str]:
+    """Commands that each write about ``size`` bytes to stdout."""
+    return {
+        "log text": f"yes '{LOG_LINE}' | head -c {size}",
+        "random": f"head -c {size * 3 // 4} /dev/urandom | base64",
+    }
+
+
+@contextlib.asynccontextmanager
+async def link(
+    ssh_port: int, name: str, rtt_ms: float, bandwidth: float
+) -> AsyncIterator[int]:
+    """Yield the port to connect to for the named link."""
+    if name == "lan":
+        yield ssh_port
+        return
+    async with latency_proxy(ssh_port, rtt_ms=rtt_ms, bandwidth_mbps=bandwidth) as port:
+        yield port
+
+
+async def run(size_mb: float, rtt_ms: float, bandwidth: float) -> None:
+    size = int(size_mb * 1024 * 1024)
+    commands = payload_commands(size)
+    async with local_ssh_server() as ssh_port:
+        print(
+            f"{size_mb:g} MB per transfer; wan = {rtt_ms:.0f} ms RTT, "
+            f"{bandwidth:g} Mbit/s"
+        )
+        header = "".join(f"{f'{p} MB/s':>18}" for p in commands)
+        print(f"{'link':<6}{'profile':<14}{header}")
+        for link_name in ("lan", "wan"):
+            async with link(ssh_port, link_name, rtt_ms, bandwidth) as port:
+                for profile, overrides in PROFILES.items():
+                    manager = SSHConnectionManager(
+                        bench_settings({"bench": port}, **overrides)
+                    )
+                    await manager.execute_command("bench", "true")
+                    rates = []
+                    for command in commands.values():
+                        start = time.perf_counter()
+                        output = await manager.execute_command("bench", command)
+                        elapsed = time.perf_counter() - start
+                        rates.append(len(output) / elapsed / 1024 / 1024)
+                    await manager.close_all()
+                    cells = "".join(f"{rate:>18.1f}" for rate in rates)
+                    print(f"{link_name:<6}{profile:<14}{cells}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=float, default=8.0, help="MB per transfer")
+    parser.add_argument("--rtt", type=float, default=50.0, help="RTT in ms")
+    parser.add_argument(
+        "--bandwidth", type=float, default=20.0, help="wan link in Mbit/s"
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.rtt, args.bandwidth))
+
+
+if __name__ == "__main__":
+    main()
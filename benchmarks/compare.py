@@ -0,0 +1,80 @@
+"""Compare two benchmark suite result files and flag regressions.
+
+For every measurement in both files, prints the baseline and candidate
+values and the relative change, where positive means better. A measurement
+that got worse by more than ``--threshold`` percent is a regression, and the
+script then exits with status 1.
+
+Usage:
+    uv run python benchmarks/compare.py baseline.json candidate.json
+    uv run python benchmarks/compare.py old.json new.json --threshold 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+
+def load(path: str) -> dict[str, Any]:
+    data: dict[str, Any] = json.loads(Path(path).read_text())
+    return data
+
+
+def improvement(baseline: dict[str, Any], candidate: dict[str, Any]) -> float:
+    """Relative change in percent, positive when the candidate is better."""
+    old, new = baseline["value"], candidate["value"]
+    if old == 0:
+        return 0.0
+    change = (new - old) / old * 100
+    return change if baseline["better"] == "higher" else -change
+
+
+def describe(meta: dict[str, Any]) -> str:
+    return f"{meta.get('version')} ({meta.get('commit') or 'unknown commit'})"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="allowed slowdown in percent"
+    )
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"baseline:  {describe(baseline['meta'])}")
+    print(f"candidate: {describe(candidate['meta'])}")
+    if baseline["meta"].get("params") != candidate["meta"].get("params"):
+        print("warning: the runs used different parameters")
+
+    regressions = []
+    print(f"{'benchmark':<28}{'baseline':>12}{'candidate':>12}{'change':>9}")
+    for name, old in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if new is None:
+            continue
+        change = improvement(old, new)
+        flag = ""
+        if change < -args.threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<28}{old['value']:>12.3f}{new['value']:>12.3f}"
+            f"{change:>+8.1f}%  {new['unit']}{flag}"
+        )
+    only = set(baseline["results"]) ^ set(candidate["results"])
+    if only:
+        print(f"not in both files: {', '.join(sorted(only))}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:g}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Local SSH test servers for the benchmarks.
+
+``local_ssh_server`` starts an in-process asyncssh server that accepts any
+user without authentication, runs exec requests in a local ``sh`` and serves
+SFTP from the local filesystem. ``latency_proxy`` sits in front of it and
+delays (and optionally rate-limits) traffic in each direction to model a
+slower network link.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import os
+import signal
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import asyncssh
+
+from ssh_remote_control.config import Settings
+
+BENCH_USERNAME = "bench"
+
+
+class _NoAuthServer(asyncssh.SSHServer):
+    """Server that lets every client in without authentication."""
+
+    def begin_auth(self, _username: str) -> bool:
+        return False
+
+
+async def _copy_output(reader: asyncio.StreamReader, writer: Any) -> None:
+    """Copy a local process's output stream to the SSH channel."""
+    while data := await reader.read(65536):
+        writer.write(data)
+        await writer.drain()
+
+
+async def _copy_input(
+    reader: asyncssh.SSHReader[bytes], writer: asyncio.StreamWriter
+) -> None:
+    """Copy the SSH channel's input to a local process until EOF."""
+    with contextlib.suppress(OSError, asyncssh.Error):
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    with contextlib.suppress(OSError):
+        writer.close()
+
+
+async def _run_locally(
+    process: asyncssh.SSHServerProcess[bytes],
+    running: dict[asyncio.Task[Any], asyncio.Event],
+) -> None:
+    """Run an exec request in a local shell, wiring up its standard streams.
+
+    The exit status is only sent once all output has been forwarded, so the
+    channel is never closed while data is still in flight. If the client
+    closes the channel first, as it does to stop ``tail -f``, or the entry
+    for this handler in ``running`` is set, the local process is killed.
+    """
+    handler = asyncio.current_task()
+    assert handler is not None
+    stop = running[handler] = asyncio.Event()
+    local = await asyncio.create_subprocess_shell(
+        process.command or "sh",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        # Its own process group, so children of the shell can be killed too
+        start_new_session=True,
+    )
+    assert local.stdin and local.stdout and local.stderr
+    feeder = asyncio.create_task(_copy_input(process.stdin, local.stdin))
+    output = asyncio.create_task(_copy_outputs(local, process))
+    closed = asyncio.create_task(process.wait_closed())
+    stopped = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait(
+            {output, closed, stopped}, return_when=asyncio.FIRST_COMPLETED
+        )
+        # An error here means the client went away mid-transfer
+        if output.done() and output.exception() is None:
+            process.exit(await local.wait())
+    finally:
+        tasks = (feeder, output, closed, stopped)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if local.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(local.pid, signal.SIGKILL)
+        # Read the pipes to EOF so the subprocess transport is closed
+        await local.communicate()
+        del running[handler]
+
+
+async def _copy_outputs(
+    local: asyncio.subprocess.Process, process: asyncssh.SSHServerProcess[bytes]
+) -> None:
+    """Copy a local process's stdout and stderr to the SSH channel."""
+    assert local.stdout and local.stderr
+    await asyncio.gather(
+        _copy_output(local.stdout, process.stdout),
+        _copy_output(local.stderr, process.stderr),
+    )
+
+
+@contextlib.asynccontextmanager
+async def local_ssh_server(**server_kwargs: Any) -> AsyncIterator[int]:
+    """Run an in-process SSH/SFTP server on localhost and yield its port.
+
+    Exec requests still running when the server stops have their local
+    processes killed and reaped, so none outlive the event loop.
+    """
+    host_key = asyncssh.generate_private_key("ssh-ed25519")
+    # Handler tasks of running exec requests, and the events stopping them
+    running: dict[asyncio.Task[Any], asyncio.Event] = {}
+    server = await asyncssh.create_server(
+        _NoAuthServer,
+        "127.0.0.1",
+        0,
+        server_host_keys=[host_key],
+        process_factory=functools.partial(_run_locally, running=running),
+        encoding=None,
+        sftp_factory=True,
+        **server_kwargs,
+    )
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+        await server.wait_closed()
+        for stop in running.values():
+            stop.set()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _pump(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    latency: float,
+    bytes_per_second: float | None,
+) -> None:
+    """Forward one direction of a proxied connection with delay and rate cap."""
+    queue: asyncio.Queue[tuple[float, bytes]] = asyncio.Queue()
+
+    async def deliver() -> None:
+        next_free = 0.0
+        while True:
+            due, data = await queue.get()
+            if not data:
+                break
+            now = time.monotonic()
+            if bytes_per_second:
+                # Serialize on the simulated link before the latency applies
+                next_free = max(next_free, now) + len(data) / bytes_per_second
+                due = max(due, next_free)
+            if due > now:
+                await asyncio.sleep(due - now)
+            writer.write(data)
+            await writer.drain()
+        with contextlib.suppress(OSError):
+            writer.write_eof()
+
+    delivery = asyncio.create_task(deliver())
+    try:
+        while data := await reader.read(65536):
+            queue.put_nowait((time.monotonic() + latency, data))
+    finally:
+        queue.put_nowait((0.0, b""))
+        with contextlib.suppress(OSError, ConnectionError):
+            await delivery
+
+
+@contextlib.asynccontextmanager
+async def latency_proxy(
+    target_port: int, rtt_ms: float = 0.0, bandwidth_mbps: float | None = None
+) -> AsyncIterator[int]:
+    """Proxy TCP connections to a local port, adding RTT and a bandwidth cap.
+
+    Half the RTT is applied in each direction. ``bandwidth_mbps`` limits
+    each direction to that many megabits per second.
+    """
+    latency = rtt_ms / 2000
+    rate = bandwidth_mbps * 125_000 if bandwidth_mbps else None
+
+    async def handle(
+        client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter
+    ) -> None:
+        server_reader, server_writer = await asyncio.open_connection(
+            "127.0.0.1", target_port
+        )
+        try:
+            await asyncio.gather(
+                _pump(client_reader, server_writer, latency, rate),
+                _pump(server_reader, client_writer, latency, rate),
+            )
+        except asyncio.CancelledError:
+            # Proxied connections are cut when the event loop shuts down
+            pass
+        finally:
+            for writer in (client_writer, server_writer):
+                writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+
+
+def bench_settings(ports: dict[str, int], **overrides: Any) -> Settings:
+    """Build settings pointing each named server at a local port."""
+    settings = Settings()
+    settings.ssh_servers = {
+        name: {"host": "127.0.0.1", "port": port, "username": BENCH_USERNAME}
+        for name, port in ports.items()
+    }
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    return settings
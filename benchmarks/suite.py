@@ -0,0 +1,336 @@
+"""Run the benchmark suite and save machine-readable results.
+
+Every scenario runs against in-process asyncssh servers from ``harness``,
+optionally behind a proxy adding ``--rtt`` ms of round-trip latency and a
+``--bandwidth`` Mbit/s cap:
+
+- connect: time to open a server's first connection (p50/p95)
+- execute: small commands per second, one after another and concurrently,
+  and MB/s of large command output
+- fanout: wall time of one command on 1 up to ``--max-hosts`` servers
+- tail: lines per second delivered by tail_file
+- sftp: upload and download MB/s
+- websocket: command round trip and log line delivery latency through the
+  web app over a real WebSocket
+
+Results are printed and, with ``--output``, written as JSON together with
+the version, commit and environment they were measured on. Compare two
+result files with ``benchmarks/compare.py``.
+
+Usage:
+    uv run python benchmarks/suite.py --output bench-results/main.json
+    uv run python benchmarks/suite.py --only connect,execute --rtt 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import asyncssh
+import uvicorn
+import websockets
+from harness import BENCH_USERNAME, bench_settings, latency_proxy, local_ssh_server
+
+from ssh_remote_control import __version__
+from ssh_remote_control.server import SSHConnectionManager
+from ssh_remote_control.web_server import create_app
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FANOUT_HOSTS = (1, 10, 50, 100, 250, 500)
+
+
+class Results:
+    """Collects named measurements with their unit and direction."""
+
+    def __init__(self) -> None:
+        self.items: dict[str, dict[str, Any]] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str) -> None:
+        self.items[name] = {"value": round(value, 4), "unit": unit, "better": better}
+        print(f"  {name:<34}{value:>12.3f} {unit}")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+@contextlib.asynccontextmanager
+async def link(ssh_port: int, args: argparse.Namespace) -> AsyncIterator[int]:
+    """Yield the port to connect to, behind a proxy if a slow link is asked for."""
+    if not args.rtt and not args.bandwidth:
+        yield ssh_port
+        return
+    async with latency_proxy(ssh_port, args.rtt, args.bandwidth or None) as port:
+        yield port
+
+
+async def bench_connect(port: int, args: argparse.Namespace, results: Results) -> None:
+    times = []
+    for _ in range(args.connects):
+        manager = SSHConnectionManager(bench_settings({"bench": port}))
+        start = time.perf_counter()
+        await manager.connect("bench")
+        times.append((time.perf_counter() - start) * 1000)
+        await manager.close_all()
+    results.add("connect.p50", statistics.median(times), "ms", "lower")
+    results.add("connect.p95", percentile(times, 95), "ms", "lower")
+
+
+async def bench_execute(port: int, args: argparse.Namespace, results: Results) -> None:
+    manager = SSHConnectionManager(bench_settings({"bench": port}))
+    await manager.execute_command("bench", "true")
+
+    start = time.perf_counter()
+    for i in range(args.commands):
+        await manager.execute_command("bench", f"echo {i}")
+    sequential = args.commands / (time.perf_counter() - start)
+    results.add("execute.sequential", sequential, "cmd/s", "higher")
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(manager.execute_command("bench", f"echo {i}") for i in range(args.commands))
+    )
+    concurrent = args.commands / (time.perf_counter() - start)
+    results.add("execute.concurrent", concurrent, "cmd/s", "higher")
+
+    size = int(args.size * 1024 * 1024)
+    start = time.perf_counter()
+    output = await manager.execute_command("bench", f"yes | head -c {size}")
+    elapsed = time.perf_counter() - start
+    results.add("execute.output", len(output) / elapsed / 2**20, "MB/s", "higher")
+    await manager.close_all()
+
+
+async def bench_fanout(port: int, args: argparse.Namespace, results: Results) -> None:
+    for hosts in (n for n in FANOUT_HOSTS if n <= args.max_hosts):
+        names = [f"host-{i}" for i in range(hosts)]
+        manager = SSHConnectionManager(
+            bench_settings(dict.fromkeys(names, port), ssh_max_open_connections=0)
+        )
+        start = time.perf_counter()
+        failed = 0
+        async for result in manager.execute_fanout(names, "true"):
+            failed += not result["success"]
+        elapsed = time.perf_counter() - start
+        await manager.close_all()
+        if failed:
+            print(f"  fanout to {hosts} hosts: {failed} failed")
+        results.add(f"fanout.{hosts}_hosts", elapsed, "s", "lower")
+
+
+async def bench_tail(port: int, args: argparse.Namespace, results: Results) -> None:
+    manager = SSHConnectionManager(bench_settings({"bench": port}))
+    with tempfile.NamedTemporaryFile("w", suffix=".log") as log:
+        log.writelines(f"line {i} of the benchmark log\n" for i in range(args.lines))
+        log.flush()
+        received = 0
+        done = asyncio.Event()
+
+        async def count(lines: list[str], dropped: int) -> None:
+            nonlocal received
+            received += len(lines) + dropped
+            if received >= args.lines:
+                done.set()
+
+        start = time.perf_counter()
+        process = await manager.tail_file(
+            "bench", log.name, lines=args.lines, batch_callback=count
+        )
+        await asyncio.wait_for(done.wait(), 120)
+        elapsed = time.perf_counter() - start
+        process.close()
+    await manager.close_all()
+    results.add("tail.lines", args.lines / elapsed, "lines/s", "higher")
+
+
+async def bench_sftp(port: int, args: argparse.Namespace, results: Results) -> None:
+    manager = SSHConnectionManager(bench_settings({"bench": port}))
+    size = int(args.size * 1024 * 1024)
+    payload = os.urandom(size)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = f"{temp_dir}/upload.bin"
+        start = time.perf_counter()
+        await manager.upload_file("bench", path, payload, verify=False)
+        results.add(
+            "sftp.upload",
+            size / (time.perf_counter() - start) / 2**20,
+            "MB/s",
+            "higher",
+        )
+
+        start = time.perf_counter()
+        received = 0
+        async for chunk in manager.stream_file("bench", path):
+            received += len(chunk)
+        elapsed = time.perf_counter() - start
+        results.add("sftp.download", received / elapsed / 2**20, "MB/s", "higher")
+    await manager.close_all()
+
+
+@contextlib.asynccontextmanager
+async def web_app(port: int) -> AsyncIterator[int]:
+    """Serve the web app on a free port, configured for the bench server."""
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml") as config:
+        json.dump(
+            {
+                "ssh_servers": {
+                    "bench": {
+                        "host": "127.0.0.1",
+                        "port": port,
+                        "username": BENCH_USERNAME,
+                    }
+                },
+                "log_level": "warning",
+            },
+            config,
+        )
+        config.flush()
+        # The app reads its config file and static files relative to the repo
+        cwd = os.getcwd()
+        os.environ["SSH_REMOTE_CONTROL_CONFIG"] = config.name
+        os.chdir(REPO_ROOT)
+        try:
+            app = create_app()
+        finally:
+            os.chdir(cwd)
+            del os.environ["SSH_REMOTE_CONTROL_CONFIG"]
+        server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+        )
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        web_port = server.servers[0].sockets[0].getsockname()[1]
+        try:
+            yield web_port
+        finally:
+            server.should_exit = True
+            await serving
+
+
+async def bench_websocket(
+    port: int, args: argparse.Namespace, results: Results
+) -> None:
+    async with (
+        web_app(port) as web_port,
+        websockets.connect(f"ws://127.0.0.1:{web_port}/ws/bench") as ws,
+    ):
+
+        async def request(message: dict[str, Any], reply_type: str) -> None:
+            await ws.send(json.dumps(message))
+            while json.loads(await ws.recv())["type"] != reply_type:
+                pass
+
+        command = {"type": "execute_command", "command": "echo ok"}
+        await request(command, "command_output")
+        times = []
+        for _ in range(args.round_trips):
+            start = time.perf_counter()
+            await request(command, "command_output")
+            times.append((time.perf_counter() - start) * 1000)
+        results.add("websocket.command.p50", statistics.median(times), "ms", "lower")
+        results.add("websocket.command.p95", percentile(times, 95), "ms", "lower")
+
+        with tempfile.NamedTemporaryFile("a", suffix=".log") as log:
+            await request(
+                {"type": "start_log_tail", "file_path": log.name}, "log_started"
+            )
+            times = []
+            for i in range(args.round_trips):
+                start = time.perf_counter()
+                log.write(f"line {i}\n")
+                log.flush()
+                while True:
+                    message = json.loads(await ws.recv())
+                    if message["type"] == "log_batch" and any(
+                        line == f"line {i}" for line in message["lines"]
+                    ):
+                        break
+                times.append((time.perf_counter() - start) * 1000)
+        results.add("websocket.log_line.p50", statistics.median(times), "ms", "lower")
+        results.add("websocket.log_line.p95", percentile(times, 95), "ms", "lower")
+
+
+SCENARIOS: dict[str, Callable[[int, argparse.Namespace, Results], Awaitable[None]]] = {
+    "connect": bench_connect,
+    "execute": bench_execute,
+    "fanout": bench_fanout,
+    "tail": bench_tail,
+    "sftp": bench_sftp,
+    "websocket": bench_websocket,
+}
+
+
+def metadata(args: argparse.Namespace) -> dict[str, Any]:
+    """Describe what the results were measured on."""
+    commit = None
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    return {
+        "version": __version__,
+        "commit": commit,
+        "timestamp": dt.datetime.now(dt.UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "asyncssh": asyncssh.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    results = Results()
+    selected = args.only.split(",") if args.only else list(SCENARIOS)
+    async with local_ssh_server() as ssh_port, link(ssh_port, args) as port:
+        for name in selected:
+            print(name)
+            await SCENARIOS[name](port, args, results)
+    return {"meta": metadata(args), "results": results.items}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--only", help=f"comma-separated subset of {list(SCENARIOS)}")
+    parser.add_argument("--rtt", type=float, default=0.0, help="RTT in ms")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Mbit/s")
+    parser.add_argument("--connects", type=int, default=20)
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--size", type=float, default=16.0, help="MB per transfer")
+    parser.add_argument("--max-hosts", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--round-trips", type=int, default=50)
+    args = parser.parse_args()
+    if args.only and (unknown := set(args.only.split(",")) - set(SCENARIOS)):
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
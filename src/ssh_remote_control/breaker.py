@@ -0,0 +1,89 @@
+"""Per-host circuit breaker for SSH connection attempts.
+
+After ``threshold`` consecutive connect failures the circuit opens and
+attempts fail immediately with ``CircuitOpenError`` instead of waiting out
+another connect timeout. Once the backoff delay has passed the circuit is
+half-open: the next attempt is let through as a probe. If it fails the
+circuit reopens with a longer delay; if it succeeds the owner discards the
+breaker, so only hosts with recent failures keep one. Delays grow
+exponentially up to ``max_delay`` and are jittered so that many hosts that
+failed together are not retried together.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Any
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised when a connection is refused because the host's circuit is open."""
+
+
+class CircuitBreaker:
+    """Tracks recent connect failures for one host."""
+
+    def __init__(
+        self, threshold: int = 1, base_delay: float = 5.0, max_delay: float = 300.0
+    ) -> None:
+        """Initialize a closed circuit.
+
+        Args:
+            threshold: Consecutive failures that open the circuit.
+            base_delay: Seconds the circuit stays open after it first opens.
+            max_delay: Upper bound on the delay as failures continue.
+        """
+        self.threshold = max(1, threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error: str | None = None
+
+    @property
+    def state(self) -> str:
+        """Return "closed", "open" or "half_open"."""
+        if self.failures < self.threshold:
+            return "closed"
+        if time.monotonic() < self.retry_at:
+            return "open"
+        return "half_open"
+
+    def check(self, name: str) -> None:
+        """Allow an attempt unless the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if self.state == "open":
+            retry_in = self.retry_at - time.monotonic()
+            raise CircuitOpenError(
+                f"Circuit open for {name} after {self.failures} failed "
+                f"connection attempts ({self.last_error}); "
+                f"retrying in {retry_in:.0f}s"
+            )
+
+    def record_failure(self, error: BaseException) -> None:
+        """Count a failed attempt, opening the circuit at the threshold."""
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        if self.failures < self.threshold:
+            return
+        exponent = min(self.failures - self.threshold, 32)
+        delay = min(self.max_delay, self.base_delay * 2**exponent)
+        # Equal jitter: wait between half and all of the backoff delay
+        jitter = 0.5 + random.random() / 2  # noqa: S311 - not security sensitive
+        self.retry_at = time.monotonic() + delay * jitter
+
+    def stats(self) -> dict[str, Any]:
+        """Describe the circuit's state for status reporting."""
+        state = self.state
+        return {
+            "state": state,
+            "failures": self.failures,
+            "retry_in": (
+                round(self.retry_at - time.monotonic(), 1) if state == "open" else 0
+            ),
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,125 @@
+"""TTL cache with single-flight loading for read-only remote probes.
+
+Results are keyed by ``(operation, server, *args)``. Concurrent requests for
+a key that is not cached share one in-flight load instead of each running the
+remote command, and cached results expire after the TTL given for the
+request. The least recently used entries are evicted beyond ``max_entries``.
+Failed loads are never cached.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from typing import Any
+
+# (operation, server, *args), e.g. ("service_status", "web-1", "nginx")
+CacheKey = tuple[Hashable, ...]
+
+
+class _Flight:
+    """A load in progress and whether an invalidation has overtaken it."""
+
+    def __init__(self, task: asyncio.Future[Any]) -> None:
+        self.task = task
+        self.stale = False
+
+
+class ResultCache:
+    """Bounded LRU cache of probe results with per-request TTLs."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        """Initialize an empty cache holding at most ``max_entries`` results."""
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[CacheKey, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get(
+        self, key: CacheKey, ttl: float, load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached result for ``key``, loading it if needed.
+
+        Args:
+            key: Cache key; its first two items are the operation and server.
+            ttl: Seconds to keep a fresh result (0 only coalesces requests).
+            load: Coroutine function producing the result.
+
+        Returns:
+            A copy of the result, so callers may modify it freely.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            del self._entries[key]
+
+        flight = self._inflight.get(key)
+        if flight is None:
+            self.misses += 1
+            flight = _Flight(asyncio.ensure_future(load()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(partial(self._finish, key, flight, ttl))
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the load for the others
+        return copy.deepcopy(await asyncio.shield(flight.task))
+
+    def invalidate(
+        self, server_name: str | None = None, operation: str | None = None
+    ) -> int:
+        """Drop cached results for a server and/or operation (all if neither).
+
+        Loads already in flight for matching keys still answer their current
+        callers but are not cached. Returns the number of entries dropped.
+        """
+
+        def matches(key: CacheKey) -> bool:
+            return (operation is None or key[0] == operation) and (
+                server_name is None or key[1] == server_name
+            )
+
+        for key in [key for key in self._inflight if matches(key)]:
+            self._inflight.pop(key).stale = True
+        stale = [key for key in self._entries if matches(key)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> dict[str, int]:
+        """Return entry counts and hit, miss and eviction counters."""
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+    def _finish(
+        self, key: CacheKey, flight: _Flight, ttl: float, _task: asyncio.Future[Any]
+    ) -> None:
+        """Store a completed load unless it failed or was invalidated."""
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if flight.task.cancelled() or flight.task.exception() is not None:
+            return
+        if flight.stale or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, flight.task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
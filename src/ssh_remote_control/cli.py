@@ -9,6 +9,13 @@ from pathlib import Path
 import typer
 import uvicorn
 from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TransferSpeedColumn,
+)
 from rich.table import Table
 
 from . import __version__
@@ -160,6 +167,126 @@ def execute(
     asyncio.run(_execute())
 
 
+@app.command()
+def fanout(
+    command: str = typer.Argument(..., help="Command to execute"),
+    servers: list[str] | None = typer.Option(
+        None, "--server", "-s", help="Server to run on (repeatable)"
+    ),
+    groups: list[str] | None = typer.Option(
+        None, "--group", "-g", help="Server group to run on, or 'all' (repeatable)"
+    ),
+    timeout: int = typer.Option(30, "--timeout", "-t", help="Per-server timeout"),
+) -> None:
+    """Execute a command on many servers at once."""
+
+    async def _fanout() -> None:
+        settings = Settings()
+
+        try:
+            server_names = settings.expand_servers(servers or [], groups or [])
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            return
+        if not server_names:
+            console.print("[red]No servers selected; use --server or --group[/red]")
+            return
+
+        console.print(f"Executing '{command}' on {len(server_names)} servers...")
+
+        manager = SSHConnectionManager(settings)
+        failed = 0
+        try:
+            async for result in manager.execute_fanout(
+                server_names, command, timeout=timeout
+            ):
+                if result["success"]:
+                    console.print(
+                        f"[green]{result['server']}[/green] "
+                        f"({result['duration']:.2f}s):\n{result['output'].rstrip()}"
+                    )
+                else:
+                    failed += 1
+                    console.print(
+                        f"[red]{result['server']}[/red] "
+                        f"({result['duration']:.2f}s): {result['error']}"
+                    )
+        finally:
+            await manager.close_all()
+
+        console.print(
+            f"{len(server_names) - failed} succeeded, {failed} failed "
+            f"out of {len(server_names)} servers"
+        )
+
+    asyncio.run(_fanout())
+
+
+@app.command()
+def upload(
+    server: str = typer.Argument(..., help="Server name"),
+    local_path: Path = typer.Argument(..., help="Local file to upload"),
+    remote_path: str = typer.Argument(..., help="Destination path on the server"),
+    resume: bool = typer.Option(
+        False, "--resume", help="Continue a partial upload from the remote size"
+    ),
+    verify: bool = typer.Option(
+        True, "--verify/--no-verify", help="Check the remote SHA-256 afterwards"
+    ),
+) -> None:
+    """Upload a file to a remote server."""
+
+    async def _upload() -> None:
+        settings = Settings()
+
+        if server not in settings.ssh_servers:
+            console.print(f"[red]Server '{server}' not found in configuration[/red]")
+            return
+        if not local_path.is_file():
+            console.print(f"[red]Local file '{local_path}' not found[/red]")
+            return
+
+        manager = SSHConnectionManager(settings)
+        try:
+            with Progress(
+                TextColumn("{task.description}"),
+                BarColumn(),
+                DownloadColumn(),
+                TransferSpeedColumn(),
+                console=console,
+            ) as progress:
+                task = progress.add_task(
+                    f"{local_path.name} -> {server}:{remote_path}",
+                    total=local_path.stat().st_size,
+                )
+
+                async def _progress(done: int, _total: int | None) -> None:
+                    progress.update(task, completed=done)
+
+                result = await manager.upload_file(
+                    server,
+                    remote_path,
+                    local_path,
+                    resume=resume,
+                    verify=verify,
+                    progress=_progress,
+                )
+
+            if result["resumed_from"]:
+                console.print(f"Resumed from byte {result['resumed_from']}")
+            console.print(
+                f"[green]Uploaded {result['size']} bytes[/green] "
+                f"(sha256 {result['sha256']}"
+                f"{', verified' if result['verified'] else ''})"
+            )
+        except (ConnectionError, OSError, ValueError, RuntimeError) as e:
+            console.print(f"[red]Upload failed: {e}[/red]")
+        finally:
+            await manager.close_all()
+
+    asyncio.run(_upload())
+
+
 @app.command()
 def init_config(
     config_path: str = typer.Option(
@@ -2,19 +2,27 @@
 
 from __future__ import annotations
 
+import copy
 import os
+from collections.abc import Iterable, Mapping
+from functools import cached_property
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any, cast
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .inventory import InventoryCache
 from .yaml_compat import safe_load
 
 
 class ServerConfig(BaseModel):
     """Configuration for a single SSH server."""
 
+    # Validated instances are cached and shared by Settings
+    model_config = ConfigDict(frozen=True)
+
     host: str
     port: int = 22
     username: str
@@ -22,6 +30,95 @@ class ServerConfig(BaseModel):
     known_hosts: str | None = None
     password: str | None = None
     passphrase: str | None = None
+    # Run commands in a long-lived shell; None uses ssh_persistent_shell
+    persistent_shell: bool | None = None
+    # Name of another configured server to tunnel through (like ProxyJump)
+    jump_host: str | None = None
+    # Transport tuning; None uses the matching ssh_* setting
+    compression: bool | None = None
+    encryption_algs: list[str] | None = None
+    mac_algs: list[str] | None = None
+    kex_algs: list[str] | None = None
+    window_size: int | None = None
+    max_packet_size: int | None = None
+
+
+class ServerIndex:
+    """Validated ServerConfig per server, kept in step with ssh_servers.
+
+    Each entry remembers a copy of the raw dict it came from. A refresh only
+    records which servers were added or changed; each of those is validated
+    on its first lookup, so loading a large inventory does not pay for
+    validating servers that are never used. Lookups of unchanged servers
+    return the same immutable instance.
+    """
+
+    def __init__(self) -> None:
+        self._configs: dict[str, ServerConfig] = {}
+        self._sources: dict[str, Any] = {}
+        self._pending: set[str] = set()
+        self._indexed: dict[str, dict[str, Any]] | None = None
+        self._view: Mapping[str, ServerConfig] = MappingProxyType(self._configs)
+        self.names: tuple[str, ...] = ()
+
+    @property
+    def configs(self) -> Mapping[str, ServerConfig]:
+        """Read-only map of every valid server's config, validating all."""
+        for name in list(self._pending):
+            self._validate(name)
+        return self._view
+
+    def refresh(self, servers: dict[str, dict[str, Any]]) -> list[str]:
+        """Re-index ``servers``; returns the names added, changed or removed."""
+        changed: list[str] = []
+        for name, raw in servers.items():
+            if self._sources.get(name) != raw:
+                self._record(name, raw)
+                changed.append(name)
+        for name in list(self._sources):
+            if name not in servers:
+                del self._sources[name]
+                self._configs.pop(name, None)
+                self._pending.discard(name)
+                changed.append(name)
+        self.names = tuple(servers)
+        self._indexed = servers
+        return changed
+
+    def sync(self, servers: dict[str, dict[str, Any]]) -> None:
+        """Refresh if ``servers`` was replaced or servers added or removed."""
+        if servers is not self._indexed or len(servers) != len(self.names):
+            self.refresh(servers)
+
+    def get(self, name: str, raw: dict[str, Any]) -> ServerConfig | None:
+        """Return a server's config, validating ``raw`` if new or changed."""
+        if self._sources.get(name) != raw:
+            self._record(name, raw)
+        if name in self._pending:
+            self._validate(name)
+        return self._configs.get(name)
+
+    def _record(self, name: str, raw: Any) -> None:
+        # Copy so that later in-place edits of ssh_servers are detected;
+        # server values are scalars or lists of strings
+        if isinstance(raw, dict):
+            raw = raw.copy()
+            for key, value in raw.items():
+                if isinstance(value, list):
+                    raw[key] = list(value)
+        else:
+            raw = copy.deepcopy(raw)
+        self._sources[name] = raw
+        self._configs.pop(name, None)
+        self._pending.add(name)
+
+    def _validate(self, name: str) -> None:
+        self._pending.discard(name)
+        raw = self._sources[name]
+        try:
+            self._configs[name] = ServerConfig(**raw)
+        except (TypeError, ValidationError):
+            self._configs.pop(name, None)
 
 
 class WebConfig(BaseModel):
@@ -49,6 +146,17 @@ class Settings(BaseSettings):
     # SSH servers configuration
     ssh_servers: dict[str, dict[str, Any]] = Field(default_factory=dict)
 
+    # Named groups of servers for fan-out execution
+    server_groups: dict[str, list[str]] = Field(default_factory=dict)
+
+    # Inventory files adding servers (and, from Ansible inventories, server
+    # groups): {"type": ..., "path": ...} with type ssh_config, ansible_ini
+    # or ansible_yaml and a path that may be a glob. ssh_servers and
+    # server_groups entries take precedence. Parsed inventories are also
+    # kept in inventory_cache_dir, if set, so restarts skip unchanged files.
+    inventory_sources: list[dict[str, str]] = Field(default_factory=list)
+    inventory_cache_dir: str | None = None
+
     # Web configuration
     web: WebConfig = Field(default_factory=WebConfig)
 
@@ -59,14 +167,106 @@ class Settings(BaseSettings):
     ssh_connect_timeout: int = 30
     ssh_keepalive_interval: int = 60
 
+    # SSH transport tuning (overridable per server): zlib compression,
+    # algorithm preferences in order, and the flow control window and maximum
+    # packet size in bytes for each channel. Empty/None uses asyncssh's
+    # defaults (a 2 MiB window and 32 KiB packets).
+    ssh_compression: bool = False
+    ssh_encryption_algs: list[str] = Field(default_factory=list)
+    ssh_mac_algs: list[str] = Field(default_factory=list)
+    ssh_kex_algs: list[str] = Field(default_factory=list)
+    ssh_window_size: int | None = None
+    ssh_max_packet_size: int | None = None
+
+    # SSH connection pool settings (per server)
+    ssh_pool_min_connections: int = 1
+    ssh_pool_max_connections: int = 4
+    ssh_max_channels_per_connection: int = 10
+
+    # Connection eviction: seconds before an unused server is disconnected
+    # and the cap on SSH connections open across all servers (0 disables)
+    ssh_idle_timeout: int = 600
+    ssh_max_open_connections: int = 256
+
+    # Circuit breaker: consecutive connect failures before a server's
+    # connections fail fast (0 disables), and the backoff before a retry
+    # (doubling from the base delay up to the max, with jitter)
+    ssh_circuit_failure_threshold: int = 1
+    ssh_circuit_base_delay: float = 5.0
+    ssh_circuit_max_delay: float = 300.0
+
+    # Fan-out execution limits: commands in flight across all servers, and
+    # concurrent fan-out commands on any one server
+    fanout_max_concurrency: int = 64
+    fanout_per_host_concurrency: int = 4
+
+    # Run execute_command through one long-lived shell per server instead of
+    # a new session channel per command (overridable per server)
+    ssh_persistent_shell: bool = False
+
+    # SFTP transfer tuning: bytes per read/write request and requests in flight
+    sftp_chunk_size: int = 65536
+    sftp_max_requests: int = 8
+
+    # Streaming output: lines buffered per stream, what to do when the buffer
+    # is full ("block", "drop_oldest" or "sample"), and how lines are batched
+    stream_queue_size: int = 10000
+    stream_overflow_policy: str = "block"
+    stream_sample_every: int = 10
+    stream_batch_size: int = 200
+    stream_batch_interval: float = 0.05
+
+    # Output of commands run from the API and WebSocket: bytes returned
+    # inline, bytes kept in total (the command is stopped beyond this), and
+    # where and for how long larger output is kept on disk
+    command_output_memory_limit: int = 1024 * 1024
+    command_output_max_bytes: int = 100 * 1024 * 1024
+    command_output_spill_dir: str | None = None
+    command_output_spill_ttl: int = 600
+    command_output_spill_max_files: int = 32
+
+    # Seconds to cache read-only probe results per operation (0 or missing
+    # disables caching), and the most results kept across all servers
+    probe_cache_ttl: dict[str, float] = Field(
+        default_factory=lambda: {
+            "system_info": 10.0,
+            "services": 10.0,
+            "service_status": 5.0,
+        }
+    )
+    probe_cache_max_entries: int = 1024
+
+    # Servers to connect to in the background when the web server starts:
+    # server names, server group names, or "*" for every configured server
+    warmup_servers: list[str] = Field(default_factory=list)
+    warmup_concurrency: int = 8
+
+    # Seconds between checks of the config file for changes, which are then
+    # applied without a restart (0, the default, disables), and how long
+    # connections to a removed or changed server may finish their work
+    # before being closed
+    config_reload_interval: float = 0.0
+    config_reload_drain_timeout: float = 30.0
+
+    # The config file that was loaded and its (mtime, size) at the time
+    _config_file: Path | None = PrivateAttr(default=None)
+    _config_stamp: tuple[int, int] | None = PrivateAttr(default=None)
+    _inventory_cache: InventoryCache | None = PrivateAttr(default=None)
+
     def __init__(self, **kwargs: Any) -> None:
         """Initialize settings with config file support."""
         super().__init__(**kwargs)
         self._load_config_files()
+        try:
+            self._merge_inventories(*self._load_inventories(self.inventory_sources))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Warning: Could not load inventory: {e}")
         self._load_env_servers()
+        self.refresh_servers()
 
-    def _load_config_files(self) -> None:
-        """Load configuration from YAML file."""
+    @staticmethod
+    def _config_paths() -> list[Path]:
+        """Return the config file locations in order of precedence."""
         config_paths = [
             Path.cwd() / "ssh-remote-control.yaml",
             Path.cwd() / "ssh-remote-control.yml",
@@ -77,19 +277,95 @@ class Settings(BaseSettings):
         config_file = os.environ.get("SSH_REMOTE_CONTROL_CONFIG")
         if config_file:
             config_paths.insert(0, Path(config_file))
+        return config_paths
 
-        for config_path in config_paths:
+    @staticmethod
+    def _stamp(config_path: Path) -> tuple[int, int] | None:
+        """Return a file's modification time and size, or None if it is gone."""
+        try:
+            stat = config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_config_files(self) -> None:
+        """Load configuration from YAML file."""
+        for config_path in self._config_paths():
             if not config_path.exists():
                 continue
 
             try:
+                stamp = self._stamp(config_path)
                 config = self._load_config_file(config_path)
                 if config:
                     self._apply_config(config)
+                self._config_file = config_path
+                self._config_stamp = stamp
                 break
             except Exception as e:  # pylint: disable=broad-exception-caught
                 print(f"Warning: Could not load config file {config_path}: {e}")
 
+    def config_changed(self) -> bool:
+        """Check whether the config or an inventory file was modified."""
+        if self._inventory_cache is not None and self._inventory_cache.changed():
+            return True
+        config_path = self._config_file or next(
+            (path for path in self._config_paths() if path.exists()), None
+        )
+        if config_path is None:
+            return False
+        stamp = self._stamp(config_path)
+        # A deleted file keeps the configuration it last had
+        return stamp is not None and stamp != self._config_stamp
+
+    def reload(self) -> dict[str, list[str]]:
+        """Load the config file again and apply it in place.
+
+        Top-level settings take the file's values; settings no longer in the
+        file keep their current value, except ssh_servers, which is replaced
+        (servers from SSH_SERVERS_* environment variables are kept). Only
+        added or changed servers are validated again.
+
+        Returns:
+            The names of the servers that were "added", "removed" and
+            "changed".
+
+        Raises:
+            ValueError: If no config file exists or it is not a mapping;
+                the current configuration is kept
+            OSError: If the file cannot be read
+        """
+        config_path = self._config_file or next(
+            (path for path in self._config_paths() if path.exists()), None
+        )
+        if config_path is None:
+            raise ValueError("No config file to reload")
+        # Record the attempt so that a broken file is not re-read every check
+        self._config_file = config_path
+        self._config_stamp = self._stamp(config_path)
+        config = self._load_config_file(config_path)
+        if config is None:
+            raise ValueError(f"Config file {config_path} is empty or not a mapping")
+
+        # Inventories first, so that a broken one leaves everything as it was
+        servers, groups = self._load_inventories(
+            config.get("inventory_sources", self.inventory_sources)
+        )
+        before = set(self.list_servers())
+        config.setdefault("ssh_servers", {})
+        config.setdefault("server_groups", {})
+        self._apply_config(config)
+        self._merge_inventories(servers, groups)
+        self._load_env_servers()
+        changed = self.refresh_servers()
+        return {
+            "added": [name for name in changed if name not in before],
+            "removed": [name for name in changed if not self.has_server(name)],
+            "changed": [
+                name for name in changed if name in before and self.has_server(name)
+            ],
+        }
+
     def _load_config_file(self, config_path: Path) -> dict[str, Any] | None:
         """Load configuration from a file."""
         with open(config_path, encoding="utf-8") as f:
@@ -109,6 +385,42 @@ class Settings(BaseSettings):
             else:
                 setattr(self, key, value)
 
+    def _load_inventories(
+        self, sources: list[dict[str, str]]
+    ) -> tuple[dict[str, dict[str, Any]], dict[str, list[str]]]:
+        """Load the servers and groups of inventory sources, later ones winning.
+
+        Raises:
+            ValueError: If a source is malformed or has an unknown type
+            OSError: If an inventory file cannot be read
+        """
+        cache_dir = self.inventory_cache_dir
+        cache = self._inventory_cache
+        if cache is None or cache.cache_dir != (
+            Path(cache_dir).expanduser() if cache_dir else None
+        ):
+            cache = self._inventory_cache = InventoryCache(cache_dir)
+        servers: dict[str, dict[str, Any]] = {}
+        groups: dict[str, list[str]] = {}
+        keys = []
+        for source in sources:
+            if "type" not in source or "path" not in source:
+                raise ValueError(f"Inventory source needs a type and path: {source}")
+            keys.append((source["type"], source["path"]))
+            inventory = cache.load(source["type"], source["path"])
+            servers.update(inventory.servers)
+            groups.update(inventory.groups)
+        cache.retain(keys)
+        return servers, groups
+
+    def _merge_inventories(
+        self, servers: dict[str, dict[str, Any]], groups: dict[str, list[str]]
+    ) -> None:
+        """Add inventory servers and groups under those configured inline."""
+        for name, entry in servers.items():
+            self.ssh_servers[name] = {**entry, **self.ssh_servers.get(name, {})}
+        self.server_groups = {**groups, **self.server_groups}
+
     def _load_env_servers(self) -> None:
         """Load SSH servers from environment variables."""
         # Look for SSH_SERVERS_<name>_<key> environment variables
@@ -141,19 +453,115 @@ class Settings(BaseSettings):
                 self.ssh_servers[name] = {}
             self.ssh_servers[name].update(config)
 
+    @cached_property
+    def server_index(self) -> ServerIndex:
+        """Index of validated server configurations (see ServerIndex)."""
+        return ServerIndex()
+
+    @property
+    def servers(self) -> Mapping[str, ServerConfig]:
+        """Read-only map of every valid server's validated configuration."""
+        self.server_index.sync(self.ssh_servers)
+        return self.server_index.configs
+
+    def refresh_servers(self) -> list[str]:
+        """Re-index ssh_servers, validating only added or changed entries.
+
+        Returns:
+            Names of the servers that were added, changed or removed.
+        """
+        return self.server_index.refresh(self.ssh_servers)
+
     def get_server_config(self, name: str) -> ServerConfig | None:
-        """Get configuration for a specific server."""
-        if name not in self.ssh_servers:
+        """Get configuration for a specific server.
+
+        Returns the cached instance unless the server's raw configuration
+        changed since it was validated. Returns None for unknown servers and
+        servers whose configuration is invalid.
+        """
+        raw = self.ssh_servers.get(name)
+        if raw is None:
             return None
+        return self.server_index.get(name, raw)
 
-        try:
-            return ServerConfig(**self.ssh_servers[name])
-        except Exception:  # pylint: disable=broad-exception-caught
-            return None
+    def has_server(self, name: str) -> bool:
+        """Return whether a server is configured."""
+        return name in self.ssh_servers
 
-    def list_servers(self) -> list[str]:
+    def list_servers(self) -> tuple[str, ...]:
         """List all configured server names."""
-        return list(self.ssh_servers.keys())  # pylint: disable=no-member
+        self.server_index.sync(self.ssh_servers)
+        return self.server_index.names
+
+    def expand_servers(
+        self, servers: Iterable[str] = (), groups: Iterable[str] = ()
+    ) -> list[str]:
+        """Resolve server and group names into a de-duplicated server list.
+
+        The group name ``all`` selects every configured server unless a group
+        of that name is defined.
+
+        Raises:
+            ValueError: If a server or group is not configured
+        """
+        names: list[str] = list(servers)
+        unknown = [name for name in names if name not in self.ssh_servers]
+
+        for group in groups:
+            if group in self.server_groups:
+                names.extend(self.server_groups[group])
+            elif group == "all":
+                names.extend(self.ssh_servers)
+            else:
+                unknown.append(f"group:{group}")
+
+        unknown.extend(
+            name
+            for name in names
+            if name not in self.ssh_servers and name not in unknown
+        )
+        if unknown:
+            raise ValueError(f"Unknown servers or groups: {', '.join(unknown)}")
+        return list(dict.fromkeys(names))
+
+    def transport_option(self, config: ServerConfig, name: str) -> Any:
+        """Return a server's transport option, falling back to ssh_<name>."""
+        value = getattr(config, name)
+        return getattr(self, f"ssh_{name}") if value is None else value
+
+    def jump_chain(self, name: str) -> list[str]:
+        """Return the jump hosts used to reach a server, nearest hop first.
+
+        Raises:
+            ValueError: If a jump host is not configured or the chain loops
+        """
+        chain: list[str] = []
+        config = self.get_server_config(name)
+        while config is not None and config.jump_host:
+            jump_host = config.jump_host
+            if jump_host == name or jump_host in chain:
+                hops = " -> ".join([name, *chain, jump_host])
+                raise ValueError(f"Jump host cycle: {hops}")
+            chain.append(jump_host)
+            config = self.get_server_config(jump_host)
+            if config is None:
+                raise ValueError(f"Jump host {jump_host} for {name} is not configured")
+        return chain
+
+    def warmup_targets(self) -> list[str]:
+        """Resolve warmup_servers into a de-duplicated list of server names.
+
+        Unknown names are kept so that warm-up can report them as failures.
+        """
+        names: list[str] = []
+        for name in self.warmup_servers:
+            if name == "*":
+                names.extend(self.ssh_servers)
+            elif name in self.server_groups:
+                names.extend(self.server_groups[name])
+            else:
+                names.append(name)
+        return list(dict.fromkeys(names))
 
     def validate_server_config(self, name: str) -> bool:
         """Validate that a server configuration is complete."""
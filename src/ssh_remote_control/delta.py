@@ -0,0 +1,224 @@
+"""Block-checksum delta transfer for remote files.
+
+The remote side runs two small python3 programs: one prints a weak rolling
+checksum and a strong hash for each block of the current remote file, the
+other rebuilds the file from a stream of "copy block" and "literal bytes"
+operations into a temporary file and renames it into place. Only blocks that
+are not already present remotely cross the wire.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import shlex
+import struct
+from itertools import accumulate
+
+# Exit status of the signature script when the remote file does not exist
+MISSING_FILE_EXIT = 3
+
+# Literal runs are split so the remote side never buffers more than this
+MAX_LITERAL = 1 << 20
+
+_MOD = 1 << 16
+
+SIGNATURE_SCRIPT = """\
+import hashlib, itertools, os, sys
+path, block = sys.argv[1], int(sys.argv[2])
+try:
+    f = open(path, 'rb')
+except FileNotFoundError:
+    sys.exit(3)
+size = os.fstat(f.fileno()).st_size
+if block <= 0:
+    block = min(65536, max(512, int(size ** 0.5) // 8 * 8))
+out = [str(size) + ' ' + str(block)]
+with f:
+    while True:
+        chunk = f.read(block)
+        if not chunk:
+            break
+        a = sum(chunk) % 65536
+        b = sum(itertools.accumulate(chunk)) % 65536
+        out.append(str(a | b << 16) + ' '
+                   + hashlib.blake2b(chunk, digest_size=16).hexdigest())
+sys.stdout.write('\\n'.join(out) + '\\n')
+"""
+
+REBUILD_SCRIPT = """\
+import hashlib, os, shutil, struct, sys, tempfile
+path, block = sys.argv[1], int(sys.argv[2])
+inp = sys.stdin.buffer
+expected = inp.readline().strip().decode()
+digest = hashlib.sha256()
+st = os.stat(path)
+fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                           prefix='.' + os.path.basename(path) + '.')
+try:
+    with open(path, 'rb') as old, os.fdopen(fd, 'wb') as new:
+        while True:
+            op = inp.read(1)
+            if op == b'C':
+                index, count = struct.unpack('>QI', inp.read(12))
+                old.seek(index * block)
+                remaining = count * block
+                while remaining > 0:
+                    data = old.read(min(remaining, 1 << 20))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    digest.update(data)
+                    new.write(data)
+            elif op == b'L':
+                data = inp.read(struct.unpack('>I', inp.read(4))[0])
+                digest.update(data)
+                new.write(data)
+            elif op == b'E':
+                break
+            else:
+                sys.exit('truncated delta stream')
+        new.flush()
+        os.fsync(new.fileno())
+    if digest.hexdigest() != expected:
+        sys.exit('checksum mismatch after rebuild')
+    shutil.copymode(path, tmp)
+    try:
+        os.chown(tmp, st.st_uid, st.st_gid)
+    except PermissionError:
+        pass
+    os.replace(tmp, path)
+finally:
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+"""
+
+# A delta is a list of literal byte runs and (first block, block count) copies
+DeltaOp = bytes | tuple[int, int]
+
+
+def signature_command(remote_path: str, block_size: int = 0) -> str:
+    """Build the command printing block checksums of a remote file.
+
+    A block size of 0 lets the remote side pick one from the file size.
+    """
+    return (
+        f"python3 -c {shlex.quote(SIGNATURE_SCRIPT)} "
+        f"{shlex.quote(remote_path)} {block_size}"
+    )
+
+
+def rebuild_command(remote_path: str, block_size: int) -> str:
+    """Build the command that applies an encoded delta to a remote file."""
+    return (
+        f"python3 -c {shlex.quote(REBUILD_SCRIPT)} "
+        f"{shlex.quote(remote_path)} {block_size}"
+    )
+
+
+def weak_checksum(block: bytes) -> int:
+    """Compute the rsync-style weak checksum of a block."""
+    return (sum(block) % _MOD) | (sum(accumulate(block)) % _MOD) << 16
+
+
+def strong_checksum(block: bytes) -> str:
+    """Compute the strong hash used to confirm a weak checksum match."""
+    return hashlib.blake2b(block, digest_size=16).hexdigest()
+
+
+def parse_signature(output: str) -> tuple[int, int, dict[int, dict[str, int]]]:
+    """Parse signature script output.
+
+    Returns:
+        Tuple of remote size, block size and a lookup of weak checksum to
+        {strong hash: index of the first block with that hash}.
+    """
+    lines = output.splitlines()
+    size, block_size = (int(value) for value in lines[0].split())
+    lookup: dict[int, dict[str, int]] = {}
+    for index, line in enumerate(lines[1:]):
+        weak, strong = line.split()
+        lookup.setdefault(int(weak), {}).setdefault(strong, index)
+    return size, block_size, lookup
+
+
+def compute_delta(
+    content: bytes,
+    remote_size: int,
+    block_size: int,
+    lookup: dict[int, dict[str, int]],
+) -> list[DeltaOp]:
+    """Describe ``content`` as copies of remote blocks plus literal bytes.
+
+    Full blocks are found at any offset with a rolling weak checksum; a short
+    final remote block can only match the end of ``content``.
+    """
+    ops: list[DeltaOp] = []
+    end = len(content)
+    literal_start = pos = 0
+    a = b = 0
+    fresh = True
+
+    def emit(index: int, match_start: int) -> None:
+        if literal_start < match_start:
+            ops.append(content[literal_start:match_start])
+        if ops and isinstance(ops[-1], tuple):
+            first, count = ops[-1]
+            if first + count == index:
+                ops[-1] = (first, count + 1)
+                return
+        ops.append((index, 1))
+
+    while pos + block_size <= end:
+        if fresh:
+            window = content[pos : pos + block_size]
+            a = sum(window) % _MOD
+            b = sum(accumulate(window)) % _MOD
+            fresh = False
+
+        candidates = lookup.get(a | b << 16)
+        if candidates:
+            index = candidates.get(strong_checksum(content[pos : pos + block_size]))
+            if index is not None:
+                emit(index, pos)
+                pos += block_size
+                literal_start = pos
+                fresh = True
+                continue
+
+        if pos + block_size < end:
+            outgoing, incoming = content[pos], content[pos + block_size]
+            a = (a - outgoing + incoming) % _MOD
+            b = (b - block_size * outgoing + a) % _MOD
+        pos += 1
+
+    tail_size = remote_size % block_size
+    if tail_size and end - tail_size >= literal_start:
+        tail = content[end - tail_size :]
+        index = lookup.get(weak_checksum(tail), {}).get(strong_checksum(tail))
+        if index == remote_size // block_size:
+            emit(index, end - tail_size)
+            literal_start = end
+
+    if literal_start < end:
+        ops.append(content[literal_start:end])
+    return ops
+
+
+def encode_delta(ops: list[DeltaOp], sha256: str) -> bytes:
+    """Encode delta operations for the rebuild script's standard input."""
+    parts = [f"{sha256}\n".encode()]
+    for op in ops:
+        if isinstance(op, tuple):
+            parts.append(b"C" + struct.pack(">QI", *op))
+            continue
+        for start in range(0, len(op), MAX_LITERAL):
+            literal = op[start : start + MAX_LITERAL]
+            parts.append(b"L" + struct.pack(">I", len(literal)) + literal)
+    parts.append(b"E")
+    return b"".join(parts)
+
+
+def delta_stats(ops: list[DeltaOp], size: int) -> dict[str, int]:
+    """Summarize how much of the new content is literal versus copied."""
+    literal = sum(len(op) for op in ops if isinstance(op, bytes))
+    return {"literal_bytes": literal, "copied_bytes": size - literal}
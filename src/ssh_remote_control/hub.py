@@ -0,0 +1,267 @@
+"""Shared remote followers fanned out to many subscribers.
+
+A follower is one long-running remote process, such as ``tail -f`` on a log
+file or ``journalctl -f`` for a unit. Every subscriber to the same key shares
+it: lines are delivered to each subscriber through its own queue, so a slow
+subscriber never holds up the others, and the remote process is stopped when
+the last subscriber leaves.
+
+Delivery tasks are registered in a ``TaskRegistry`` under the subscriber's
+owner name, and each follower's watch task under ``follower_owner(key)``.
+Stopping a follower cancels every task of that owner, including stream tasks
+that ``start`` registered under it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import suppress
+from typing import Any
+
+from .tasks import TaskRegistry
+
+logger = logging.getLogger(__name__)
+
+# (server, kind, target), e.g. ("web-1", "log", "/var/log/syslog")
+FollowerKey = tuple[str, str, str]
+Publish = Callable[[str], Awaitable[None]]
+# Starts the remote process, sending its messages to the given callback
+StartFollower = Callable[[Publish], Awaitable[Any]]
+
+
+class _Subscriber:
+    """One subscriber's bounded queue and delivery task."""
+
+    def __init__(self, callback: Publish, queue_size: int) -> None:
+        self.callback = callback
+        # None marks the end of the stream
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(queue_size)
+        self.task: asyncio.Task[None] | None = None
+        self.dropped = 0
+
+    def offer(self, message: str | None) -> None:
+        """Queue a message, dropping the oldest one if the queue is full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class _Follower:
+    """A remote process and the subscribers sharing its output."""
+
+    def __init__(self, history_size: int) -> None:
+        self.subscribers: dict[Hashable, _Subscriber] = {}
+        self.history: deque[str] = deque(maxlen=history_size)
+        self.process: Any = None
+        self.watch_task: asyncio.Task[None] | None = None
+        self.messages = 0
+        # Set once start() has returned or failed, with the failure if any
+        self.started = asyncio.Event()
+        self.start_error: BaseException | None = None
+
+
+class FollowerHub:
+    """Runs one remote follower per key and fans its output out."""
+
+    def __init__(
+        self,
+        history_size: int = 100,
+        queue_size: int = 1000,
+        tasks: TaskRegistry | None = None,
+    ) -> None:
+        """Initialize the hub.
+
+        Args:
+            history_size: Recent messages replayed to each new subscriber.
+            queue_size: Messages buffered per subscriber before the oldest
+                are dropped.
+            tasks: Registry to run tasks in (a new one if None).
+        """
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.tasks = tasks if tasks is not None else TaskRegistry()
+        self._followers: dict[FollowerKey, _Follower] = {}
+
+    @staticmethod
+    def follower_owner(key: FollowerKey) -> str:
+        """Return the task owner name of the follower for ``key``."""
+        return "follower:" + ":".join(key)
+
+    async def subscribe(
+        self,
+        key: FollowerKey,
+        subscriber: Hashable,
+        callback: Publish,
+        start: StartFollower,
+        owner: str | None = None,
+    ) -> None:
+        """Subscribe to a follower, starting it if nobody follows ``key`` yet.
+
+        The subscriber first receives the follower's recent history. If
+        ``callback`` raises OSError (such as ConnectionError) or
+        RuntimeError, the subscriber is removed. Subscribing again
+        with the same subscriber replaces its previous subscription. The
+        delivery task is owned by ``owner`` (``str(subscriber)`` if None).
+
+        Raises:
+            Exception: Whatever ``start`` raised, for the subscriber that
+                started the follower and for every subscriber that joined
+                while it was starting.
+        """
+        follower = self._followers.get(key)
+        is_new = follower is None
+        if follower is None:
+            follower = _Follower(self.history_size)
+            self._followers[key] = follower
+        else:
+            self._remove_subscriber(follower, subscriber)
+
+        sub = _Subscriber(callback, self.queue_size)
+        for message in follower.history:
+            sub.offer(message)
+        follower.subscribers[subscriber] = sub
+        sub.task = self.tasks.spawn(
+            self._deliver(key, subscriber, sub),
+            name=f"deliver:{key[1]}:{key[2]}",
+            owner=owner or str(subscriber),
+        )
+
+        if not is_new:
+            await follower.started.wait()
+            if follower.start_error is not None:
+                raise follower.start_error
+            return
+
+        async def publish(message: str) -> None:
+            follower.history.append(message)
+            follower.messages += 1
+            for each in list(follower.subscribers.values()):
+                each.offer(message)
+
+        try:
+            follower.process = await start(publish)
+        except BaseException as e:
+            follower.start_error = (
+                e
+                if isinstance(e, Exception)
+                else ConnectionError(f"Starting follower {key} was cancelled")
+            )
+            if self._followers.get(key) is follower:
+                del self._followers[key]
+            self._close_subscribers(follower)
+            raise
+        finally:
+            follower.started.set()
+
+        if self._followers.get(key) is not follower:
+            # Every subscriber left while the follower was starting
+            self._stop_process(key, follower)
+            return
+        follower.watch_task = self.tasks.spawn(
+            self._watch(key, follower), name="watch", owner=self.follower_owner(key)
+        )
+        logger.info("Started follower %s", key)
+
+    def unsubscribe(self, key: FollowerKey, subscriber: Hashable) -> None:
+        """Remove a subscriber, stopping the follower if it was the last."""
+        follower = self._followers.get(key)
+        if follower is None:
+            return
+        self._remove_subscriber(follower, subscriber)
+        if not follower.subscribers:
+            del self._followers[key]
+            self._stop_process(key, follower)
+
+    def unsubscribe_all(self, subscriber: Hashable) -> None:
+        """Remove a subscriber from every follower it is subscribed to."""
+        for key, follower in list(self._followers.items()):
+            if subscriber in follower.subscribers:
+                self.unsubscribe(key, subscriber)
+
+    def close(self) -> None:
+        """Stop every follower and drop all subscribers."""
+        for key, follower in list(self._followers.items()):
+            del self._followers[key]
+            self._close_subscribers(follower)
+            self._stop_process(key, follower)
+
+    def is_subscribed(self, key: FollowerKey, subscriber: Hashable) -> bool:
+        """Return whether a subscriber currently follows ``key``."""
+        follower = self._followers.get(key)
+        return follower is not None and subscriber in follower.subscribers
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Describe each running follower and its subscribers."""
+        return [
+            {
+                "server": key[0],
+                "kind": key[1],
+                "target": key[2],
+                "subscribers": len(follower.subscribers),
+                "messages": follower.messages,
+                "dropped": sum(sub.dropped for sub in follower.subscribers.values()),
+            }
+            for key, follower in self._followers.items()
+        ]
+
+    def queue_depths(self) -> list[int]:
+        """Return the number of messages queued for each subscriber."""
+        return [
+            sub.queue.qsize()
+            for follower in self._followers.values()
+            for sub in follower.subscribers.values()
+        ]
+
+    async def _deliver(
+        self, key: FollowerKey, subscriber: Hashable, sub: _Subscriber
+    ) -> None:
+        """Send queued messages to one subscriber until its stream ends."""
+        while (message := await sub.queue.get()) is not None:
+            try:
+                await sub.callback(message)
+                self.tasks.record_bytes(len(message.encode()))
+            except (OSError, RuntimeError) as e:
+                logger.debug("Dropping subscriber of %s: %s", key, e)
+                sub.task = None
+                self.unsubscribe(key, subscriber)
+                return
+
+    async def _watch(self, key: FollowerKey, follower: _Follower) -> None:
+        """Forget a follower whose remote process exits on its own."""
+        with suppress(Exception):
+            await follower.process.wait()
+        if self._followers.get(key) is follower:
+            logger.info("Follower %s exited", key)
+            del self._followers[key]
+            # Let subscribers drain what was already queued
+            for sub in follower.subscribers.values():
+                sub.offer(None)
+            follower.subscribers.clear()
+
+    def _remove_subscriber(self, follower: _Follower, subscriber: Hashable) -> None:
+        sub = follower.subscribers.pop(subscriber, None)
+        if sub is not None and sub.task is not None:
+            sub.task.cancel()
+
+    def _close_subscribers(self, follower: _Follower) -> None:
+        for subscriber in list(follower.subscribers):
+            self._remove_subscriber(follower, subscriber)
+
+    def _stop_process(self, key: FollowerKey, follower: _Follower) -> None:
+        # Also cancels the stream tasks start() registered for this follower
+        self.tasks.cancel_owner(self.follower_owner(key))
+        process = follower.process
+        if process is None:
+            return
+        try:
+            process.terminate()
+        except (AttributeError, OSError, RuntimeError) as e:
+            logger.debug("Error signalling follower %s: %s", key, e)
+        # Closing the channel also stops servers that ignore signal requests
+        with suppress(AttributeError, OSError, RuntimeError):
+            process.close()
+        logger.info("Stopped follower %s", key)
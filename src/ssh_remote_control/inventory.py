@@ -0,0 +1,566 @@
+"""Servers and server groups loaded from inventory files.
+
+Large fleets are usually described in OpenSSH client config files or Ansible
+inventories rather than inline in ``ssh_servers``. A loader turns one such
+file into an ``Inventory``: raw server dicts in the shape of ``ServerConfig``
+and, where the format has them, server groups. Loaders are registered by
+type name in ``LOADERS``:
+
+- ``ssh_config``: ``Host`` blocks of an OpenSSH config, with ``Include``
+- ``ansible_ini``: an Ansible INI inventory, with host ranges, ``:vars``
+  and ``:children`` sections
+- ``ansible_yaml``: an Ansible YAML inventory
+
+Text formats are read line by line. An inventory remembers every file it
+read and every glob it expanded, so ``InventoryCache`` can tell from file
+mtimes whether a parsed inventory is still current, in memory and, with a
+cache directory, across restarts.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fnmatch
+import getpass
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import string
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from .yaml_compat import safe_load
+
+logger = logging.getLogger(__name__)
+
+# OpenSSH's limit on nested Include directives
+MAX_INCLUDE_DEPTH = 16
+
+# ssh_config keywords (lowercased) and the ServerConfig fields they set
+SSH_CONFIG_FIELDS = {
+    "hostname": "host",
+    "port": "port",
+    "user": "username",
+    "identityfile": "key_file",
+    "userknownhostsfile": "known_hosts",
+    "proxyjump": "jump_host",
+    "compression": "compression",
+    "ciphers": "encryption_algs",
+    "macs": "mac_algs",
+    "kexalgorithms": "kex_algs",
+}
+
+# Ansible connection variables and the ServerConfig fields they set; other
+# variables named like a ServerConfig field (e.g. jump_host) are used as is
+ANSIBLE_FIELDS = {
+    "ansible_host": "host",
+    "ansible_ssh_host": "host",
+    "ansible_port": "port",
+    "ansible_ssh_port": "port",
+    "ansible_user": "username",
+    "ansible_ssh_user": "username",
+    "ansible_ssh_private_key_file": "key_file",
+    "ansible_password": "password",
+    "ansible_ssh_pass": "password",
+}
+PASSTHROUGH_FIELDS = {
+    "key_file",
+    "known_hosts",
+    "passphrase",
+    "persistent_shell",
+    "jump_host",
+    "compression",
+    "window_size",
+    "max_packet_size",
+}
+
+# A host range such as [01:50] or [a:f], with an optional stride
+_RANGE = re.compile(r"\[([^:\]]+):([^:\]]+)(?::(\d+))?\]")
+_SSH_CONFIG_LINE = re.compile(r"(\S+?)(?:\s*=\s*|\s+)(.*)")
+
+FileStamp = tuple[int, int] | None
+
+
+class Inventory:
+    """Servers and groups read from inventory files, and the files read."""
+
+    def __init__(self) -> None:
+        self.servers: dict[str, dict[str, Any]] = {}
+        self.groups: dict[str, list[str]] = {}
+        # Every file read with its (mtime, size), and every glob's matches
+        self.files: dict[str, FileStamp] = {}
+        self.globs: dict[str, list[str]] = {}
+
+    def read_lines(self, path: Path) -> Iterator[str]:
+        """Yield a file's lines one at a time, recording the file as read."""
+        self.files[str(path)] = _stamp(path)
+        with open(path, encoding="utf-8") as f:
+            yield from f
+
+    def read_text(self, path: Path) -> str:
+        """Return a file's contents, recording the file as read."""
+        self.files[str(path)] = _stamp(path)
+        return path.read_text(encoding="utf-8")
+
+    def expand(self, pattern: str) -> list[Path]:
+        """Return the files matching a glob pattern, sorted, and record them."""
+        matches = _glob(pattern)
+        self.globs[pattern] = matches
+        return [Path(match) for match in matches]
+
+    def is_stale(self) -> bool:
+        """Check whether a file changed or a glob matches different files."""
+        return any(
+            _stamp(Path(path)) != stamp for path, stamp in self.files.items()
+        ) or any(_glob(pattern) != matches for pattern, matches in self.globs.items())
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the inventory as JSON-serializable data."""
+        return {
+            "servers": self.servers,
+            "groups": self.groups,
+            "files": self.files,
+            "globs": self.globs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Inventory:
+        """Rebuild an inventory saved with to_dict."""
+        inventory = cls()
+        inventory.servers = data["servers"]
+        inventory.groups = data["groups"]
+        inventory.files = {
+            path: tuple(stamp) if stamp is not None else None
+            for path, stamp in data["files"].items()
+        }
+        inventory.globs = data["globs"]
+        return inventory
+
+
+Loader = Callable[[Path, Inventory], None]
+
+
+def _stamp(path: Path) -> FileStamp:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _glob(pattern: str) -> list[str]:
+    path = Path(pattern).expanduser()
+    if not any(char in pattern for char in "*?["):
+        return [str(path)] if path.exists() else []
+    root = Path(path.anchor) if path.is_absolute() else Path()
+    relative = str(path.relative_to(root)) if path.is_absolute() else str(path)
+    return sorted(str(match) for match in root.glob(relative) if match.is_file())
+
+
+def expand_host_pattern(pattern: str) -> list[str]:
+    """Expand Ansible host ranges, e.g. ``web[01:03]`` to web01..web03.
+
+    Numeric ranges keep the start's zero padding; letter ranges step
+    through the alphabet. Several ranges in one pattern are all expanded.
+    """
+    match = _RANGE.search(pattern)
+    if match is None:
+        return [pattern]
+    start, end, stride = match.group(1), match.group(2), int(match.group(3) or 1)
+    if start.isdigit() and end.isdigit():
+        width = len(start) if start.startswith("0") else 0
+        values = [str(n).zfill(width) for n in range(int(start), int(end) + 1, stride)]
+    elif len(start) == 1 and len(end) == 1 and start.isalpha() and end.isalpha():
+        letters = string.ascii_letters
+        values = list(letters[letters.index(start) : letters.index(end) + 1 : stride])
+    else:
+        raise ValueError(f"Invalid host range in {pattern}")
+    prefix, suffix = pattern[: match.start()], pattern[match.end() :]
+    return [
+        name
+        for value in values
+        for name in expand_host_pattern(f"{prefix}{value}{suffix}")
+    ]
+
+
+def load_ssh_config(path: Path, inventory: Inventory) -> None:
+    """Load the concrete hosts of an OpenSSH client config.
+
+    Every ``Host`` pattern without wildcards or negation becomes a server.
+    Its options come from each block matching it, in file order, with the
+    first value of an option winning as in ssh itself; options before the
+    first ``Host`` apply to every host. ``Include`` is followed (relative
+    paths are resolved against the including file's directory) and
+    ``Match`` blocks are skipped. Hosts without ``User`` get the local
+    user name.
+    """
+    blocks: list[tuple[list[str], dict[str, list[str]]]] = [(["*"], {})]
+    # Blocks naming a host literally, by host, and blocks with wildcards
+    literal: dict[str, list[int]] = {}
+    wildcard: list[int] = []
+    current: dict[str, list[str]] | None = blocks[0][1]
+    for keyword, args in _ssh_config_entries(path, inventory, 0):
+        if keyword == "host":
+            current = {}
+            blocks.append((args, current))
+            index = len(blocks) - 1
+            is_wildcard = any(_is_wildcard(pattern) for pattern in args)
+            if is_wildcard:
+                wildcard.append(index)
+            for name in args:
+                if not _is_wildcard(name):
+                    indexes = literal.setdefault(name, [])
+                    if not is_wildcard:
+                        indexes.append(index)
+        elif keyword == "match":
+            current = None
+        elif current is not None and keyword in SSH_CONFIG_FIELDS:
+            current.setdefault(keyword, args)
+    wildcard.insert(0, 0)
+
+    user = getpass.getuser()
+    for name, indexes in literal.items():
+        options: dict[str, list[str]] = {}
+        matching = [i for i in wildcard if _host_matches(name, blocks[i][0])]
+        for index in sorted([*indexes, *matching]):
+            for keyword, args in blocks[index][1].items():
+                options.setdefault(keyword, args)
+        inventory.servers[name] = _ssh_config_server(name, options, user)
+
+
+def _ssh_config_entries(
+    path: Path, inventory: Inventory, depth: int
+) -> Iterator[tuple[str, list[str]]]:
+    """Yield (keyword, args) for each line of a config, following Include."""
+    for raw_line in inventory.read_lines(path):
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _SSH_CONFIG_LINE.fullmatch(line)
+        if match is None:
+            continue
+        keyword, args = match.group(1).lower(), _split_args(match.group(2))
+        if keyword != "include":
+            yield keyword, args
+            continue
+        if depth >= MAX_INCLUDE_DEPTH:
+            raise ValueError(f"Too many nested Include directives in {path}")
+        for pattern in args:
+            pattern = os.path.expanduser(pattern)
+            if not os.path.isabs(pattern):
+                pattern = str(path.parent / pattern)
+            for included in inventory.expand(pattern):
+                yield from _ssh_config_entries(included, inventory, depth + 1)
+
+
+def _split_args(text: str, comments: bool = False) -> list[str]:
+    """Split a line into words like a shell, quickly when nothing is quoted."""
+    if '"' in text or "'" in text or "\\" in text:
+        return shlex.split(text, comments=comments)
+    if comments:
+        text = text.partition("#")[0]
+    return text.split()
+
+
+def _is_wildcard(pattern: str) -> bool:
+    return any(char in pattern for char in "*?!")
+
+
+def _host_matches(name: str, patterns: list[str]) -> bool:
+    matched = False
+    for pattern in patterns:
+        if pattern.startswith("!"):
+            if fnmatch.fnmatchcase(name, pattern[1:]):
+                return False
+        elif fnmatch.fnmatchcase(name, pattern):
+            matched = True
+    return matched
+
+
+def _ssh_config_server(
+    name: str, options: dict[str, list[str]], user: str
+) -> dict[str, Any]:
+    """Convert ssh_config options into a raw ServerConfig dict."""
+    server: dict[str, Any] = {"host": name, "username": user}
+    for keyword, args in options.items():
+        field, value = SSH_CONFIG_FIELDS[keyword], args[0] if args else ""
+        if keyword == "hostname":
+            server[field] = value.replace("%h", name).replace("%%", "%")
+        elif keyword == "port":
+            server[field] = int(value)
+        elif keyword in ("identityfile", "userknownhostsfile"):
+            server[field] = os.path.expanduser(value.replace("%d", "~"))
+        elif keyword == "proxyjump":
+            if value.lower() != "none":
+                # First hop only, without user@ and :port
+                server[field] = value.split(",")[0].rpartition("@")[2].split(":")[0]
+        elif keyword == "compression":
+            server[field] = value.lower() == "yes"
+        elif keyword in ("ciphers", "macs", "kexalgorithms"):
+            # "+alg" and similar modify ssh's defaults, which asyncssh lacks
+            if value[:1] not in ("+", "-", "^"):
+                server[field] = value.split(",")
+        else:
+            server[field] = value
+    return server
+
+
+class _AnsibleGroups:
+    """Hosts, variables and children of Ansible groups being loaded."""
+
+    def __init__(self) -> None:
+        self.hosts: dict[str, dict[str, Any]] = {}
+        self.members: dict[str, list[str]] = {"all": [], "ungrouped": []}
+        self.vars: dict[str, dict[str, Any]] = {}
+        self.children: dict[str, list[str]] = {}
+
+    def add_host(self, group: str, pattern: str, host_vars: dict[str, Any]) -> None:
+        for name in expand_host_pattern(pattern):
+            self.hosts.setdefault(name, {}).update(host_vars)
+            self.members.setdefault(group, []).append(name)
+
+    def add_child(self, group: str, child: str) -> None:
+        self.children.setdefault(group, []).append(child)
+        self.members.setdefault(child, [])
+
+    def resolve(self, inventory: Inventory) -> None:
+        """Merge variables into servers and flatten groups into inventory.
+
+        Variables are applied from the least to the most specific: "all",
+        then groups by nesting depth and name, then the host's own.
+        """
+        depth: dict[str, int] = {}
+
+        def visit(group: str, level: int, path: tuple[str, ...]) -> None:
+            if group in path:
+                raise ValueError(f"Group cycle: {' -> '.join([*path, group])}")
+            if depth.get(group, -1) >= level:
+                return
+            depth[group] = level
+            for child in self.children.get(group, []):
+                visit(child, level + 1, (*path, group))
+
+        for group in self.members:
+            visit(group, 1 if group != "all" else 0, ())
+
+        groups_of: dict[str, list[str]] = {name: ["all"] for name in self.hosts}
+        for group in sorted(depth, key=lambda g: (depth[g], g)):
+            if group == "all":
+                continue
+            hosts = list(dict.fromkeys(self._group_hosts(group, set())))
+            for name in hosts:
+                groups_of[name].append(group)
+            if group != "ungrouped" and hosts:
+                inventory.groups[group] = hosts
+
+        user = getpass.getuser()
+        for name, host_vars in self.hosts.items():
+            merged: dict[str, Any] = {}
+            for group in groups_of[name]:
+                merged.update(self.vars.get(group, {}))
+            merged.update(host_vars)
+            inventory.servers[name] = _ansible_server(name, merged, user)
+
+    def _group_hosts(self, group: str, seen: set[str]) -> Iterator[str]:
+        seen.add(group)
+        yield from self.members.get(group, [])
+        for child in self.children.get(group, []):
+            if child not in seen:
+                yield from self._group_hosts(child, seen)
+
+
+def _ansible_server(name: str, host_vars: dict[str, Any], user: str) -> dict[str, Any]:
+    """Convert Ansible host variables into a raw ServerConfig dict."""
+    server: dict[str, Any] = {"host": name, "username": user}
+    for key, value in host_vars.items():
+        field = ANSIBLE_FIELDS.get(key) or (key if key in PASSTHROUGH_FIELDS else None)
+        if field in ("key_file", "known_hosts") and isinstance(value, str):
+            server[field] = os.path.expanduser(value)
+        elif field is not None:
+            server[field] = value
+    return server
+
+
+def _ini_vars(tokens: list[str]) -> dict[str, str]:
+    return {
+        key: value
+        for key, sep, value in (token.partition("=") for token in tokens)
+        if sep
+    }
+
+
+def load_ansible_ini(path: Path, inventory: Inventory) -> None:
+    """Load an Ansible INI inventory.
+
+    Hosts are listed under ``[group]`` with optional ``key=value`` variables
+    and may use ranges such as ``web[01:50].example.com``. ``[group:vars]``
+    sets variables for every host in the group and ``[group:children]``
+    nests groups. Hosts before the first section are ungrouped.
+    """
+    groups = _AnsibleGroups()
+    group, kind = "ungrouped", "hosts"
+    for raw_line in inventory.read_lines(path):
+        line = raw_line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("["):
+            section = line[1 : line.index("]")]
+            group, _, kind = section.partition(":")
+            kind = kind or "hosts"
+            groups.members.setdefault(group, [])
+        elif kind == "hosts":
+            tokens = _split_args(line, comments=True)
+            groups.add_host(group, tokens[0], _ini_vars(tokens[1:]))
+        elif kind == "vars":
+            key, _, value = line.partition("=")
+            groups.vars.setdefault(group, {})[key.strip()] = value.strip()
+        elif kind == "children":
+            groups.add_child(group, line.split()[0])
+    groups.resolve(inventory)
+
+
+def load_ansible_yaml(path: Path, inventory: Inventory) -> None:
+    """Load an Ansible YAML inventory.
+
+    Each top-level key is a group (usually ``all``) with optional
+    ``hosts``, ``vars`` and ``children`` mappings, nested to any depth.
+    The document is parsed as a whole, unlike the line-based formats.
+    """
+    data = safe_load(inventory.read_text(path)) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Inventory {path} is not a mapping")
+    groups = _AnsibleGroups()
+
+    def add_group(group: str, body: Any) -> None:
+        groups.members.setdefault(group, [])
+        if not isinstance(body, dict):
+            return
+        for pattern, host_vars in (body.get("hosts") or {}).items():
+            groups.add_host(group, str(pattern), dict(host_vars or {}))
+        groups.vars.setdefault(group, {}).update(body.get("vars") or {})
+        for child, child_body in (body.get("children") or {}).items():
+            groups.add_child(group, child)
+            add_group(child, child_body)
+
+    for group, body in data.items():
+        add_group(group, body)
+    groups.resolve(inventory)
+
+
+LOADERS: dict[str, Loader] = {
+    "ssh_config": load_ssh_config,
+    "ansible_ini": load_ansible_ini,
+    "ansible_yaml": load_ansible_yaml,
+}
+
+
+def register_loader(kind: str, loader: Loader) -> None:
+    """Register a loader for another inventory format."""
+    LOADERS[kind] = loader
+
+
+class InventoryCache:
+    """Parsed inventories, reused while none of their files changed."""
+
+    def __init__(self, cache_dir: str | None = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory to also keep parsed inventories in as JSON,
+                so that a restart skips parsing unchanged files (memory
+                only if None).
+        """
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self._entries: dict[tuple[str, str], Inventory] = {}
+        # Files read by loads that failed, to notice when they are fixed
+        self._failed: dict[tuple[str, str], Inventory] = {}
+
+    def load(self, kind: str, pattern: str) -> Inventory:
+        """Return the inventory of a source, parsing it only if it changed.
+
+        Args:
+            kind: Loader name, a key of LOADERS.
+            pattern: Path or glob pattern of the inventory files; all
+                matching files are merged, later files taking precedence.
+
+        Raises:
+            ValueError: If the loader is unknown or a file is malformed
+            OSError: If a file cannot be read
+        """
+        loader = LOADERS.get(kind)
+        if loader is None:
+            raise ValueError(f"Unknown inventory type: {kind}")
+        key = (kind, pattern)
+        inventory = self._entries.get(key) or self._read_cached(key)
+        if inventory is not None and not inventory.is_stale():
+            self._entries[key] = inventory
+            return inventory
+
+        inventory = Inventory()
+        try:
+            for path in inventory.expand(pattern):
+                loader(path, inventory)
+        except BaseException:
+            self._failed[key] = inventory
+            raise
+        self._failed.pop(key, None)
+        logger.info(
+            "Loaded %d servers from %s inventory %s",
+            len(inventory.servers),
+            kind,
+            pattern,
+        )
+        self._entries[key] = inventory
+        self._write_cached(key, inventory)
+        return inventory
+
+    def changed(self) -> bool:
+        """Check whether the files of any inventory loaded or tried changed."""
+        inventories = {**self._entries, **self._failed}.values()
+        return any(inventory.is_stale() for inventory in inventories)
+
+    def retain(self, keys: Iterable[tuple[str, str]]) -> None:
+        """Forget every inventory but those of the given (kind, pattern)."""
+        keep = set(keys)
+        self._entries = {k: v for k, v in self._entries.items() if k in keep}
+        self._failed = {k: v for k, v in self._failed.items() if k in keep}
+
+    def _cache_file(self, key: tuple[str, str]) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha256("\0".join(key).encode()).hexdigest()[:16]
+        return self.cache_dir / f"inventory-{digest}.json"
+
+    def _read_cached(self, key: tuple[str, str]) -> Inventory | None:
+        cache_file = self._cache_file(key)
+        if cache_file is None or not cache_file.exists():
+            return None
+        try:
+            return Inventory.from_dict(json.loads(cache_file.read_text()))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.debug("Ignoring inventory cache %s: %s", cache_file, e)
+            return None
+
+    def _write_cached(self, key: tuple[str, str], inventory: Inventory) -> None:
+        cache_file = self._cache_file(key)
+        if cache_file is None:
+            return
+        temp_file = cache_file.with_suffix(".tmp")
+        try:
+            cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # Host variables may carry passwords, so only the owner may read
+            # the file; a stale temp file could have wider permissions
+            with contextlib.suppress(FileNotFoundError):
+                temp_file.unlink()
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(inventory.to_dict(), f)
+            temp_file.replace(cache_file)
+        except OSError as e:
+            logger.warning("Could not write inventory cache %s: %s", cache_file, e)
+            with contextlib.suppress(OSError):
+                temp_file.unlink()
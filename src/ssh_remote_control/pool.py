@@ -0,0 +1,372 @@
+"""Per-server SSH connection pooling with channel-aware scheduling."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+import asyncssh
+from asyncssh import SFTPClient, SSHClientConnection
+
+from .shell import PersistentShell
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean a cached SFTP session can no longer be used
+SFTP_SESSION_ERRORS = (
+    asyncssh.ConnectionLost,
+    asyncssh.SFTPConnectionLost,
+    BrokenPipeError,
+    ConnectionError,
+)
+
+
+class PooledConnection:
+    """An SSH connection held by a pool and the channels open on it."""
+
+    def __init__(self, connection: SSHClientConnection) -> None:
+        """Wrap a connection with no channels in use."""
+        self.connection = connection
+        self.channels = 0
+        self.last_used = time.monotonic()
+        # Cached SFTP session; it occupies one channel while open
+        self.sftp: SFTPClient | None = None
+        self.sftp_users = 0
+        # Persistent shell; like the SFTP session it keeps one channel open
+        self.shell: PersistentShell | None = None
+        self.shell_users = 0
+
+    @property
+    def load(self) -> int:
+        """Channels open on the connection, including cached sessions."""
+        return (
+            self.channels
+            + (1 if self.sftp is not None else 0)
+            + (1 if self.shell is not None else 0)
+        )
+
+    @property
+    def busy(self) -> bool:
+        """Check whether any channel, SFTP or shell operation is in progress."""
+        return self.channels > 0 or self.sftp_users > 0 or self.shell_users > 0
+
+    def is_closed(self) -> bool:
+        """Check whether the underlying connection is closed."""
+        return self.connection.is_closed()
+
+
+# Limits, connection entries and the locks guarding them are all pool state
+class ConnectionPool:  # pylint: disable=too-many-instance-attributes
+    """Pool of SSH connections to a single server.
+
+    New channels are placed on the least-loaded connection that has fewer
+    than ``max_channels`` open. When every connection is full, another one is
+    opened, up to ``max_connections``. Beyond that, callers wait for a
+    channel to be released instead of failing with a channel-open error.
+    """
+
+    def __init__(
+        self,
+        server_name: str,
+        factory: Callable[[], Awaitable[SSHClientConnection]],
+        *,
+        min_connections: int = 1,
+        max_connections: int = 1,
+        max_channels: int = 10,
+        channel_options: dict[str, Any] | None = None,
+    ) -> None:
+        """Initialize an empty pool.
+
+        Args:
+            server_name: Name of the server, used for logging
+            factory: Coroutine function that opens a new connection
+            min_connections: Connections opened by fill()
+            max_connections: Upper bound on open connections
+            max_channels: Channels allowed on each connection at once
+            channel_options: Window and packet size options for channels
+                the pool opens itself
+        """
+        self.server_name = server_name
+        self.min_connections = max(1, min_connections)
+        self.max_connections = max(self.min_connections, max_connections)
+        self.max_channels = max(1, max_channels)
+        self._factory = factory
+        self.channel_options = channel_options or {}
+        self._entries: list[PooledConnection] = []
+        self._pending = 0
+        self._waiters = 0
+        self._cond = asyncio.Condition()
+        self._sftp_lock = asyncio.Lock()
+        self._shell_lock = asyncio.Lock()
+
+    @property
+    def connections(self) -> list[SSHClientConnection]:
+        """Open connections in the pool."""
+        return [entry.connection for entry in self._entries if not entry.is_closed()]
+
+    @property
+    def channels_in_use(self) -> int:
+        """Number of channels currently open across the pool."""
+        return sum(entry.load for entry in self._entries)
+
+    @property
+    def busy(self) -> bool:
+        """Check whether any connection has work in progress."""
+        return any(entry.busy for entry in self._entries)
+
+    def add(self, connection: SSHClientConnection) -> PooledConnection:
+        """Add an already established connection to the pool."""
+        for entry in self._entries:
+            if entry.connection is connection:
+                return entry
+        entry = PooledConnection(connection)
+        self._entries.append(entry)
+        return entry
+
+    async def fill(self) -> None:
+        """Open connections in parallel until min_connections are open."""
+        async with self._cond:
+            self._prune()
+            missing = self.min_connections - len(self._entries) - self._pending
+            if missing <= 0:
+                return
+            self._pending += missing
+
+        results = await asyncio.gather(
+            *(self._factory() for _ in range(missing)), return_exceptions=True
+        )
+
+        async with self._cond:
+            self._pending -= missing
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.warning(
+                        "Could not open pooled connection to %s: %s",
+                        self.server_name,
+                        result,
+                    )
+                else:
+                    self._entries.append(PooledConnection(result))
+            self._cond.notify_all()
+
+    async def acquire(self) -> PooledConnection:
+        """Lease a channel slot on the least-loaded connection.
+
+        Opens a new connection when all existing ones are full and the pool
+        is below max_connections; otherwise waits for a slot to be released.
+        """
+        async with self._cond:
+            while True:
+                self._prune()
+                entry = self._least_loaded()
+                if entry is not None:
+                    entry.channels += 1
+                    entry.last_used = time.monotonic()
+                    return entry
+                if len(self._entries) + self._pending < self.max_connections:
+                    self._pending += 1
+                    break
+                self._waiters += 1
+                try:
+                    await self._cond.wait()
+                finally:
+                    self._waiters -= 1
+
+        # Open the connection without holding the lock so that releases and
+        # other acquirers are not blocked behind the SSH handshake
+        try:
+            connection = await self._factory()
+        except BaseException:
+            async with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+            raise
+
+        async with self._cond:
+            self._pending -= 1
+            entry = PooledConnection(connection)
+            entry.channels = 1
+            self._entries.append(entry)
+            self._cond.notify_all()
+
+        logger.info(
+            "Opened pooled connection %d to %s", len(self._entries), self.server_name
+        )
+        return entry
+
+    async def release(self, entry: PooledConnection) -> None:
+        """Return a channel slot leased by acquire()."""
+        async with self._cond:
+            entry.channels = max(0, entry.channels - 1)
+            entry.last_used = time.monotonic()
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def sftp(self) -> AsyncIterator[SFTPClient]:
+        """Use the pool's cached SFTP session, starting one if needed.
+
+        The session is shared by concurrent callers. It is discarded if an
+        operation fails because the session or connection was lost, and a
+        new one is started on a live connection by the next caller.
+        """
+        entry = await self._sftp_entry()
+        client = entry.sftp
+        assert client is not None
+        entry.sftp_users += 1
+        try:
+            yield client
+        except SFTP_SESSION_ERRORS:
+            await self._discard_sftp(entry, client)
+            raise
+        finally:
+            entry.sftp_users -= 1
+            entry.last_used = time.monotonic()
+
+    async def _sftp_entry(self) -> PooledConnection:
+        """Return a connection with an open SFTP session."""
+        async with self._sftp_lock:
+            self._prune()
+            for entry in self._entries:
+                if entry.sftp is not None:
+                    return entry
+
+            # The channel leased here is kept by the SFTP session
+            entry = await self.acquire()
+            try:
+                entry.sftp = await entry.connection.start_sftp_client()
+            except BaseException:
+                await self.release(entry)
+                raise
+            entry.channels -= 1
+            logger.debug("Started cached SFTP session to %s", self.server_name)
+            return entry
+
+    async def _discard_sftp(self, entry: PooledConnection, client: SFTPClient) -> None:
+        """Drop a broken SFTP session and free its channel."""
+        async with self._cond:
+            if entry.sftp is not client:
+                return
+            entry.sftp = None
+            self._cond.notify_all()
+        logger.info("Discarding SFTP session to %s", self.server_name)
+        client.exit()
+
+    @asynccontextmanager
+    async def shell(self) -> AsyncIterator[PersistentShell]:
+        """Use the pool's persistent shell, starting one if needed.
+
+        The shell is shared by concurrent callers, whose commands are
+        pipelined over its single channel. A shell that has closed, because
+        it exited or a command timed out, is replaced on the next use.
+        """
+        entry = await self._shell_entry()
+        shell = entry.shell
+        assert shell is not None
+        entry.shell_users += 1
+        try:
+            yield shell
+        finally:
+            entry.shell_users -= 1
+            entry.last_used = time.monotonic()
+            if shell.closed:
+                await self._discard_shell(entry, shell)
+
+    async def _shell_entry(self) -> PooledConnection:
+        """Return a connection with a running persistent shell."""
+        async with self._shell_lock:
+            self._prune()
+            for entry in self._entries:
+                if entry.shell is None:
+                    continue
+                if not entry.shell.closed:
+                    return entry
+                # The shell exited while idle; free its channel slot
+                entry.shell = None
+
+            entry = await self.acquire()
+            try:
+                shell = await PersistentShell.start(
+                    entry.connection, **self.channel_options
+                )
+            except BaseException:
+                await self.release(entry)
+                raise
+            # The channel leased above is kept by the shell
+            entry.shell = shell
+            entry.channels -= 1
+            logger.debug("Started persistent shell on %s", self.server_name)
+            return entry
+
+    async def _discard_shell(
+        self, entry: PooledConnection, shell: PersistentShell
+    ) -> None:
+        """Drop a closed persistent shell and free its channel."""
+        async with self._cond:
+            if entry.shell is not shell:
+                return
+            entry.shell = None
+            self._cond.notify_all()
+        logger.info("Discarding persistent shell to %s", self.server_name)
+
+    @property
+    def last_used(self) -> float:
+        """Monotonic time at which any connection in the pool was last used."""
+        return max((entry.last_used for entry in self._entries), default=0.0)
+
+    def detach_idle(
+        self, idle_for: float, keep: SSHClientConnection | None = None
+    ) -> list[SSHClientConnection]:
+        """Remove connections beyond min_connections that have been idle.
+
+        Connections with channels open and the ``keep`` connection are never
+        removed. The removed connections are returned for closing.
+        """
+        self._prune()
+        cutoff = time.monotonic() - idle_for
+        idle = [
+            entry
+            for entry in self._entries
+            if not entry.busy
+            and entry.last_used <= cutoff
+            and entry.connection is not keep
+        ]
+        idle = idle[: max(0, len(self._entries) - self.min_connections)]
+        for entry in idle:
+            self._entries.remove(entry)
+        return [entry.connection for entry in idle]
+
+    def detach(self) -> list[SSHClientConnection]:
+        """Remove every connection from the pool and return them for closing."""
+        connections = [entry.connection for entry in self._entries]
+        self._entries.clear()
+        return connections
+
+    def stats(self) -> dict[str, int]:
+        """Return connection and channel counts for the pool."""
+        self._prune()
+        return {
+            "connections": len(self._entries),
+            "channels": self.channels_in_use,
+            "sftp_sessions": sum(entry.sftp is not None for entry in self._entries),
+            "shells": sum(entry.shell is not None for entry in self._entries),
+            "max_connections": self.max_connections,
+            "max_channels": self.max_channels,
+            "waiters": self._waiters,
+        }
+
+    def _prune(self) -> None:
+        """Drop connections that have closed."""
+        self._entries = [entry for entry in self._entries if not entry.is_closed()]
+
+    def _least_loaded(self) -> PooledConnection | None:
+        """Return the open connection with the fewest channels, if not full."""
+        candidates = [
+            entry for entry in self._entries if entry.load < self.max_channels
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda entry: entry.load)
@@ -1,41 +1,378 @@
 """SSH connection management for remote server operations."""
 
+# The manager and the transfer helpers it drives share one module
+# pylint: disable=too-many-lines
+
 from __future__ import annotations
 
 import asyncio
+import codecs
+import functools
+import hashlib
+import itertools
 import json
 import logging
+import secrets
+import shlex
 import time
-from collections.abc import Awaitable, Callable
-from typing import Any, cast
+from collections import OrderedDict, deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import Any, Concatenate, ParamSpec, TypeVar, cast
 
 import asyncssh
-from asyncssh import SSHClientConnection, SSHClientProcess
+from asyncssh import (
+    SFTPClient,
+    SSHClientConnection,
+    SSHClientProcess,
+    SSHCompletedProcess,
+)
 
+from .breaker import CircuitBreaker
+from .cache import ResultCache
 from .config import ServerConfig, Settings
+from .delta import (
+    MISSING_FILE_EXIT,
+    compute_delta,
+    delta_stats,
+    encode_delta,
+    parse_signature,
+    rebuild_command,
+    signature_command,
+)
+from .metrics import MetricsRegistry
+from .pool import ConnectionPool, PooledConnection
+from .shell import ShellResult
+from .spill import OutputCapture, SpillStore
+from .streaming import BatchCallback, LinePipeline
+from .tasks import TaskRegistry
 
 logger = logging.getLogger(__name__)
 
+# Bytes read per chunk from a captured command, and stderr kept from it for
+# its error message
+CAPTURE_CHUNK_SIZE = 65536
+CAPTURE_STDERR_LIMIT = 64 * 1024
+
+# Seconds between checks for a draining server's work to finish
+DRAIN_POLL_INTERVAL = 0.1
+
+# Offered when compression is enabled, preferring OpenSSH's delayed zlib
+COMPRESSION_ALGS = ["zlib@openssh.com", "zlib", "none"]
+
+# Probes collected by get_system_info, keyed by the name reported to callers
+SYSTEM_INFO_COMMANDS: dict[str, str] = {
+    "hostname": "hostname",
+    "uptime": "uptime",
+    "disk_usage": "df -h",
+    "memory": "free -h",
+    "cpu_info": "cat /proc/cpuinfo | grep 'model name' | head -1",
+    "load_average": "cat /proc/loadavg",
+    "kernel": "uname -r",
+}
+
+
+def build_fact_script(commands: dict[str, str], marker: str) -> str:
+    """Build one shell script that runs every probe and frames its output.
+
+    Each probe runs in its own subshell with stdin closed. Its stdout is
+    preceded by a ``<marker> begin <key>`` line and followed by a
+    ``<marker> end <key> <exit status>`` line.
+    """
+    parts = []
+    for key, command in commands.items():
+        begin = shlex.quote(f"{marker} begin {key}")
+        parts.append(
+            f"echo {begin}; ( {command} ) </dev/null; __rc=$?; echo; "
+            f'echo "{marker} end {key} $__rc"'
+        )
+    # Always succeed so a failing probe does not discard the others
+    parts.append("exit 0")
+    return "\n".join(parts)
+
+
+def parse_fact_output(output: str, marker: str) -> dict[str, str]:
+    """Split the output of build_fact_script back into per-key results.
+
+    Only probes that exited with status 0 are returned.
+    """
+    results: dict[str, str] = {}
+    current: str | None = None
+    lines: list[str] = []
+
+    for line in output.split("\n"):
+        if not line.startswith(marker):
+            if current is not None:
+                lines.append(line)
+            continue
+
+        fields = line[len(marker) :].split()
+        if len(fields) == 2 and fields[0] == "begin":
+            current, lines = fields[1], []
+        elif len(fields) == 3 and fields[0] == "end" and fields[1] == current:
+            if fields[2] == "0":
+                results[current] = "\n".join(lines).strip()
+            current = None
+
+    return results
+
+
+# Properties requested from ``systemctl show`` for service status
+SERVICE_PROPERTIES = "Id,ActiveState,SubState,LoadState,MainPID,Description"
+
+
+def default_service_info(service_name: str) -> dict[str, Any]:
+    """Return the status reported for a service whose details are unknown."""
+    return {
+        "name": service_name,
+        "active": False,
+        "enabled": False,
+        "status": "unknown",
+        "pid": None,
+        "memory": None,
+        "description": service_name,
+    }
+
+
+def parse_service_properties(
+    service_name: str, properties: dict[str, str]
+) -> dict[str, Any]:
+    """Build a service status dict from ``systemctl show`` properties."""
+    service_info = default_service_info(service_name)
+
+    if "ActiveState" in properties:
+        service_info["active"] = properties["ActiveState"] == "active"
+        service_info["status"] = properties["ActiveState"]
+    if "MainPID" in properties:
+        try:
+            pid = int(properties["MainPID"])
+            service_info["pid"] = pid if pid != 0 else None
+        except ValueError:
+            service_info["pid"] = None
+    if "Description" in properties:
+        service_info["description"] = properties["Description"]
+
+    return service_info
+
+
+def format_rss(memory_kb: int) -> str:
+    """Format a resident set size in KiB the way the dashboard displays it."""
+    return f"{memory_kb / 1024:.1f}MB"
 
-class SSHConnectionManager:
+
+def service_log_entry(service_name: str, line: str) -> dict[str, Any]:
+    """Describe one journal line from a monitored service."""
+    return {
+        "type": "log_line",
+        "service": service_name,
+        "line": line.strip(),
+        "timestamp": time.time(),
+    }
+
+
+UploadSource = bytes | Path | AsyncIterable[bytes]
+
+
+def upload_source_size(source: UploadSource) -> int | None:
+    """Return the size of an upload source, or None for a stream."""
+    if isinstance(source, bytes):
+        return len(source)
+    if isinstance(source, Path):
+        return source.stat().st_size
+    return None
+
+
+async def iter_upload_source(
+    source: UploadSource, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Yield an upload source as chunks of at most ``chunk_size`` bytes."""
+    if isinstance(source, bytes):
+        for start in range(0, len(source), chunk_size):
+            yield source[start : start + chunk_size]
+    elif isinstance(source, Path):
+        with source.open("rb") as f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+    else:
+        async for data in source:
+            for start in range(0, len(data), chunk_size):
+                yield data[start : start + chunk_size]
+
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+_Operation = Callable[Concatenate["SSHConnectionManager", _P], Awaitable[_R]]
+
+
+def timed(operation: str) -> Callable[[_Operation[_P, _R]], _Operation[_P, _R]]:
+    """Record a manager method's duration and errors under ``operation``.
+
+    The decorated method must take the server name as its first argument,
+    called ``server_name``; it may be passed positionally or by keyword.
+    """
+
+    def decorator(method: _Operation[_P, _R]) -> _Operation[_P, _R]:
+        @functools.wraps(method)
+        async def wrapper(
+            self: SSHConnectionManager, /, *args: _P.args, **kwargs: _P.kwargs
+        ) -> _R:
+            server_name = str(args[0] if args else kwargs["server_name"])
+            start = time.perf_counter()
+            failed = False
+            try:
+                return await method(self, *args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self.record_operation(
+                    server_name, operation, time.perf_counter() - start, failed=failed
+                )
+
+        return wrapper
+
+    return decorator
+
+
+# Connections, pools, caches and metrics are all per-manager state, and every
+# remote operation the web and CLI layers use is a method on the manager
+class SSHConnectionManager:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """Manages SSH connections to remote servers."""
 
     def __init__(self, settings: Settings) -> None:
         """Initialize the SSH connection manager."""
         self.settings = settings
+        # Primary connection per server; further connections live in the pool
         self.connections: dict[str, SSHClientConnection] = {}
         self._connection_locks: dict[str, asyncio.Lock] = {}
+        self._pools: dict[str, ConnectionPool] = {}
+        # Background tasks, such as stream readers, by owner
+        self.tasks = TaskRegistry()
+        self._stream_ids = itertools.count(1)
+        self.metrics = MetricsRegistry()
+        self._register_metrics()
+        # Servers ordered from least to most recently used
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self._reaper_task: asyncio.Task[None] | None = None
+        self.eviction_counts: dict[str, int] = {"idle": 0, "lru": 0}
+        self._fanout_semaphore: asyncio.Semaphore | None = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        # Results of read-only probes, shared by concurrent callers
+        self.cache = ResultCache(settings.probe_cache_max_entries)
+        # Large command output spilled to disk by execute_command_capture
+        self.spills = SpillStore(
+            settings.command_output_spill_dir,
+            settings.command_output_spill_ttl,
+            settings.command_output_spill_max_files,
+        )
+        # Only servers with recent connect failures have a breaker
+        self._breakers: dict[str, CircuitBreaker] = {}
+        # Reconnects after a config reload that have not finished yet
+        self._reconnects: dict[str, asyncio.Task[None]] = {}
+        self._warmup: dict[str, Any] = {
+            "state": "idle",
+            "servers": {},
+            "errors": {},
+            "duration": None,
+        }
+
+    def record_operation(
+        self, server_name: str, operation: str, seconds: float, *, failed: bool
+    ) -> None:
+        """Record the duration of a remote operation and whether it failed."""
+        self._operation_seconds.observe(seconds, server_name, operation)
+        if failed:
+            self._operation_errors.inc(server_name, operation)
+
+    def _register_metrics(self) -> None:
+        """Create the manager's metrics and scrape-time gauges."""
+        metrics = self.metrics
+        self._connect_seconds = metrics.histogram(
+            "ssh_connect_seconds",
+            "Time to establish a server's primary SSH connection.",
+            ("server",),
+        )
+        self._connect_failures = metrics.counter(
+            "ssh_connect_failures_total", "Failed SSH connection attempts.", ("server",)
+        )
+        self._channel_wait_seconds = metrics.histogram(
+            "ssh_channel_wait_seconds",
+            "Time to lease a channel slot, including any connect.",
+            ("server",),
+        )
+        self._operation_seconds = metrics.histogram(
+            "ssh_operation_seconds",
+            "Duration of remote operations; probes include their commands.",
+            ("server", "operation"),
+        )
+        self._operation_errors = metrics.counter(
+            "ssh_operation_errors_total",
+            "Remote operations that raised an error.",
+            ("server", "operation"),
+        )
+        self._stream_lines = metrics.counter(
+            "ssh_stream_lines_total", "Lines delivered by streams.", ("server",)
+        )
+        self._stream_bytes = metrics.counter(
+            "ssh_stream_bytes_total",
+            "UTF-8 encoded bytes of output delivered by streams.",
+            ("server",),
+        )
+        self._stream_dropped = metrics.counter(
+            "ssh_stream_dropped_lines_total",
+            "Lines dropped by stream overflow policies.",
+            ("server",),
+        )
+        metrics.gauge(
+            "ssh_open_connections",
+            "Open SSH connections across all servers.",
+            lambda: [((), self.open_connection_count())],
+        )
+        metrics.gauge(
+            "ssh_pool_channels",
+            "Channels in use per server.",
+            lambda: [
+                ((name,), stats["channels"])
+                for name, stats in self.pool_stats().items()
+            ],
+            ("server",),
+        )
+        metrics.gauge(
+            "ssh_active_streams",
+            "Streaming commands currently delivering output.",
+            lambda: [((), self.tasks.count_named("stream-output"))],
+        )
+        metrics.gauge(
+            "ssh_background_tasks",
+            "Background tasks in the task registry.",
+            lambda: [((), len(self.tasks))],
+        )
 
     async def connect(self, server_name: str) -> SSHClientConnection:
         """Connect to a server and return the connection."""
+        self._touch(server_name)
         if server_name not in self._connection_locks:
             self._connection_locks[server_name] = asyncio.Lock()
 
+        breaker = self._breakers.get(server_name)
+        if breaker is not None and server_name not in self.connections:
+            # Fail fast rather than queue behind another doomed attempt
+            breaker.check(server_name)
+
         async with self._connection_locks[server_name]:
             # Return existing connection if available and not closed
             if server_name in self.connections:
                 conn = self.connections[server_name]
                 if not conn.is_closed():
+                    self._get_pool(server_name).add(conn)
                     return conn
                 # Remove closed connection
                 del self.connections[server_name]
@@ -45,6 +382,14 @@ class SSHConnectionManager:
             if not server_config:
                 raise ValueError(f"No configuration found for server: {server_name}")
 
+            # Reject jump host loops before they deadlock on each other's locks
+            self.settings.jump_chain(server_name)
+
+            # Callers queued behind an attempt that just failed stop here
+            breaker = self._breakers.get(server_name)
+            if breaker is not None:
+                breaker.check(server_name)
+
             # Establish new connection
             logger.info(
                 "Connecting to %s (%s:%s)",
@@ -53,14 +398,255 @@ class SSHConnectionManager:
                 server_config.port,
             )
 
+            start = time.perf_counter()
             try:
                 conn = await self._create_connection(server_config)
                 self.connections[server_name] = conn
                 logger.info("Successfully connected to %s", server_name)
-                return conn
             except Exception as e:
                 logger.error("Failed to connect to %s: %s", server_name, e)
+                self._connect_failures.inc(server_name)
+                self._record_connect_failure(server_name, e)
                 raise
+            self._connect_seconds.observe(time.perf_counter() - start, server_name)
+            self._breakers.pop(server_name, None)
+
+            pool = self._get_pool(server_name)
+            pool.add(conn)
+            if pool.min_connections > 1:
+                await pool.fill()
+
+        self._ensure_reaper()
+        await self._enforce_connection_limit(server_name)
+        return conn
+
+    def _record_connect_failure(self, server_name: str, error: Exception) -> None:
+        """Count a failed connect against the server's circuit breaker."""
+        threshold = self.settings.ssh_circuit_failure_threshold
+        if threshold <= 0:
+            return
+        breaker = self._breakers.get(server_name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                threshold,
+                self.settings.ssh_circuit_base_delay,
+                self.settings.ssh_circuit_max_delay,
+            )
+            self._breakers[server_name] = breaker
+        breaker.record_failure(error)
+        if breaker.state == "open":
+            logger.warning(
+                "Circuit open for %s after %d failed connection attempts",
+                server_name,
+                breaker.failures,
+            )
+
+    def circuit_stats(self, server_name: str) -> dict[str, Any]:
+        """Return the state of a server's connection circuit breaker."""
+        breaker = self._breakers.get(server_name)
+        if breaker is None:
+            return CircuitBreaker().stats()
+        return breaker.stats()
+
+    def _get_pool(self, server_name: str) -> ConnectionPool:
+        """Return the connection pool for a server, creating it if needed."""
+        pool = self._pools.get(server_name)
+        if pool is None:
+
+            async def factory() -> SSHClientConnection:
+                return await self._open_pooled_connection(server_name)
+
+            pool = ConnectionPool(
+                server_name,
+                factory,
+                min_connections=self.settings.ssh_pool_min_connections,
+                max_connections=self.settings.ssh_pool_max_connections,
+                max_channels=self.settings.ssh_max_channels_per_connection,
+                channel_options=self._channel_options(server_name),
+            )
+            self._pools[server_name] = pool
+        return pool
+
+    def _channel_options(self, server_name: str) -> dict[str, Any]:
+        """Return the window and packet size options for a server's channels."""
+        config = self.settings.get_server_config(server_name)
+        options: dict[str, Any] = {}
+        if config is None:
+            return options
+        if window := self.settings.transport_option(config, "window_size"):
+            options["window"] = window
+        if max_pktsize := self.settings.transport_option(config, "max_packet_size"):
+            options["max_pktsize"] = max_pktsize
+        return options
+
+    async def _open_pooled_connection(self, server_name: str) -> SSHClientConnection:
+        """Open an additional connection for a server's pool."""
+        server_config = self.settings.get_server_config(server_name)
+        if not server_config:
+            raise ValueError(f"No configuration found for server: {server_name}")
+        return await self._create_connection(server_config)
+
+    async def _acquire_channel(
+        self, server_name: str
+    ) -> tuple[ConnectionPool, PooledConnection]:
+        """Lease a channel slot on one of a server's pooled connections."""
+        start = time.perf_counter()
+        await self.connect(server_name)
+        pool = self._get_pool(server_name)
+        entry = await pool.acquire()
+        self._touch(server_name)
+        self._channel_wait_seconds.observe(time.perf_counter() - start, server_name)
+        return pool, entry
+
+    def _touch(self, server_name: str) -> None:
+        """Mark a server as the most recently used."""
+        self._last_used[server_name] = time.monotonic()
+        self._last_used.move_to_end(server_name)
+
+    def open_connection_count(self) -> int:
+        """Count open SSH connections across every server."""
+        count = 0
+        for server_name in {*self.connections, *self._pools}:
+            pool = self._pools.get(server_name)
+            connections = pool.connections if pool else []
+            primary = self.connections.get(server_name)
+            if (
+                primary is not None
+                and not primary.is_closed()
+                and all(conn is not primary for conn in connections)
+            ):
+                count += 1
+            count += len(connections)
+        return count
+
+    def _is_busy(self, server_name: str) -> bool:
+        """Check whether a server has channels open or a connect in progress.
+
+        A jump host is also busy while servers reached through it are
+        connected, since closing it would drop their tunnels.
+        """
+        pool = self._pools.get(server_name)
+        lock = self._connection_locks.get(server_name)
+        return (
+            bool(pool and pool.busy)
+            or bool(lock and lock.locked())
+            or bool(self._tunnel_dependents(server_name))
+        )
+
+    def _tunnel_dependents(self, server_name: str) -> list[str]:
+        """List connected servers that tunnel through a jump host."""
+        dependents = []
+        for name in {*self.connections, *self._pools}:
+            config = self.settings.get_server_config(name)
+            if config is not None and config.jump_host == server_name:
+                dependents.append(name)
+        return dependents
+
+    async def _evict(self, server_name: str, reason: str) -> None:
+        """Close an unused server's connections and forget its bookkeeping."""
+        logger.info("Evicting %s connections to %s", reason, server_name)
+        await self.disconnect(server_name)
+        lock = self._connection_locks.get(server_name)
+        if lock is not None and not lock.locked():
+            del self._connection_locks[server_name]
+        host_semaphore = self._host_semaphores.get(server_name)
+        if host_semaphore is not None and not host_semaphore.locked():
+            del self._host_semaphores[server_name]
+        self.eviction_counts[reason] += 1
+
+    async def _enforce_connection_limit(self, keep: str) -> None:
+        """Evict least recently used idle servers above the connection cap."""
+        limit = self.settings.ssh_max_open_connections
+        if limit <= 0:
+            return
+        for server_name in list(self._last_used):
+            if self.open_connection_count() <= limit:
+                return
+            if server_name == keep or self._is_busy(server_name):
+                continue
+            if server_name in self.connections or server_name in self._pools:
+                await self._evict(server_name, "lru")
+        if self.open_connection_count() > limit:
+            logger.warning(
+                "%d SSH connections open, above the limit of %d; "
+                "all other servers are busy",
+                self.open_connection_count(),
+                limit,
+            )
+
+    async def evict_idle(self) -> None:
+        """Close connections that have been idle for ssh_idle_timeout.
+
+        Servers idle for longer than the timeout are disconnected entirely;
+        on busier servers, surplus pooled connections that sat idle are closed.
+        """
+        idle_timeout = self.settings.ssh_idle_timeout
+        if idle_timeout <= 0:
+            return
+
+        cutoff = time.monotonic() - idle_timeout
+        for server_name, last_used in list(self._last_used.items()):
+            if server_name not in self.connections and server_name not in self._pools:
+                del self._last_used[server_name]
+            elif last_used <= cutoff and not self._is_busy(server_name):
+                await self._evict(server_name, "idle")
+
+        for server_name, pool in list(self._pools.items()):
+            for conn in pool.detach_idle(
+                idle_timeout, keep=self.connections.get(server_name)
+            ):
+                logger.info("Closing idle pooled connection to %s", server_name)
+                conn.close()
+                await conn.wait_closed()
+
+    def _ensure_reaper(self) -> None:
+        """Start the idle connection reaper if it is not already running."""
+        idle_timeout = self.settings.ssh_idle_timeout
+        if idle_timeout <= 0 or (self._reaper_task and not self._reaper_task.done()):
+            return
+        self._reaper_task = self.tasks.spawn(
+            self._reap_idle_connections(min(max(idle_timeout / 4, 1.0), 30.0)),
+            name="idle-reaper",
+            owner="manager",
+        )
+
+    async def _reap_idle_connections(self, interval: float) -> None:
+        """Periodically evict idle connections."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except (ConnectionError, OSError, RuntimeError) as e:
+                logger.warning("Error while evicting idle connections: %s", e)
+
+    @asynccontextmanager
+    async def _channel(self, server_name: str) -> AsyncIterator[SSHClientConnection]:
+        """Hold a channel slot for the duration of a short-lived operation."""
+        pool, entry = await self._acquire_channel(server_name)
+        try:
+            yield entry.connection
+        finally:
+            await pool.release(entry)
+
+    @asynccontextmanager
+    async def _sftp(self, server_name: str) -> AsyncIterator[SFTPClient]:
+        """Use the server's cached SFTP session for a file operation."""
+        await self.connect(server_name)
+        self._touch(server_name)
+        async with self._get_pool(server_name).sftp() as sftp:
+            yield sftp
+
+    async def _release_when_closed(
+        self,
+        process: SSHClientProcess[Any],
+        pool: ConnectionPool,
+        entry: PooledConnection,
+    ) -> None:
+        """Hold a channel slot until a long-running process has closed."""
+        try:
+            await process.wait_closed()
+        finally:
+            await pool.release(entry)
 
     async def _create_connection(self, config: ServerConfig) -> SSHClientConnection:
         """Create a new SSH connection."""
@@ -88,91 +674,486 @@ class SSHConnectionManager:
             # For development/testing - in production, always use known_hosts
             connect_kwargs["known_hosts"] = None
 
+        if self.settings.transport_option(config, "compression"):
+            connect_kwargs["compression_algs"] = COMPRESSION_ALGS
+        for option in ("encryption_algs", "mac_algs", "kex_algs"):
+            if algs := self.settings.transport_option(config, option):
+                connect_kwargs[option] = algs
+
+        if config.jump_host:
+            # Every server behind a jump host shares its primary connection
+            connect_kwargs["tunnel"] = await self.connect(config.jump_host)
+
         return await asyncssh.connect(**connect_kwargs)
 
+    @timed("execute")
     async def execute_command(
         self, server_name: str, command: str, timeout: int | None = None
     ) -> str:
-        """Execute a command on a remote server."""
-        conn = await self.connect(server_name)
+        """Execute a command on a remote server.
+
+        The command runs in the server's persistent shell when that is
+        enabled, and otherwise on a new session channel.
+        """
+        if self._uses_persistent_shell(server_name):
+            return await self._run_in_shell(server_name, command, timeout)
+        async with self._channel(server_name) as conn:
+            return await self._run_command(conn, server_name, command, timeout)
+
+    def _uses_persistent_shell(self, server_name: str) -> bool:
+        """Check whether commands for a server go through a persistent shell."""
+        config = self.settings.get_server_config(server_name)
+        if config is not None and config.persistent_shell is not None:
+            return config.persistent_shell
+        return self.settings.ssh_persistent_shell
+
+    async def _run_in_shell(
+        self, server_name: str, command: str, timeout: int | None
+    ) -> str:
+        """Run a command in the server's persistent shell and return its stdout."""
+        await self.connect(server_name)
+        self._touch(server_name)
+        try:
+            logger.debug("Executing command in shell on %s: %s", server_name, command)
+            async with self._get_pool(server_name).shell() as shell:
+                result = await shell.run(command, timeout)
+            return self._command_output(result)
+        except Exception as e:
+            logger.error("Command execution failed on %s: %s", server_name, e)
+            raise
 
+    async def _run_command(
+        self,
+        conn: SSHClientConnection,
+        server_name: str,
+        command: str,
+        timeout: int | None,
+    ) -> str:
+        """Run a command on an established connection and return its stdout."""
         try:
             logger.debug("Executing command on %s: %s", server_name, command)
-            result = await conn.run(command, timeout=timeout)
-
-            if result.exit_status != 0:
-                error_msg = f"Command failed with exit code {result.exit_status}"
-                if result.stderr:
-                    if isinstance(result.stderr, bytes):
-                        error_msg += (
-                            f": {result.stderr.decode('utf-8', errors='ignore')}"
-                        )
-                    else:
-                        error_msg += f": {result.stderr}"
-                raise RuntimeError(error_msg)
-
-            # Handle both bytes and str stdout
-            if result.stdout:
-                if isinstance(result.stdout, str):
-                    return result.stdout
-                # Handle bytes, bytearray, memoryview or other types
-                return str(result.stdout)
-            return ""
+            result = await conn.run(
+                command, timeout=timeout, **self._channel_options(server_name)
+            )
+            return self._command_output(result)
         except Exception as e:
             logger.error("Command execution failed on %s: %s", server_name, e)
             raise
 
+    @timed("capture")
+    async def execute_command_capture(
+        self, server_name: str, command: str, timeout: int | None = None
+    ) -> dict[str, Any]:
+        """Execute a command whose output may be too large to hold in memory.
+
+        Output is read as it arrives. Up to command_output_memory_limit bytes
+        are returned inline; beyond that the output is spilled to a file in
+        ``self.spills`` that can be read back by its ``spill_id``. Once
+        command_output_max_bytes have been kept, the command is stopped and
+        the result is marked as truncated. The command always runs on a
+        session channel, even if the server uses a persistent shell, whose
+        output is only framed once complete.
+
+        Returns:
+            Dict as built by OutputCapture.result, plus exit_status (None if
+            the command was stopped).
+
+        Raises:
+            RuntimeError: If the command exits with a non-zero status.
+            TimeoutError: If the command does not finish within ``timeout``.
+        """
+        capture = OutputCapture(
+            self.settings.command_output_memory_limit,
+            self.settings.command_output_max_bytes,
+            self.spills,
+        )
+        try:
+            async with self._channel(server_name) as conn:
+                exit_status = await self._capture_process(
+                    conn, server_name, command, timeout, capture
+                )
+        except BaseException:
+            capture.discard()
+            raise
+        finally:
+            capture.finish()
+        return {**capture.result(), "exit_status": exit_status}
+
+    async def _capture_process(
+        self,
+        conn: SSHClientConnection,
+        server_name: str,
+        command: str,
+        timeout: int | None,
+        capture: OutputCapture,
+    ) -> int | None:
+        """Run a command, reading its stdout into ``capture`` in chunks.
+
+        Returns:
+            0, or None if the command was stopped because its output reached
+            the capture's max_bytes.
+
+        Raises:
+            RuntimeError: If the command exits with a non-zero status.
+        """
+        logger.debug("Capturing command on %s: %s", server_name, command)
+        process = await conn.create_process(
+            command, encoding=None, **self._channel_options(server_name)
+        )
+        chunks = self._process_chunks(server_name, process, timeout)
+        try:
+            async for chunk in chunks:
+                await capture.write(chunk)
+                if capture.full:
+                    logger.warning(
+                        "Output of command on %s exceeded %d bytes; stopping it",
+                        server_name,
+                        capture.max_bytes,
+                    )
+                    return None
+        finally:
+            await chunks.aclose()
+        return 0
+
+    @timed("execute_bytes")
+    async def execute_command_bytes(
+        self, server_name: str, command: str, timeout: int | None = None
+    ) -> bytes:
+        """Execute a command and return its stdout as raw bytes.
+
+        Unlike execute_command, the output is not decoded, so binary output
+        such as a tarball comes back unchanged. The command always runs on a
+        session channel, even if the server uses a persistent shell.
+
+        Raises:
+            RuntimeError: If the command exits with a non-zero status.
+        """
+        async with self._channel(server_name) as conn:
+            try:
+                logger.debug("Executing command on %s: %s", server_name, command)
+                result = await conn.run(
+                    command,
+                    timeout=timeout,
+                    encoding=None,
+                    **self._channel_options(server_name),
+                )
+            except Exception as e:
+                logger.error("Command execution failed on %s: %s", server_name, e)
+                raise
+        self._check_exit_status(result)
+        return cast(bytes, result.stdout or b"")
+
+    async def stream_command_bytes(
+        self,
+        server_name: str,
+        command: str,
+        *,
+        timeout: int | None = None,
+        chunk_size: int = CAPTURE_CHUNK_SIZE,
+    ) -> AsyncGenerator[bytes]:
+        """Execute a command and yield its raw stdout in chunks as it arrives.
+
+        Chunks are passed on as read from the channel, without decoding or
+        line splitting. The command holds a channel slot until the iterator
+        is exhausted or closed; closing it early stops the command.
+
+        Raises:
+            RuntimeError: If the command exits with a non-zero status, after
+                all of its output has been yielded.
+            TimeoutError: If the command does not finish within ``timeout``.
+        """
+        async with self._channel(server_name) as conn:
+            logger.debug("Streaming command on %s: %s", server_name, command)
+            process = await conn.create_process(
+                command, encoding=None, **self._channel_options(server_name)
+            )
+            chunks = self._process_chunks(server_name, process, timeout, chunk_size)
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+
+    @staticmethod
+    async def _process_chunks(
+        server_name: str,
+        process: SSHClientProcess[bytes],
+        timeout: float | None,
+        chunk_size: int = CAPTURE_CHUNK_SIZE,
+    ) -> AsyncGenerator[bytes]:
+        """Yield a binary process's stdout chunks, then check its exit status.
+
+        Stderr is drained alongside so that it cannot stall the channel, and
+        its start is kept for the error message. The process is closed when
+        the iterator finishes or is closed.
+
+        Raises:
+            RuntimeError: If the process exits with a non-zero status.
+            TimeoutError: If the process does not finish within ``timeout``.
+        """
+        stderr = bytearray()
+
+        async def read_stderr() -> None:
+            while chunk := await process.stderr.read(chunk_size):
+                stderr.extend(chunk[: CAPTURE_STDERR_LIMIT - len(stderr)])
+
+        # A deadline rather than a timeout block, which must not span a yield
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        stderr_task = asyncio.ensure_future(read_stderr())
+        try:
+            while True:
+                async with asyncio.timeout_at(deadline):
+                    chunk = await process.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            async with asyncio.timeout_at(deadline):
+                await stderr_task
+                exit_status = (await process.wait()).exit_status
+        finally:
+            stderr_task.cancel()
+            process.close()
+
+        if exit_status:
+            error_msg = f"Command failed with exit code {exit_status}"
+            if stderr:
+                error_msg += f": {stderr.decode('utf-8', errors='ignore')}"
+            logger.error("Command execution failed on %s: %s", server_name, error_msg)
+            raise RuntimeError(error_msg)
+
+    @staticmethod
+    def _check_exit_status(result: SSHCompletedProcess | ShellResult) -> None:
+        """Raise if a finished command exited with a non-zero status."""
+        if result.exit_status != 0:
+            error_msg = f"Command failed with exit code {result.exit_status}"
+            if result.stderr:
+                if isinstance(result.stderr, bytes):
+                    error_msg += f": {result.stderr.decode('utf-8', errors='ignore')}"
+                else:
+                    error_msg += f": {result.stderr}"
+            raise RuntimeError(error_msg)
+
+    @classmethod
+    def _command_output(cls, result: SSHCompletedProcess | ShellResult) -> str:
+        """Return a finished command's stdout as text, raising if it failed."""
+        cls._check_exit_status(result)
+
+        # Handle both bytes and str stdout
+        if result.stdout:
+            if isinstance(result.stdout, str):
+                return result.stdout
+            # Decode bytes, bytearray or memoryview rather than taking its repr
+            return bytes(result.stdout).decode("utf-8", errors="replace")
+        return ""
+
+    async def execute_fanout(
+        self,
+        server_names: Iterable[str],
+        command: str,
+        timeout: int | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Execute a command on many servers at once.
+
+        Results are yielded as each server finishes, not in request order.
+        Commands in flight are limited to fanout_max_concurrency across all
+        fan-outs and to fanout_per_host_concurrency on any one server. A
+        failure on one server is reported in its result rather than raised.
+        Closing the generator early cancels the commands still running.
+        """
+        if self._fanout_semaphore is None:
+            self._fanout_semaphore = asyncio.Semaphore(
+                max(1, self.settings.fanout_max_concurrency)
+            )
+        fanout_semaphore = self._fanout_semaphore
+
+        async def run_one(server_name: str) -> dict[str, Any]:
+            host_semaphore = self._host_semaphores.setdefault(
+                server_name,
+                asyncio.Semaphore(max(1, self.settings.fanout_per_host_concurrency)),
+            )
+            # Wait for the host first so a busy server does not hold a global
+            # slot that commands for idle servers could use
+            async with host_semaphore, fanout_semaphore:
+                start = time.monotonic()
+                result: dict[str, Any] = {
+                    "server": server_name,
+                    "success": False,
+                    "output": "",
+                    "error": None,
+                }
+                try:
+                    result["output"] = await self.execute_command(
+                        server_name, command, timeout=timeout
+                    )
+                    result["success"] = True
+                except (
+                    asyncssh.Error,
+                    ConnectionError,
+                    OSError,
+                    RuntimeError,
+                    TimeoutError,
+                    ValueError,
+                ) as e:
+                    result["error"] = str(e) or type(e).__name__
+                # The command may have changed what cached probes report
+                self.invalidate_cache(server_name)
+                result["duration"] = round(time.monotonic() - start, 3)
+                return result
+
+        tasks = [
+            asyncio.create_task(run_one(server_name))
+            for server_name in dict.fromkeys(server_names)
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def execute_command_stream(
         self,
         server_name: str,
         command: str,
         callback: Callable[[str], Awaitable[None]] | None = None,
+        *,
+        batch_callback: BatchCallback | None = None,
+        owner: str | None = None,
     ) -> SSHClientProcess[str]:
-        """Execute a command with streaming output."""
-        conn = await self.connect(server_name)
+        """Execute a command with streaming output.
+
+        Output lines go to ``callback`` one at a time, or to ``batch_callback``
+        in batches along with the number of lines dropped since the previous
+        batch. Either way they pass through a bounded ``LinePipeline``
+        configured by the ``stream_*`` settings. The process keeps its channel
+        slot in the server's pool until it closes.
+
+        The stream's tasks are registered in ``self.tasks`` under ``owner``
+        (a new "stream:<server>:<n>" owner if None); cancelling that owner
+        stops the stream.
+
+        Raises:
+            ValueError: If stream_overflow_policy is not a known policy.
+        """
+        pipeline = None
+        if callback or batch_callback:
+            pipeline = LinePipeline(
+                max_lines=self.settings.stream_queue_size,
+                policy=self.settings.stream_overflow_policy,
+                sample_every=self.settings.stream_sample_every,
+            )
+
+        pool, entry = await self._acquire_channel(server_name)
 
         try:
             logger.debug("Starting streaming command on %s: %s", server_name, command)
             # Create process with text encoding to get str output
             process: SSHClientProcess[str] = cast(
                 SSHClientProcess[str],
-                await conn.create_process(command, encoding="utf-8"),
+                await entry.connection.create_process(
+                    command, encoding="utf-8", **self._channel_options(server_name)
+                ),
             )
-
-            if callback:
-                # Start a task to handle streaming output
-                asyncio.create_task(self._stream_output(process, callback))
-
-            return process
         except Exception as e:
+            await pool.release(entry)
             logger.error("Streaming command failed on %s: %s", server_name, e)
             raise
 
+        if owner is None:
+            owner = f"stream:{server_name}:{next(self._stream_ids)}"
+        self.tasks.spawn(
+            self._release_when_closed(process, pool, entry),
+            name="channel-release",
+            owner=owner,
+        )
+        if pipeline is not None:
+            self.tasks.spawn(
+                self._stream_output(
+                    process,
+                    pipeline,
+                    callback,
+                    batch_callback,
+                    owner=owner,
+                    server_name=server_name,
+                ),
+                name="stream-output",
+                owner=owner,
+            )
+
+        return process
+
     async def _stream_output(
-        self, process: SSHClientProcess[str], callback: Callable[[str], Awaitable[None]]
+        self,
+        process: SSHClientProcess[str],
+        pipeline: LinePipeline,
+        callback: Callable[[str], Awaitable[None]] | None = None,
+        batch_callback: BatchCallback | None = None,
+        *,
+        owner: str = "stream",
+        server_name: str = "",
     ) -> None:
-        """Stream output from a process to a callback function."""
+        """Stream output from a process to a line or batch callback.
+
+        A separate reader task fills the pipeline, so a slow callback leads
+        to the pipeline's overflow policy rather than unbounded buffering.
+        Cancelling this task closes the process.
+        """
+        reader = self.tasks.spawn(
+            self._read_lines(process, pipeline), name="stream-reader", owner=owner
+        )
         try:
-            async for line in process.stdout:
-                # Since we specified encoding='utf-8', line should be a str
-                await callback(line)
-        except (
-            ConnectionError,
-            OSError,
-            UnicodeDecodeError,
-            asyncio.CancelledError,
-        ) as e:
+            async for lines, dropped in pipeline.batches(
+                self.settings.stream_batch_size, self.settings.stream_batch_interval
+            ):
+                # Lines are decoded text; count the bytes that were read
+                size = len("".join(lines).encode())
+                self.tasks.record_bytes(size)
+                self._stream_lines.inc(server_name, amount=len(lines))
+                self._stream_bytes.inc(server_name, amount=size)
+                if dropped:
+                    self._stream_dropped.inc(server_name, amount=dropped)
+                if batch_callback:
+                    await batch_callback(lines, dropped)
+                    continue
+                if dropped:
+                    logger.warning("Dropped %d lines of streaming output", dropped)
+                if callback:
+                    for line in lines:
+                        await callback(line)
+        except (ConnectionError, OSError) as e:
             logger.error("Error streaming output: %s", e)
+        except asyncio.CancelledError:
+            process.close()
+            raise
         finally:
+            reader.cancel()
+            with suppress(asyncio.CancelledError):
+                await reader
             await process.wait()
 
+    @staticmethod
+    async def _read_lines(
+        process: SSHClientProcess[str], pipeline: LinePipeline
+    ) -> None:
+        """Move a process's stdout lines into a pipeline until it ends."""
+        try:
+            async for line in process.stdout:
+                # The reader yields "" once at EOF
+                if line:
+                    await pipeline.put(line)
+        except (ConnectionError, OSError, UnicodeDecodeError) as e:
+            logger.error("Error reading streaming output: %s", e)
+        finally:
+            pipeline.close()
+
+    @timed("read_file")
     async def read_file(self, server_name: str, file_path: str) -> str:
         """Read a file from a remote server."""
-        conn = await self.connect(server_name)
-
         try:
             async with (
-                conn.start_sftp_client() as sftp,
+                self._sftp(server_name) as sftp,
                 sftp.open(file_path, "r") as f,
             ):
                 return await f.read()
@@ -182,70 +1163,420 @@ class SSHConnectionManager:
             )
             raise
 
+    async def stream_file(
+        self,
+        server_name: str,
+        file_path: str,
+        *,
+        offset: int = 0,
+        length: int | None = None,
+        tail_bytes: int | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Read a byte range of a remote file as a stream of chunks.
+
+        Reads ``length`` bytes starting at ``offset`` (to the end of the file
+        when ``length`` is None), or the last ``tail_bytes`` bytes when given.
+        Up to sftp_max_requests chunk reads are kept in flight so that large
+        ranges are not bound by the round trip time of each request.
+        """
+        chunk_size = chunk_size or self.settings.sftp_chunk_size
+        depth = max(1, self.settings.sftp_max_requests)
+
+        async with (
+            self._sftp(server_name) as sftp,
+            sftp.open(file_path, "rb") as f,
+        ):
+            size = (await f.stat()).size or 0
+            if tail_bytes is not None:
+                start, end = max(0, size - tail_bytes), size
+            else:
+                start = max(0, offset)
+                end = size if length is None else min(size, start + length)
+
+            pending: deque[asyncio.Future[bytes]] = deque()
+            next_offset = start
+            try:
+                while pending or next_offset < end:
+                    while next_offset < end and len(pending) < depth:
+                        read_size = min(chunk_size, end - next_offset)
+                        pending.append(
+                            asyncio.ensure_future(f.read(read_size, next_offset))
+                        )
+                        next_offset += read_size
+
+                    data = await pending.popleft()
+                    if not data:
+                        # The file was truncated while it was being read
+                        break
+                    yield data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    async def stream_file_text(
+        self,
+        server_name: str,
+        file_path: str,
+        *,
+        encoding: str = "utf-8",
+        offset: int = 0,
+        length: int | None = None,
+        tail_bytes: int | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[str]:
+        """Read a byte range of a remote file as a stream of decoded text.
+
+        Multi-byte characters split across chunks are decoded correctly;
+        invalid sequences are replaced.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        async for chunk in self.stream_file(
+            server_name,
+            file_path,
+            offset=offset,
+            length=length,
+            tail_bytes=tail_bytes,
+            chunk_size=chunk_size,
+        ):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+
+    @timed("write_file")
     async def write_file(self, server_name: str, file_path: str, content: str) -> None:
         """Write content to a file on a remote server."""
-        conn = await self.connect(server_name)
-
         try:
             async with (
-                conn.start_sftp_client() as sftp,
+                self._sftp(server_name) as sftp,
                 sftp.open(file_path, "w") as f,
             ):
                 await f.write(content)
+            self.invalidate_cache(server_name)
         except (ConnectionError, OSError, PermissionError, FileNotFoundError) as e:
             logger.error("Failed to write file %s to %s: %s", file_path, server_name, e)
             raise
 
+    @timed("upload_file")
+    async def upload_file(
+        self,
+        server_name: str,
+        remote_path: str,
+        source: UploadSource,
+        *,
+        resume: bool = False,
+        verify: bool = True,
+        progress: Callable[[int, int | None], Awaitable[None]] | None = None,
+        chunk_size: int | None = None,
+    ) -> dict[str, Any]:
+        """Upload bytes, a local file or a byte stream to a remote file.
+
+        Up to sftp_max_requests writes are kept in flight on the cached SFTP
+        session. With ``resume``, the part of the source already present in
+        the remote file is skipped and only the remainder is sent.
+
+        Args:
+            server_name: Server to upload to.
+            remote_path: Destination path on the server.
+            source: File content, a local file path or an async iterable of
+                byte chunks.
+            resume: Continue a partial upload from the remote file size.
+            verify: Compare the remote SHA-256 with the source afterwards;
+                a mismatch raises RuntimeError.
+            progress: Awaited with (bytes done, total bytes or None) after
+                each completed write.
+            chunk_size: Bytes per write request (defaults to sftp_chunk_size).
+
+        Returns:
+            Dict with path, size, resumed_from, sha256 and verified.
+        """
+        chunk_size = chunk_size or self.settings.sftp_chunk_size
+        depth = max(1, self.settings.sftp_max_requests)
+        total = upload_source_size(source)
+        digest = hashlib.sha256()
+        resumed_from = 0
+        position = 0
+
+        try:
+            async with self._sftp(server_name) as sftp:
+                if resume:
+                    with suppress(asyncssh.SFTPNoSuchFile):
+                        resumed_from = (await sftp.stat(remote_path)).size or 0
+
+                async with sftp.open(remote_path, "r+b" if resumed_from else "wb") as f:
+                    pending: deque[tuple[asyncio.Future[int], int]] = deque()
+                    done = resumed_from if total is None else min(resumed_from, total)
+
+                    async def complete_oldest() -> None:
+                        nonlocal done
+                        future, size = pending.popleft()
+                        await future
+                        done += size
+                        if progress:
+                            await progress(done, total)
+
+                    try:
+                        async for chunk in iter_upload_source(source, chunk_size):
+                            digest.update(chunk)
+                            start = position
+                            position += len(chunk)
+                            if position <= resumed_from:
+                                # Already on the remote side
+                                continue
+                            if start < resumed_from:
+                                chunk = chunk[resumed_from - start :]
+                                start = resumed_from
+
+                            if len(pending) >= depth:
+                                await complete_oldest()
+                            pending.append(
+                                (
+                                    asyncio.ensure_future(f.write(chunk, start)),
+                                    len(chunk),
+                                )
+                            )
+                        while pending:
+                            await complete_oldest()
+                    finally:
+                        for future, _ in pending:
+                            future.cancel()
+
+                    if resumed_from > position:
+                        # The remote file was longer than the source
+                        await f.truncate(position)
+        except (ConnectionError, OSError, PermissionError, FileNotFoundError) as e:
+            logger.error(
+                "Failed to upload file %s to %s: %s", remote_path, server_name, e
+            )
+            raise
+        self.invalidate_cache(server_name)
+
+        sha256 = digest.hexdigest()
+        if verify:
+            output = await self.execute_command(
+                server_name, f"sha256sum -- {shlex.quote(remote_path)}"
+            )
+            remote_sha256 = output.split(maxsplit=1)[0] if output.strip() else ""
+            if remote_sha256 != sha256:
+                raise RuntimeError(
+                    f"Checksum mismatch for {remote_path} on {server_name}: "
+                    f"expected {sha256}, got {remote_sha256 or 'nothing'}"
+                )
+
+        return {
+            "path": remote_path,
+            "size": position,
+            "resumed_from": min(resumed_from, position),
+            "sha256": sha256,
+            "verified": verify,
+        }
+
+    @timed("sync_file")
+    async def sync_file(
+        self,
+        server_name: str,
+        remote_path: str,
+        content: bytes | str,
+        block_size: int | None = None,
+    ) -> dict[str, Any]:
+        """Write content to a remote file, sending only the changed blocks.
+
+        Block checksums of the current remote file are fetched first and the
+        new content is sent as block copies plus literal bytes; the remote
+        side rebuilds the file into a temporary file and renames it into
+        place. Falls back to a full upload when the remote file does not
+        exist or the server has no python3.
+
+        Args:
+            server_name: Server to write to.
+            remote_path: Path of the file on the server.
+            content: New file content; str is encoded as UTF-8.
+            block_size: Block size in bytes; picked from the remote file
+                size when omitted.
+
+        Returns:
+            Dict with path, size, method ("delta" or "full"), literal_bytes,
+            copied_bytes and sent_bytes.
+        """
+        data = content.encode() if isinstance(content, str) else content
+
+        async with self._channel(server_name) as conn:
+            result = await conn.run(
+                signature_command(remote_path, block_size or 0),
+                encoding=None,
+                **self._channel_options(server_name),
+            )
+
+        if result.exit_status in (MISSING_FILE_EXIT, 127):
+            logger.debug(
+                "Delta sync unavailable for %s on %s, uploading in full",
+                remote_path,
+                server_name,
+            )
+            await self.upload_file(server_name, remote_path, data)
+            return {
+                "path": remote_path,
+                "size": len(data),
+                "method": "full",
+                "literal_bytes": len(data),
+                "copied_bytes": 0,
+                "sent_bytes": len(data),
+            }
+        if result.exit_status != 0:
+            stderr = cast(bytes, result.stderr or b"").decode("utf-8", errors="replace")
+            raise RuntimeError(
+                f"Failed to checksum {remote_path} on {server_name}: {stderr}"
+            )
+
+        remote_size, remote_block_size, lookup = parse_signature(
+            cast(bytes, result.stdout or b"").decode()
+        )
+        # Rolling the checksum over large content is CPU bound
+        ops = await asyncio.to_thread(
+            compute_delta, data, remote_size, remote_block_size, lookup
+        )
+        payload = encode_delta(ops, hashlib.sha256(data).hexdigest())
+
+        async with self._channel(server_name) as conn:
+            result = await conn.run(
+                rebuild_command(remote_path, remote_block_size),
+                input=payload,
+                encoding=None,
+                **self._channel_options(server_name),
+            )
+        self.invalidate_cache(server_name)
+        if result.exit_status != 0:
+            stderr = cast(bytes, result.stderr or b"").decode("utf-8", errors="replace")
+            raise RuntimeError(
+                f"Failed to apply delta to {remote_path} on {server_name}: {stderr}"
+            )
+
+        return {
+            "path": remote_path,
+            "size": len(data),
+            "method": "delta",
+            **delta_stats(ops, len(data)),
+            "sent_bytes": len(payload),
+        }
+
     async def tail_file(
         self,
         server_name: str,
         file_path: str,
-        callback: Callable[[str], Awaitable[None]],
+        callback: Callable[[str], Awaitable[None]] | None = None,
         lines: int = 10,
+        *,
+        batch_callback: BatchCallback | None = None,
+        owner: str | None = None,
     ) -> SSHClientProcess[str]:
-        """Tail a file and stream new lines to callback."""
-        # Start with the last N lines
-        try:
-            initial_content = await self.execute_command(
-                server_name, f"tail -n {lines} {file_path}"
-            )
-            for line in initial_content.strip().split("\n"):
-                if line.strip():
-                    await callback(line)
-        except (ConnectionError, OSError, RuntimeError, FileNotFoundError) as e:
-            logger.warning("Could not get initial tail content: %s", e)
+        """Tail a file and stream new lines to callback or batch_callback.
 
-        # Follow the file for new lines
-        command = f"tail -f {file_path}"
-        process = await self.execute_command_stream(server_name, command, callback)
+        One ``tail -f`` both sends the last ``lines`` lines and follows the
+        file, so nothing is repeated or missed between the two. ``owner`` is
+        passed on to execute_command_stream.
+        """
+        command = f"tail -n {lines} -f {shlex.quote(file_path)}"
+        process = await self.execute_command_stream(
+            server_name,
+            command,
+            callback,
+            batch_callback=batch_callback,
+            owner=owner,
+        )
 
         return process
 
+    async def _cached(
+        self,
+        operation: str,
+        key: tuple[Any, ...],
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return a probe result from the cache, loading it on a miss.
+
+        ``key`` starts with the server name; the TTL comes from
+        probe_cache_ttl[operation] (0 when unset, which only coalesces
+        concurrent identical requests).
+        """
+        ttl = self.settings.probe_cache_ttl.get(operation, 0.0)
+        return await self.cache.get((operation, *key), ttl, load)
+
+    def invalidate_cache(
+        self, server_name: str | None = None, operation: str | None = None
+    ) -> int:
+        """Forget cached probe results after something may have changed them.
+
+        Args:
+            server_name: Only forget this server's results.
+            operation: Only forget results of this operation, such as
+                "system_info", "services" or "service_status".
+
+        Returns:
+            The number of cached results dropped.
+        """
+        return self.cache.invalidate(server_name, operation)
+
     async def get_system_info(self, server_name: str) -> dict[str, Any]:
-        """Get system information from a remote server."""
-        commands = {
-            "hostname": "hostname",
-            "uptime": "uptime",
-            "disk_usage": "df -h",
-            "memory": "free -h",
-            "cpu_info": "cat /proc/cpuinfo | grep 'model name' | head -1",
-            "load_average": "cat /proc/loadavg",
-            "kernel": "uname -r",
-        }
+        """Get system information from a remote server (cached)."""
+        return cast(
+            dict[str, Any],
+            await self._cached(
+                "system_info",
+                (server_name,),
+                lambda: self._fetch_system_info(server_name),
+            ),
+        )
 
-        info: dict[str, str] = {}
-        for key, command in commands.items():
-            try:
-                result = await self.execute_command(server_name, command)
-                info[key] = result.strip()
-            except (ConnectionError, OSError, TimeoutError, RuntimeError) as e:
-                logger.warning("Could not get %s from %s: %s", key, server_name, e)
-                info[key] = "N/A"
+    @timed("system_info")
+    async def _fetch_system_info(self, server_name: str) -> dict[str, Any]:
+        """Collect system information from a remote server.
+
+        All probes run in one compound script over a single channel; each
+        probe's output is framed by a per-call marker so it can be split back
+        into its key, and probes that fail are reported as "N/A".
+        """
+        marker = f"__SRC_FACT_{secrets.token_hex(8)}__"
+        try:
+            output = await self.execute_command(
+                server_name, build_fact_script(SYSTEM_INFO_COMMANDS, marker)
+            )
+        except (ConnectionError, OSError, TimeoutError, RuntimeError) as e:
+            logger.warning("Could not get system info from %s: %s", server_name, e)
+            return dict.fromkeys(SYSTEM_INFO_COMMANDS, "N/A")
 
+        info = parse_fact_output(output, marker)
+        for key in SYSTEM_INFO_COMMANDS:
+            if key not in info:
+                logger.warning("Could not get %s from %s", key, server_name)
+                info[key] = "N/A"
         return info
 
-    async def get_running_services(self, server_name: str) -> list[dict[str, Any]]:
-        """Get list of running systemd services from a remote server."""
+    async def get_running_services(
+        self, server_name: str, bulk: bool = True
+    ) -> list[dict[str, Any]]:
+        """Get list of running systemd services from a remote server (cached)."""
+        return cast(
+            list[dict[str, Any]],
+            await self._cached(
+                "services",
+                (server_name, bulk),
+                lambda: self._fetch_running_services(server_name, bulk),
+            ),
+        )
+
+    @timed("services")
+    async def _fetch_running_services(
+        self, server_name: str, bulk: bool
+    ) -> list[dict[str, Any]]:
+        """Query the running systemd services on a remote server.
+
+        In bulk mode (the default) the details of every unit are gathered in
+        one extra round trip. With ``bulk=False`` each service is queried
+        individually through get_service_status.
+        """
         try:
             # Get all active services
             command = (
@@ -254,19 +1585,22 @@ class SSHConnectionManager:
             )
             result = await self.execute_command(server_name, command)
 
-            services = []
+            service_names = []
             for line in result.strip().split("\n"):
                 if line.strip():
                     # Parse systemctl output: service_name.service loaded active running
                     parts = line.strip().split()
                     if len(parts) >= 4:
-                        service_name = parts[0].replace(".service", "")
+                        service_names.append(parts[0].replace(".service", ""))
 
-                        # Get detailed service info
-                        service_info = await self.get_service_status(
-                            server_name, service_name
-                        )
-                        services.append(service_info)
+            if bulk:
+                return await self._get_services_bulk(server_name, service_names)
+
+            services = []
+            for service_name in service_names:
+                # Get detailed service info
+                service_info = await self.get_service_status(server_name, service_name)
+                services.append(service_info)
 
             return services
 
@@ -274,42 +1608,85 @@ class SSHConnectionManager:
             logger.error("Failed to get running services from %s: %s", server_name, e)
             return []
 
+    async def _get_services_bulk(
+        self, server_name: str, service_names: list[str]
+    ) -> list[dict[str, Any]]:
+        """Get the status of many services with a single remote command.
+
+        One multi-unit ``systemctl show`` reports state, enablement and main
+        PID for every unit, and one ``ps`` over all processes supplies the
+        memory usage.
+        """
+        if not service_names:
+            return []
+
+        marker = f"__SRC_PS_{secrets.token_hex(8)}__"
+        units = " ".join(shlex.quote(f"{name}.service") for name in service_names)
+        command = (
+            f"systemctl show {units} --property={SERVICE_PROPERTIES},UnitFileState; "
+            f"echo {marker}; ps -eo pid=,rss="
+        )
+        output = await self.execute_command(server_name, command)
+        show_output, _, ps_output = output.partition(f"{marker}\n")
+
+        memory_by_pid: dict[int, str] = {}
+        for line in ps_output.split("\n"):
+            fields = line.split()
+            if len(fields) == 2 and fields[0].isdigit() and fields[1].isdigit():
+                memory_by_pid[int(fields[0])] = format_rss(int(fields[1]))
+
+        services_by_name: dict[str, dict[str, Any]] = {}
+        # systemctl show separates the properties of each unit by a blank line
+        for block in show_output.strip().split("\n\n"):
+            properties = dict(
+                line.split("=", 1) for line in block.split("\n") if "=" in line
+            )
+            name = properties.get("Id", "").removesuffix(".service")
+            if not name:
+                continue
+            service_info = parse_service_properties(name, properties)
+            service_info["enabled"] = properties.get("UnitFileState") == "enabled"
+            if service_info["pid"]:
+                service_info["memory"] = memory_by_pid.get(service_info["pid"])
+            services_by_name[name] = service_info
+
+        return [
+            services_by_name.get(name) or default_service_info(name)
+            for name in service_names
+        ]
+
     async def get_service_status(
         self, server_name: str, service_name: str
     ) -> dict[str, Any]:
-        """Get detailed status of a specific service."""
+        """Get detailed status of a specific service (cached)."""
+        return cast(
+            dict[str, Any],
+            await self._cached(
+                "service_status",
+                (server_name, service_name),
+                lambda: self._fetch_service_status(server_name, service_name),
+            ),
+        )
+
+    @timed("service_status")
+    async def _fetch_service_status(
+        self, server_name: str, service_name: str
+    ) -> dict[str, Any]:
+        """Query the detailed status of a specific service."""
         try:
             # Get service status
             status_cmd = (
-                f"systemctl show {service_name} "
-                "--property=ActiveState,SubState,LoadState,MainPID,Description"
+                f"systemctl show {service_name} --property={SERVICE_PROPERTIES}"
             )
             status_result = await self.execute_command(server_name, status_cmd)
 
             # Parse the output
-            service_info = {
-                "name": service_name,
-                "active": False,
-                "enabled": False,
-                "status": "unknown",
-                "pid": None,
-                "memory": None,
-                "description": service_name,
-            }
-
-            for line in status_result.strip().split("\n"):
-                if "=" in line:
-                    key, value = line.split("=", 1)
-                    if key == "ActiveState":
-                        service_info["active"] = value == "active"
-                        service_info["status"] = value
-                    elif key == "MainPID":
-                        try:
-                            service_info["pid"] = int(value) if value != "0" else None
-                        except ValueError:
-                            service_info["pid"] = None
-                    elif key == "Description":
-                        service_info["description"] = value
+            properties = dict(
+                line.split("=", 1)
+                for line in status_result.strip().split("\n")
+                if "=" in line
+            )
+            service_info = parse_service_properties(service_name, properties)
 
             # Check if service is enabled
             try:
@@ -325,8 +1702,7 @@ class SSHConnectionManager:
                     memory_cmd = f"ps -p {service_info['pid']} -o rss= 2>/dev/null"
                     memory_result = await self.execute_command(server_name, memory_cmd)
                     if memory_result.strip():
-                        memory_kb = int(memory_result.strip())
-                        service_info["memory"] = f"{memory_kb / 1024:.1f}MB"
+                        service_info["memory"] = format_rss(int(memory_result.strip()))
                 except (ConnectionError, OSError, ValueError, RuntimeError):
                     service_info["memory"] = None
 
@@ -339,63 +1715,41 @@ class SSHConnectionManager:
                 server_name,
                 e,
             )
-            return {
-                "name": service_name,
-                "active": False,
-                "enabled": False,
-                "status": "unknown",
-                "pid": None,
-                "memory": None,
-                "description": service_name,
-            }
+            return default_service_info(service_name)
 
     async def monitor_service_logs(
         self,
         server_name: str,
         service_name: str,
-        callback: Callable[[str], Awaitable[None]],
+        callback: Callable[[str], Awaitable[None]] | None = None,
         lines: int = 10,
+        *,
+        batch_callback: BatchCallback | None = None,
+        owner: str | None = None,
     ) -> SSHClientProcess[str]:
-        """Monitor service logs in real-time using journalctl."""
-        # Start with recent logs
-        try:
-            initial_logs = await self.execute_command(
-                server_name, f"journalctl -u {service_name} -n {lines} --no-pager"
-            )
-            for line in initial_logs.strip().split("\n"):
-                if line.strip():
-                    await callback(
-                        json.dumps(
-                            {
-                                "type": "log_line",
-                                "service": service_name,
-                                "line": line.strip(),
-                                "timestamp": time.time(),
-                            }
-                        )
-                    )
-        except (ConnectionError, OSError, RuntimeError) as e:
-            logger.warning("Could not get initial service logs: %s", e)
+        """Monitor service logs in real-time using journalctl.
 
-        # Follow the service logs in real-time
-        monitor_cmd = f"journalctl -fu {service_name} --no-pager"
+        ``callback`` receives each non-empty line as a JSON-encoded
+        ``service_log_entry``; ``batch_callback`` receives raw journal lines in
+        batches. One ``journalctl -f`` sends the last ``lines`` entries and
+        then follows the unit, so no entry is delivered twice. ``owner`` is
+        passed on to execute_command_stream.
+        """
+        monitor_cmd = (
+            f"journalctl -u {shlex.quote(service_name)} -n {lines} -f --no-pager"
+        )
 
         async def log_callback(line: str) -> None:
             """Process log lines."""
-            if line.strip():
-                await callback(
-                    json.dumps(
-                        {
-                            "type": "log_line",
-                            "service": service_name,
-                            "line": line.strip(),
-                            "timestamp": time.time(),
-                        }
-                    )
-                )
+            if line.strip() and callback:
+                await callback(json.dumps(service_log_entry(service_name, line)))
 
         process = await self.execute_command_stream(
-            server_name, monitor_cmd, log_callback
+            server_name,
+            monitor_cmd,
+            log_callback if callback else None,
+            batch_callback=batch_callback,
+            owner=owner,
         )
         return process
 
@@ -408,21 +1762,277 @@ class SSHConnectionManager:
         return not conn.is_closed()
 
     async def disconnect(self, server_name: str) -> None:
-        """Disconnect from a specific server."""
-        if server_name in self.connections:
-            conn = self.connections[server_name]
+        """Disconnect from a specific server, closing all pooled connections."""
+        pool = self._pools.pop(server_name, None)
+        primary = self.connections.pop(server_name, None)
+        self._last_used.pop(server_name, None)
+        await self._close_connections(server_name, pool, primary)
+
+    async def drain(self, server_name: str, timeout: float) -> None:
+        """Disconnect from a server once the work in progress on it is done.
+
+        The server's connections are detached at once, so new operations
+        open fresh connections with the current configuration. The old ones
+        are closed when their last channel is released, or after ``timeout``
+        seconds, which stops long-running streams still using them.
+        """
+        pool, primary = self._detach(server_name)
+        await self._drain_detached(server_name, pool, primary, timeout)
+
+    def _detach(
+        self, server_name: str
+    ) -> tuple[ConnectionPool | None, SSHClientConnection | None]:
+        """Stop handing out a server's connections and return them."""
+        pool = self._pools.pop(server_name, None)
+        primary = self.connections.pop(server_name, None)
+        self._breakers.pop(server_name, None)
+        return pool, primary
+
+    async def _drain_detached(
+        self,
+        server_name: str,
+        pool: ConnectionPool | None,
+        primary: SSHClientConnection | None,
+        timeout: float,
+    ) -> None:
+        """Close detached connections once idle or after ``timeout`` seconds."""
+        if pool is not None:
+            deadline = time.monotonic() + timeout
+            while pool.busy and time.monotonic() < deadline:
+                await asyncio.sleep(DRAIN_POLL_INTERVAL)
+            if pool.busy:
+                logger.warning(
+                    "Closing connections to %s with work still in progress",
+                    server_name,
+                )
+        await self._close_connections(server_name, pool, primary)
+
+    async def _close_connections(
+        self,
+        server_name: str,
+        pool: ConnectionPool | None,
+        primary: SSHClientConnection | None,
+    ) -> None:
+        """Close a detached pool's connections and the primary connection."""
+        if pool is None and primary is None:
+            return
+
+        connections = pool.detach() if pool else []
+        if primary is not None and all(conn is not primary for conn in connections):
+            connections.append(primary)
+
+        for conn in connections:
             if not conn.is_closed():
                 conn.close()
                 await conn.wait_closed()
-            del self.connections[server_name]
-            logger.info("Disconnected from %s", server_name)
+        logger.info("Disconnected from %s", server_name)
 
     async def close_all(self) -> None:
-        """Close all SSH connections."""
-        for server_name in list(self.connections.keys()):
+        """Close all SSH connections and cancel every background task."""
+        await self.tasks.cancel_all()
+        self._reaper_task = None
+        for server_name in list({*self.connections, *self._pools}):
             await self.disconnect(server_name)
+        self.spills.clear()
         logger.info("All SSH connections closed")
 
+    async def apply_config_changes(self, changes: dict[str, list[str]]) -> None:
+        """Update connections after servers were added, removed or changed.
+
+        Added servers connect on first use. Removed and changed servers, and
+        servers tunnelled through them, are drained in the background;
+        changed servers that were connected are connected again with their
+        new configuration. Connections to every other server are untouched.
+
+        Args:
+            changes: Server names by "added", "removed" and "changed", as
+                returned by Settings.reload().
+        """
+        stale = [*changes.get("removed", []), *changes.get("changed", [])]
+        for server_name in stale:
+            stale.extend(
+                name
+                for name in self._tunnel_dependents(server_name)
+                if name not in stale
+            )
+        timeout = self.settings.config_reload_drain_timeout
+        for server_name in stale:
+            self.invalidate_cache(server_name)
+            # A reconnect from an earlier reload may be using an older config
+            reconnect = self._reconnects.pop(server_name, None)
+            if reconnect is not None:
+                reconnect.cancel()
+            connected = reconnect is not None or (
+                server_name in self.connections or server_name in self._pools
+            )
+            if connected:
+                # Detach now so the reconnect below cannot reuse the old
+                # connections, then close them in the background
+                pool, primary = self._detach(server_name)
+                self.tasks.spawn(
+                    self._drain_detached(server_name, pool, primary, timeout),
+                    name="drain",
+                    owner="manager",
+                )
+            if connected and self.settings.has_server(server_name):
+                self._reconnects[server_name] = self.tasks.spawn(
+                    self._reconnect(server_name), name="reconnect", owner="manager"
+                )
+        for server_name in changes.get("removed", []):
+            self._last_used.pop(server_name, None)
+            self._connection_locks.pop(server_name, None)
+            self._host_semaphores.pop(server_name, None)
+            self._breakers.pop(server_name, None)
+
+    async def _reconnect(self, server_name: str) -> None:
+        """Connect to a changed server again, logging rather than raising."""
+        try:
+            await self.connect(server_name)
+        except (ConnectionError, OSError, ValueError, asyncssh.Error) as e:
+            logger.warning("Could not reconnect to %s: %s", server_name, e)
+        finally:
+            if self._reconnects.get(server_name) is asyncio.current_task():
+                del self._reconnects[server_name]
+
+    async def reload_config(self, force: bool = False) -> dict[str, list[str]] | None:
+        """Reload the config file if it changed and apply the server changes.
+
+        Args:
+            force: Reload even if the file looks unchanged.
+
+        Returns:
+            The changes, as returned by Settings.reload(), or None if the
+            file is unchanged.
+
+        Raises:
+            ValueError: If the file is empty or not a mapping
+            OSError: If the file cannot be read
+        """
+        if not force and not self.settings.config_changed():
+            return None
+        changes = self.settings.reload()
+        if any(changes.values()):
+            logger.info(
+                "Configuration reloaded: %d added, %d removed, %d changed",
+                len(changes["added"]),
+                len(changes["removed"]),
+                len(changes["changed"]),
+            )
+        await self.apply_config_changes(changes)
+        return changes
+
+    async def watch_config(self, interval: float) -> None:
+        """Check the config file for changes every ``interval`` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload_config()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # YAML errors have no common base class short of Exception
+                logger.warning("Keeping the current configuration: %s", e)
+
     def list_connected_servers(self) -> list[str]:
         """List all currently connected servers."""
         return [name for name, conn in self.connections.items() if not conn.is_closed()]
+
+    def pool_stats(self) -> dict[str, dict[str, int]]:
+        """Return connection and channel usage for each server's pool."""
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    def connection_stats(self) -> dict[str, Any]:
+        """Return open connection counts, limits and eviction counters."""
+        return {
+            "open_connections": self.open_connection_count(),
+            "connected_servers": len(self.list_connected_servers()),
+            "max_open_connections": self.settings.ssh_max_open_connections,
+            "idle_timeout": self.settings.ssh_idle_timeout,
+            "evictions": dict(self.eviction_counts),
+            "pools": self.pool_stats(),
+        }
+
+    async def warm_up(
+        self, server_names: Iterable[str], concurrency: int | None = None
+    ) -> dict[str, Any]:
+        """Connect to servers ahead of their first use.
+
+        Servers are connected in parallel, at most ``concurrency`` at a time
+        (warmup_concurrency by default). A server that fails to connect is
+        recorded in the result rather than raised.
+
+        Args:
+            server_names: Servers to connect to.
+            concurrency: Maximum connection attempts in flight.
+
+        Returns:
+            The warm-up progress, as reported by warmup_stats.
+        """
+        names = list(dict.fromkeys(server_names))
+        semaphore = asyncio.Semaphore(
+            max(1, concurrency or self.settings.warmup_concurrency)
+        )
+        servers: dict[str, str] = dict.fromkeys(names, "pending")
+        errors: dict[str, str] = {}
+        self._warmup = {
+            "state": "running",
+            "servers": servers,
+            "errors": errors,
+            "duration": None,
+        }
+        limit = self.settings.ssh_max_open_connections
+        if 0 < limit < len(names):
+            logger.warning(
+                "Warming up %d servers with ssh_max_open_connections=%d; "
+                "earlier servers will be evicted",
+                len(names),
+                limit,
+            )
+
+        async def warm(server_name: str) -> None:
+            async with semaphore:
+                servers[server_name] = "connecting"
+                try:
+                    await self.connect(server_name)
+                except (
+                    asyncssh.Error,
+                    ConnectionError,
+                    OSError,
+                    TimeoutError,
+                    ValueError,
+                ) as e:
+                    servers[server_name] = "failed"
+                    errors[server_name] = str(e) or type(e).__name__
+                    logger.warning("Warm-up of %s failed: %s", server_name, e)
+                else:
+                    servers[server_name] = "connected"
+
+        logger.info("Warming up connections to %d servers", len(names))
+        start = time.monotonic()
+        state = "cancelled"
+        try:
+            await asyncio.gather(*(warm(name) for name in names))
+            state = "done"
+        finally:
+            self._warmup["state"] = state
+            self._warmup["duration"] = round(time.monotonic() - start, 3)
+        logger.info(
+            "Warm-up finished in %.2fs: %d connected, %d failed",
+            self._warmup["duration"],
+            len(names) - len(errors),
+            len(errors),
+        )
+        return self.warmup_stats()
+
+    def warmup_stats(self) -> dict[str, Any]:
+        """Return the progress of the most recent warm-up."""
+        servers: dict[str, str] = self._warmup["servers"]
+        states = list(servers.values())
+        return {
+            "state": self._warmup["state"],
+            "total": len(servers),
+            "connected": states.count("connected"),
+            "failed": states.count("failed"),
+            "pending": states.count("pending") + states.count("connecting"),
+            "duration": self._warmup["duration"],
+            "servers": dict(servers),
+            "errors": dict(self._warmup["errors"]),
+        }
@@ -0,0 +1,205 @@
+"""Long-lived remote shell that runs many commands over one channel.
+
+Each command is written to the shell's stdin wrapped in a subshell and
+followed by a per-command sentinel on both stdout and stderr, carrying the
+exit status on stdout. The reader tasks split the two streams back into one
+result per command. Commands run one after another in the order they were
+sent, so several callers can pipeline requests without waiting for each
+other's round trips.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+from collections import deque
+from typing import Any, NamedTuple
+
+from asyncssh import SSHClientConnection, SSHClientProcess
+
+logger = logging.getLogger(__name__)
+
+
+class ShellResult(NamedTuple):
+    """Outcome of one command run in a persistent shell."""
+
+    exit_status: int
+    stdout: str
+    stderr: str
+
+
+class _Request:
+    """A command sent to the shell and the output collected for it so far."""
+
+    def __init__(self, token: bytes, future: asyncio.Future[ShellResult]) -> None:
+        self.token = token
+        self.future = future
+        self.exit_status = -1
+        self.stdout: bytes | None = None
+        self.stderr: bytes | None = None
+
+    def complete(self) -> None:
+        """Resolve the request once both streams have been framed."""
+        if self.stdout is None or self.stderr is None or self.future.done():
+            return
+        self.future.set_result(
+            ShellResult(
+                self.exit_status,
+                self.stdout.decode("utf-8", errors="replace"),
+                self.stderr.decode("utf-8", errors="replace"),
+            )
+        )
+
+
+def frame_command(command: str, token: str) -> str:
+    """Wrap a command so its output ends with sentinels naming ``token``.
+
+    The command runs in a subshell so ``cd``, ``exit`` and variable changes
+    do not leak into later commands, and with stdin from /dev/null so it
+    cannot consume the commands queued behind it.
+    """
+    return (
+        f"( {command}\n) </dev/null; "
+        f"printf '\\n%s %d\\n' '{token}' \"$?\"; "
+        f"printf '\\n%s\\n' '{token}' >&2\n"
+    )
+
+
+class PersistentShell:
+    """A remote ``sh`` process that executes framed commands."""
+
+    def __init__(self, process: SSHClientProcess[bytes]) -> None:
+        """Take over a started shell process and begin reading its output."""
+        self._process = process
+        self._prefix = f"__SRC_SH_{secrets.token_hex(8)}_"
+        self._counter = 0
+        self._stdout_waiting: deque[_Request] = deque()
+        self._stderr_waiting: deque[_Request] = deque()
+        self.closed = False
+        self._readers = [
+            asyncio.create_task(self._read_stdout()),
+            asyncio.create_task(self._read_stderr()),
+        ]
+
+    @classmethod
+    async def start(
+        cls, connection: SSHClientConnection, **channel_options: Any
+    ) -> PersistentShell:
+        """Start a POSIX shell on a connection's new session channel.
+
+        ``channel_options`` (such as ``window`` and ``max_pktsize``) are
+        passed on to asyncssh when the channel is created.
+        """
+        process = await connection.create_process(
+            "exec sh", encoding=None, **channel_options
+        )
+        return cls(process)
+
+    @property
+    def pending(self) -> int:
+        """Number of commands sent whose results have not arrived."""
+        # Both queues are in send order; a request leaves each once framed
+        return max(len(self._stdout_waiting), len(self._stderr_waiting))
+
+    async def run(self, command: str, timeout: float | None = None) -> ShellResult:
+        """Run a command and return its exit status, stdout and stderr.
+
+        Raises:
+            ConnectionError: If the shell is closed or exits before the
+                command completes.
+            TimeoutError: If the command does not finish within ``timeout``;
+                the shell is closed because it is still busy running it.
+        """
+        if self.closed:
+            raise ConnectionError("Persistent shell is closed")
+
+        self._counter += 1
+        token = f"{self._prefix}{self._counter}__"
+        future: asyncio.Future[ShellResult] = asyncio.get_running_loop().create_future()
+        request = _Request(token.encode(), future)
+        self._stdout_waiting.append(request)
+        self._stderr_waiting.append(request)
+        self._process.stdin.write(frame_command(command, token).encode())
+
+        try:
+            # A cancelled caller cancels only the future; the request stays
+            # queued so its command's output is still consumed
+            return await asyncio.wait_for(future, timeout)
+        except TimeoutError:
+            self.close(f"Command timed out after {timeout}s")
+            raise
+
+    def close(self, reason: str = "Persistent shell closed") -> None:
+        """Stop the shell and fail every command still waiting for output."""
+        if self.closed:
+            return
+        self.closed = True
+        for reader in self._readers:
+            if reader is not asyncio.current_task():
+                reader.cancel()
+        self._fail_pending(reason)
+        try:
+            self._process.close()
+        except (OSError, RuntimeError) as e:
+            logger.debug("Error closing persistent shell: %s", e)
+
+    def _fail_pending(self, reason: str) -> None:
+        for request in (*self._stdout_waiting, *self._stderr_waiting):
+            if not request.future.done():
+                request.future.set_exception(ConnectionError(reason))
+        self._stdout_waiting.clear()
+        self._stderr_waiting.clear()
+
+    async def _read_stdout(self) -> None:
+        """Split stdout into per-command output and exit status."""
+        # Appended to and trimmed in place, so large outputs are not copied
+        # again for every chunk
+        buffer = bytearray()
+        # Where to resume searching, so large outputs are not rescanned
+        scan = 0
+        while data := await self._read(self._process.stdout):
+            buffer += data
+            while self._stdout_waiting:
+                request = self._stdout_waiting[0]
+                marker = b"\n" + request.token + b" "
+                start = buffer.find(marker, scan)
+                end = buffer.find(b"\n", start + len(marker)) if start >= 0 else -1
+                if end < 0:
+                    scan = start if start >= 0 else max(0, len(buffer) - len(marker))
+                    break
+                request.stdout = bytes(buffer[:start])
+                request.exit_status = int(buffer[start + len(marker) : end])
+                del buffer[: end + 1]
+                scan = 0
+                self._stdout_waiting.popleft()
+                request.complete()
+        self.close("Persistent shell exited")
+
+    async def _read_stderr(self) -> None:
+        """Split stderr into per-command output."""
+        buffer = bytearray()
+        scan = 0
+        while data := await self._read(self._process.stderr):
+            buffer += data
+            while self._stderr_waiting:
+                request = self._stderr_waiting[0]
+                marker = b"\n" + request.token + b"\n"
+                start = buffer.find(marker, scan)
+                if start < 0:
+                    scan = max(0, len(buffer) - len(marker))
+                    break
+                request.stderr = bytes(buffer[:start])
+                del buffer[: start + len(marker)]
+                scan = 0
+                self._stderr_waiting.popleft()
+                request.complete()
+        self.close("Persistent shell exited")
+
+    @staticmethod
+    async def _read(stream: Any) -> bytes:
+        try:
+            return bytes(await stream.read(65536))
+        except (OSError, ConnectionError) as e:
+            logger.debug("Persistent shell stream failed: %s", e)
+            return b""
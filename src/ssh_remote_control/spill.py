@@ -0,0 +1,219 @@
+"""Bounded capture of command output, spilling large results to disk.
+
+An ``OutputCapture`` keeps the first ``memory_limit`` bytes of a command's
+output in memory. If the output grows beyond that, everything is written to
+a temporary file in a ``SpillStore`` instead, up to ``max_bytes``, after
+which the output is truncated. Spilled output can then be read back in pages
+or streamed, and is deleted after a TTL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import secrets
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SpillFile:
+    """A temporary file holding one command's output."""
+
+    def __init__(self, spill_id: str, path: str, fd: int) -> None:
+        self.id = spill_id
+        self.path = path
+        self.size = 0
+        self.created_at = time.monotonic()
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes) -> None:
+        """Append data to the file."""
+        self._file.write(data)
+        self.size += len(data)
+
+    def finish(self) -> None:
+        """Flush and close the file for writing."""
+        if not self._file.closed:
+            self._file.close()
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Read up to ``length`` bytes starting at ``offset``."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def delete(self) -> None:
+        """Close and remove the file."""
+        self.finish()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+class SpillStore:
+    """Temporary files of spilled command output, looked up by id."""
+
+    def __init__(
+        self, directory: str | None = None, ttl: float = 600.0, max_files: int = 32
+    ) -> None:
+        """Initialize an empty store.
+
+        Args:
+            directory: Where to create files (the system temp dir if None).
+            ttl: Seconds a file is kept after it was created.
+            max_files: Files kept at once; the oldest are deleted first.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_files = max(1, max_files)
+        self._files: OrderedDict[str, SpillFile] = OrderedDict()
+
+    def create(self) -> SpillFile:
+        """Create a new, empty spill file."""
+        self.expire()
+        while len(self._files) >= self.max_files:
+            _, oldest = self._files.popitem(last=False)
+            oldest.delete()
+        fd, path = tempfile.mkstemp(prefix="ssh-rc-output-", dir=self.directory)
+        spill = SpillFile(secrets.token_hex(8), path, fd)
+        self._files[spill.id] = spill
+        return spill
+
+    def get(self, spill_id: str) -> SpillFile:
+        """Return a spill file by id.
+
+        Raises:
+            KeyError: If there is no such file or it has expired.
+        """
+        self.expire()
+        return self._files[spill_id]
+
+    def read(self, spill_id: str, offset: int = 0, length: int = 65536) -> bytes:
+        """Read one page of a spill file.
+
+        Raises:
+            KeyError: If there is no such file or it has expired.
+        """
+        return self.get(spill_id).read(max(0, offset), max(0, length))
+
+    async def stream(
+        self, spill_id: str, offset: int = 0, chunk_size: int = 65536
+    ) -> AsyncIterator[bytes]:
+        """Yield a spill file's contents from ``offset`` in chunks.
+
+        Raises:
+            KeyError: If there is no such file or it has expired.
+        """
+        spill = self.get(spill_id)
+        with open(spill.path, "rb") as f:
+            f.seek(max(0, offset))
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+
+    def remove(self, spill_id: str) -> bool:
+        """Delete a spill file; returns whether it existed."""
+        spill = self._files.pop(spill_id, None)
+        if spill is None:
+            return False
+        spill.delete()
+        return True
+
+    def expire(self) -> None:
+        """Delete files older than the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        for spill_id, spill in list(self._files.items()):
+            if spill.created_at <= cutoff:
+                logger.debug("Deleting expired command output %s", spill_id)
+                self.remove(spill_id)
+
+    def clear(self) -> None:
+        """Delete every spill file."""
+        for spill_id in list(self._files):
+            self.remove(spill_id)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the number and total size of stored files."""
+        return {
+            "files": len(self._files),
+            "bytes": sum(spill.size for spill in self._files.values()),
+            "max_files": self.max_files,
+        }
+
+
+class OutputCapture:
+    """Collects output in memory up to a limit, then spills it to disk."""
+
+    def __init__(self, memory_limit: int, max_bytes: int, store: SpillStore) -> None:
+        """Initialize an empty capture.
+
+        Args:
+            memory_limit: Bytes kept in memory; larger output is spilled.
+            max_bytes: Bytes kept in total; later output is dropped.
+            store: Where spilled output is written.
+        """
+        self.memory_limit = max(0, memory_limit)
+        self.max_bytes = max(self.memory_limit, max_bytes)
+        self.store = store
+        self.head = bytearray()
+        self.total_bytes = 0
+        self.stored_bytes = 0
+        self.spill: SpillFile | None = None
+
+    @property
+    def full(self) -> bool:
+        """Whether max_bytes has been reached."""
+        return self.stored_bytes >= self.max_bytes
+
+    @property
+    def truncated(self) -> bool:
+        """Whether output may have been dropped, as max_bytes was reached."""
+        return self.full
+
+    async def write(self, data: bytes) -> None:
+        """Add output, spilling to disk once it exceeds memory_limit."""
+        self.total_bytes += len(data)
+        data = data[: self.max_bytes - self.stored_bytes]
+        if not data:
+            return
+        self.stored_bytes += len(data)
+        if self.spill is None:
+            if len(self.head) + len(data) <= self.memory_limit:
+                self.head += data
+                return
+            self.spill = self.store.create()
+            await asyncio.to_thread(self.spill.write, bytes(self.head))
+            # Keep only a memory_limit preview once the rest is on disk
+            self.head += data[: self.memory_limit - len(self.head)]
+        await asyncio.to_thread(self.spill.write, data)
+
+    def finish(self) -> None:
+        """Close the spill file, if any, for writing."""
+        if self.spill is not None:
+            self.spill.finish()
+
+    def discard(self) -> None:
+        """Delete any spilled output, e.g. when the command failed."""
+        if self.spill is not None:
+            self.store.remove(self.spill.id)
+            self.spill = None
+
+    def result(self) -> dict[str, Any]:
+        """Describe the captured output.
+
+        Returns:
+            Dict with output (the in-memory part as text), total_bytes,
+            stored_bytes, truncated and spill_id (None unless spilled).
+        """
+        return {
+            "output": self.head.decode("utf-8", errors="replace"),
+            "total_bytes": self.total_bytes,
+            "stored_bytes": self.stored_bytes,
+            "truncated": self.truncated,
+            "spill_id": self.spill.id if self.spill else None,
+        }
@@ -0,0 +1,126 @@
+"""Bounded line queue between a remote stream reader and its consumer.
+
+The reader puts lines into a ``LinePipeline`` while the consumer takes them
+out in batches, so a slow consumer (usually a WebSocket) never lets lines
+pile up without bound. What happens when the queue is full depends on the
+overflow policy:
+
+- ``block``: the reader waits, which stops reading from the SSH channel and
+  lets SSH flow control push back on the remote command.
+- ``drop_oldest``: the oldest queued line is discarded for each new one.
+- ``sample``: only every Nth new line is kept, replacing the oldest.
+
+Dropped lines are counted and reported with the next batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import suppress
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "sample")
+
+# Receives a batch of lines and the number dropped since the previous batch
+BatchCallback = Callable[[list[str], int], Awaitable[None]]
+
+
+# Policy settings, counters, the queue and its two wakeup events
+class LinePipeline:  # pylint: disable=too-many-instance-attributes
+    """Bounded queue of lines with an overflow policy and batched reads."""
+
+    def __init__(
+        self, *, max_lines: int = 10000, policy: str = "block", sample_every: int = 10
+    ) -> None:
+        """Initialize an empty pipeline.
+
+        Args:
+            max_lines: Lines held before the overflow policy applies.
+            policy: One of "block", "drop_oldest" or "sample".
+            sample_every: With "sample", keep one of every this many lines
+                that arrive while the queue is full.
+
+        Raises:
+            ValueError: If the policy is unknown.
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy {policy!r}; "
+                f"expected one of {', '.join(OVERFLOW_POLICIES)}"
+            )
+        self.max_lines = max(1, max_lines)
+        self.policy = policy
+        self.sample_every = max(1, sample_every)
+        self.dropped = 0
+        self._unreported = 0
+        self._overflowed = 0
+        self._lines: deque[str] = deque()
+        self._closed = False
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    async def put(self, line: str) -> None:
+        """Add a line, applying the overflow policy if the queue is full."""
+        if len(self._lines) >= self.max_lines:
+            if self.policy == "block":
+                while len(self._lines) >= self.max_lines and not self._closed:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+            else:
+                self._overflowed += 1
+                if self.policy == "sample" and self._overflowed % self.sample_every:
+                    self._drop()
+                    return
+                self._lines.popleft()
+                self._drop()
+        if self._closed:
+            return
+        self._lines.append(line)
+        self._not_empty.set()
+
+    def close(self) -> None:
+        """Mark the end of the stream; queued lines can still be read."""
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    async def batches(
+        self, max_batch: int = 200, max_delay: float = 0.05
+    ) -> AsyncGenerator[tuple[list[str], int]]:
+        """Yield (lines, dropped) batches until the pipeline is closed.
+
+        A batch is sent once it holds ``max_batch`` lines or ``max_delay``
+        seconds after its first line arrived, whichever comes first.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._lines:
+                if self._closed:
+                    return
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            deadline = loop.time() + max_delay
+            while len(self._lines) < max_batch and not self._closed:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._not_empty.clear()
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._not_empty.wait(), remaining)
+
+            count = min(max_batch, len(self._lines))
+            batch = [self._lines.popleft() for _ in range(count)]
+            dropped, self._unreported = self._unreported, 0
+            self._not_full.set()
+            yield batch, dropped
+
+    def _drop(self) -> None:
+        self.dropped += 1
+        self._unreported += 1
@@ -0,0 +1,124 @@
+"""Registry of background tasks and their owners.
+
+Every long-lived background task, such as a stream reader or a subscriber's
+delivery loop, is started through a ``TaskRegistry`` with a name and an
+owner: a WebSocket, a shared follower, a stream or the manager itself. The
+registry keeps a reference to each task until it finishes, so tasks cannot
+be garbage-collected mid-flight, cancels all tasks of an owner together when
+that owner goes away, and reports what is running for debugging.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TrackedTask:
+    """A registered task with its name, owner and throughput."""
+
+    def __init__(self, task: asyncio.Task[Any], name: str, owner: str) -> None:
+        self.task = task
+        self.name = name
+        self.owner = owner
+        self.started_at = time.monotonic()
+        self.bytes_handled = 0
+
+    def info(self) -> dict[str, Any]:
+        """Describe the task for the debug endpoint."""
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "age": round(time.monotonic() - self.started_at, 1),
+            "bytes": self.bytes_handled,
+            "cancelling": self.task.cancelling() > 0,
+        }
+
+
+class TaskRegistry:
+    """Keeps track of running background tasks by owner."""
+
+    def __init__(self) -> None:
+        self._tasks: dict[asyncio.Task[Any], TrackedTask] = {}
+        self.started = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def spawn(
+        self, coro: Coroutine[Any, Any, T], *, name: str, owner: str
+    ) -> asyncio.Task[T]:
+        """Start a task and track it until it finishes.
+
+        Args:
+            coro: Coroutine to run.
+            name: What the task does, e.g. "stream-output".
+            owner: Who the task belongs to, e.g. "websocket:7f3a"; see
+                cancel_owner.
+
+        Returns:
+            The started task.
+        """
+        task = asyncio.create_task(coro, name=f"{owner}/{name}")
+        self._tasks[task] = TrackedTask(task, name, owner)
+        self.started += 1
+        task.add_done_callback(self._finished)
+        return task
+
+    def record_bytes(self, count: int) -> None:
+        """Add to the bytes handled by the calling task, if it is tracked."""
+        task = asyncio.current_task()
+        tracked = self._tasks.get(task) if task is not None else None
+        if tracked is not None:
+            tracked.bytes_handled += count
+
+    def owned_by(self, owner: str) -> list[asyncio.Task[Any]]:
+        """Return the running tasks of an owner."""
+        return [task for task, tracked in self._tasks.items() if tracked.owner == owner]
+
+    def count_named(self, name: str) -> int:
+        """Count the running tasks called ``name``."""
+        return sum(1 for tracked in self._tasks.values() if tracked.name == name)
+
+    def cancel_owner(self, owner: str) -> int:
+        """Cancel every task of an owner; returns how many were cancelled."""
+        tasks = [task for task in self.owned_by(owner) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def cancel_all(self) -> None:
+        """Cancel every task and wait for them to finish."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the live tasks, oldest first, and counts per owner."""
+        tracked = sorted(self._tasks.values(), key=lambda t: t.started_at)
+        return {
+            "running": len(tracked),
+            "started": self.started,
+            "failed": self.failed,
+            "by_owner": dict(Counter(t.owner for t in tracked)),
+            "tasks": [t.info() for t in tracked],
+        }
+
+    def _finished(self, task: asyncio.Task[Any]) -> None:
+        """Forget a finished task, logging it if it failed."""
+        tracked = self._tasks.pop(task, None)
+        if task.cancelled() or task.exception() is None:
+            return
+        self.failed += 1
+        name = tracked.name if tracked else task.get_name()
+        logger.error("Background task %s failed", name, exc_info=task.exception())
@@ -5,20 +5,38 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager, suppress
+from contextlib import asynccontextmanager
+from functools import partial
 from typing import Any
 
-from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+import asyncssh
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
 from . import __version__
 from .config import Settings
+from .hub import FollowerHub, Publish
 from .logging_config import setup_logging
-from .server import SSHConnectionManager
+from .metrics import MetricsRegistry
+from .server import SSHConnectionManager, service_log_entry
+from .tasks import TaskRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +49,15 @@ class CommandRequest(BaseModel):
     timeout: int | None = 30
 
 
+class FanoutRequest(BaseModel):
+    """Request model for executing a command on many servers."""
+
+    servers: list[str] = []
+    groups: list[str] = []
+    command: str
+    timeout: int | None = 30
+
+
 class LogTailRequest(BaseModel):
     """Request model for log tailing."""
 
@@ -42,12 +69,68 @@ class LogTailRequest(BaseModel):
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        history_size: int = 100,
+        tasks: TaskRegistry | None = None,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
         self.active_connections: list[WebSocket] = []
-        self.log_tasks: dict[str, asyncio.Task[Any]] = {}
-        self.log_processes: dict[
-            str, Any
-        ] = {}  # Store SSH processes for proper cleanup
+        self.tasks = tasks if tasks is not None else TaskRegistry()
+        # One remote tail/journal follower per (server, kind, target), shared
+        # by every WebSocket watching it
+        self.hub = FollowerHub(history_size=history_size, tasks=self.tasks)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self._register_metrics()
+
+    def _register_metrics(self) -> None:
+        """Create WebSocket metrics and scrape-time gauges."""
+        self._send_seconds = self.metrics.histogram(
+            "websocket_send_seconds", "Time to send one message to a WebSocket."
+        )
+        self.metrics.gauge(
+            "websocket_connections",
+            "Connected WebSockets.",
+            lambda: [((), len(self.active_connections))],
+        )
+        self.metrics.gauge(
+            "log_followers",
+            "Shared remote log and journal followers by kind.",
+            lambda: [
+                ((kind,), sum(1 for f in self.hub.stats() if f["kind"] == kind))
+                for kind in ("log", "service")
+            ],
+            ("kind",),
+        )
+        self.metrics.gauge(
+            "websocket_send_queue_depth",
+            "Messages queued for WebSocket subscribers, in total and the deepest.",
+            self._queue_depth_samples,
+            ("stat",),
+        )
+
+    def _queue_depth_samples(self) -> list[tuple[tuple[str, ...], float]]:
+        depths = self.hub.queue_depths()
+        return [(("total",), sum(depths)), (("max",), max(depths, default=0))]
+
+    async def _send(self, websocket: WebSocket, message: str) -> None:
+        """Send a follower message to a WebSocket, timing the send.
+
+        Raises:
+            ConnectionError: If the client has disconnected, so the hub
+                drops the subscription.
+        """
+        start = time.perf_counter()
+        try:
+            await websocket.send_text(message)
+        except WebSocketDisconnect as e:
+            raise ConnectionError(f"WebSocket closed ({e.code})") from e
+        self._send_seconds.observe(time.perf_counter() - start)
+
+    @staticmethod
+    def owner(websocket: WebSocket) -> str:
+        """Return the task owner name of a WebSocket."""
+        return f"websocket:{id(websocket):x}"
 
     async def connect(self, websocket: WebSocket) -> None:
         """Accept a WebSocket connection."""
@@ -55,9 +138,11 @@ class ConnectionManager:
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket) -> None:
-        """Remove a WebSocket connection."""
+        """Remove a WebSocket connection and its log subscriptions."""
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        self.disconnect_all_monitoring(websocket)
+        self.tasks.cancel_owner(self.owner(websocket))
 
     async def send_personal_message(self, message: str, websocket: WebSocket) -> None:
         """Send a message to a specific WebSocket."""
@@ -84,54 +169,39 @@ class ConnectionManager:
     async def start_log_tail(
         self, server: str, file_path: str, websocket: WebSocket
     ) -> None:
-        """Start tailing a log file and send updates via WebSocket."""
-        task_key = f"{server}:log:{file_path}"
-
-        # Stop existing task if any
-        if task_key in self.log_tasks:
-            self.log_tasks[task_key].cancel()
-            del self.log_tasks[task_key]
-
-        # Stop existing process if any
-        if task_key in self.log_processes:
-            try:
-                process = self.log_processes[task_key]
-                if hasattr(process, "terminate"):
-                    process.terminate()
-                elif hasattr(process, "cancel"):
-                    process.cancel()
-            except (AttributeError, OSError, RuntimeError) as e:
-                logger.debug("Error stopping old log tail process: %s", e)
-            finally:
-                del self.log_processes[task_key]
+        """Subscribe a WebSocket to a log file's shared tail."""
+        ssh_manager = websocket.app.state.ssh_manager
+        key = (server, "log", file_path)
 
-        async def log_callback(line: str) -> None:
-            """Callback for log lines."""
-            try:
-                await self.send_personal_message(
+        async def start(publish: Publish) -> Any:
+            async def log_batch(lines: list[str], dropped: int) -> None:
+                await publish(
                     json.dumps(
                         {
-                            "type": "log_line",
+                            "type": "log_batch",
                             "server": server,
                             "file": file_path,
-                            "line": line.strip(),
+                            "lines": [line.strip() for line in lines],
+                            "dropped": dropped,
                         }
-                    ),
-                    websocket,
+                    )
                 )
-            except (ConnectionError, OSError, RuntimeError, TypeError) as e:
-                logger.error("Error sending log line: %s", e)
-                # Stop the tail if we can't send messages
-                self.stop_log_tail(server, file_path)
-
-        try:
-            ssh_manager = websocket.app.state.ssh_manager
-            process = await ssh_manager.tail_file(server, file_path, log_callback)
 
-            # Store both the process and the task for proper cleanup
-            self.log_processes[task_key] = process
-            self.log_tasks[task_key] = asyncio.create_task(process.wait())
+            return await ssh_manager.tail_file(
+                server,
+                file_path,
+                batch_callback=log_batch,
+                owner=FollowerHub.follower_owner(key),
+            )
 
+        try:
+            await self.hub.subscribe(
+                key,
+                websocket,
+                partial(self._send, websocket),
+                start,
+                self.owner(websocket),
+            )
         except (ConnectionError, OSError, ValueError, RuntimeError) as e:
             await self.send_personal_message(
                 json.dumps(
@@ -140,91 +210,53 @@ class ConnectionManager:
                 websocket,
             )
 
-    def stop_log_tail(self, server: str, file_path: str) -> None:
-        """Stop tailing a log file."""
-        task_key = f"{server}:log:{file_path}"
-
-        # Cancel the waiting task
-        if task_key in self.log_tasks:
-            self.log_tasks[task_key].cancel()
-            del self.log_tasks[task_key]
-
-        # Terminate the SSH process
-        if task_key in self.log_processes:
-            try:
-                process = self.log_processes[task_key]
-                if hasattr(process, "terminate"):
-                    process.terminate()
-                elif hasattr(process, "cancel"):
-                    process.cancel()
-            except (AttributeError, OSError, RuntimeError) as e:
-                logger.error("Error terminating log tail process: %s", e)
-            finally:
-                del self.log_processes[task_key]
+    def stop_log_tail(self, server: str, file_path: str, websocket: WebSocket) -> None:
+        """Unsubscribe a WebSocket from a log file's shared tail."""
+        self.hub.unsubscribe((server, "log", file_path), websocket)
 
     async def start_service_monitor(
         self, server: str, service_name: str, websocket: WebSocket
     ) -> None:
-        """Start monitoring service logs using journalctl.
-
-        Send updates via WebSocket.
-        """
-        task_key = f"{server}:service:{service_name}"
-
-        # Stop existing task if any
-        if task_key in self.log_tasks:
-            self.log_tasks[task_key].cancel()
-            del self.log_tasks[task_key]
-
-        # Stop existing process if any
-        if task_key in self.log_processes:
-            try:
-                process = self.log_processes[task_key]
-                if hasattr(process, "terminate"):
-                    process.terminate()
-                elif hasattr(process, "cancel"):
-                    process.cancel()
-            except (AttributeError, OSError, RuntimeError) as e:
-                logger.debug("Error stopping old service monitor process: %s", e)
-            finally:
-                del self.log_processes[task_key]
-
-        async def service_log_callback(log_json: str) -> None:
-            """Callback for service log updates."""
-            try:
-                log_data = json.loads(log_json)
-                await self.send_personal_message(
+        """Subscribe a WebSocket to a service's shared journal follower."""
+        ssh_manager = websocket.app.state.ssh_manager
+        key = (server, "service", service_name)
+
+        async def start(publish: Publish) -> Any:
+            async def service_log_batch(lines: list[str], dropped: int) -> None:
+                logs = [
+                    service_log_entry(service_name, line)
+                    for line in lines
+                    if line.strip()
+                ]
+                if not logs and not dropped:
+                    return
+                await publish(
                     json.dumps(
                         {
-                            "type": "service_log",
+                            "type": "service_log_batch",
                             "server": server,
                             "service": service_name,
-                            "log": log_data,
+                            "logs": logs,
+                            "dropped": dropped,
                         }
-                    ),
-                    websocket,
+                    )
                 )
-            except (
-                ConnectionError,
-                OSError,
-                RuntimeError,
-                TypeError,
-                json.JSONDecodeError,
-            ) as e:
-                logger.error("Error sending service log: %s", e)
-                # Stop the monitor if we can't send messages
-                self.stop_service_monitor(server, service_name)
 
-        try:
-            ssh_manager = websocket.app.state.ssh_manager
-            process = await ssh_manager.monitor_service_logs(
-                server, service_name, service_log_callback
+            return await ssh_manager.monitor_service_logs(
+                server,
+                service_name,
+                batch_callback=service_log_batch,
+                owner=FollowerHub.follower_owner(key),
             )
 
-            # Store both the process and the task for proper cleanup
-            self.log_processes[task_key] = process
-            self.log_tasks[task_key] = asyncio.create_task(process.wait())
-
+        try:
+            await self.hub.subscribe(
+                key,
+                websocket,
+                partial(self._send, websocket),
+                start,
+                self.owner(websocket),
+            )
         except (ConnectionError, OSError, ValueError, RuntimeError) as e:
             await self.send_personal_message(
                 json.dumps(
@@ -236,78 +268,15 @@ class ConnectionManager:
                 websocket,
             )
 
-    def stop_service_monitor(self, server: str, service_name: str) -> None:
-        """Stop monitoring a service."""
-        task_key = f"{server}:service:{service_name}"
-
-        # Cancel the waiting task
-        if task_key in self.log_tasks:
-            self.log_tasks[task_key].cancel()
-            del self.log_tasks[task_key]
-
-        # Terminate the process
-        if task_key in self.log_processes:
-            try:
-                process = self.log_processes[task_key]
-                if hasattr(process, "terminate"):
-                    process.terminate()
-                elif hasattr(process, "cancel"):
-                    process.cancel()
-            except (AttributeError, OSError, RuntimeError) as e:
-                logger.error("Error terminating service monitor process: %s", e)
-            finally:
-                del self.log_processes[task_key]
-
-    def disconnect_all_monitoring(self, _websocket: WebSocket) -> None:
-        """Disconnect all monitoring tasks for a websocket."""
-        try:
-            tasks_to_remove = []
-            processes_to_remove = []
-
-            # Ensure attributes exist (defensive programming)
-            if not hasattr(self, "log_tasks"):
-                self.log_tasks = {}
-            if not hasattr(self, "log_processes"):
-                self.log_processes = {}
-
-            # Find all tasks/processes associated with this websocket
-            # Since we don't store websocket mapping, we'll clean up all for safety
-            for task_key in list(self.log_tasks.keys()):
-                tasks_to_remove.append(task_key)
-
-            for process_key in list(self.log_processes.keys()):
-                processes_to_remove.append(process_key)
-
-            # Clean up tasks
-            for task_key in tasks_to_remove:
-                if task_key in self.log_tasks:
-                    try:
-                        self.log_tasks[task_key].cancel()
-                        del self.log_tasks[task_key]
-                    except (AttributeError, KeyError, RuntimeError) as e:
-                        logger.warning("Error canceling task %s: %s", task_key, e)
-
-            # Clean up processes
-            for process_key in processes_to_remove:
-                if process_key in self.log_processes:
-                    try:
-                        process = self.log_processes[process_key]
-                        if hasattr(process, "terminate"):
-                            process.terminate()
-                        elif hasattr(process, "cancel"):
-                            process.cancel()
-                    except (AttributeError, OSError, RuntimeError) as e:
-                        logger.warning(
-                            "Error terminating monitoring process %s: %s",
-                            process_key,
-                            e,
-                        )
-                    finally:
-                        with suppress(KeyError):
-                            del self.log_processes[process_key]
+    def stop_service_monitor(
+        self, server: str, service_name: str, websocket: WebSocket
+    ) -> None:
+        """Unsubscribe a WebSocket from a service's shared journal follower."""
+        self.hub.unsubscribe((server, "service", service_name), websocket)
 
-        except (AttributeError, KeyError, RuntimeError) as e:
-            logger.error("Error during disconnect_all_monitoring: %s", e, exc_info=True)
+    def disconnect_all_monitoring(self, websocket: WebSocket) -> None:
+        """Drop every log and service subscription held by a WebSocket."""
+        self.hub.unsubscribe_all(websocket)
 
 
 def create_app() -> FastAPI:
@@ -325,9 +294,22 @@ def create_app() -> FastAPI:
         """Application lifespan context."""
         # Startup
         logger.info("SSH Remote Control Dashboard starting up...")
+        ssh_manager = fastapi_app.state.ssh_manager
+        if warmup_targets := settings.warmup_targets():
+            # Connect in the background so requests are served immediately
+            ssh_manager.tasks.spawn(
+                ssh_manager.warm_up(warmup_targets), name="warm-up", owner="app"
+            )
+        if settings.config_reload_interval > 0:
+            ssh_manager.tasks.spawn(
+                ssh_manager.watch_config(settings.config_reload_interval),
+                name="config-watch",
+                owner="app",
+            )
         yield
         # Shutdown
         logger.info("SSH Remote Control Dashboard shutting down...")
+        fastapi_app.state.connection_manager.hub.close()
         await fastapi_app.state.ssh_manager.close_all()
 
     app = FastAPI(
@@ -340,7 +322,10 @@ def create_app() -> FastAPI:
 
     # Initialize managers
     ssh_manager = SSHConnectionManager(settings)
-    connection_manager = ConnectionManager()
+    # WebSocket and follower tasks and metrics share the manager's registries
+    connection_manager = ConnectionManager(
+        tasks=ssh_manager.tasks, metrics=ssh_manager.metrics
+    )
 
     # Store in app state
     app.state.settings = settings
@@ -364,6 +349,7 @@ def create_app() -> FastAPI:
     @app.get("/api/servers", response_class=JSONResponse)
     async def get_servers(request: Request) -> JSONResponse:
         """Get list of configured servers."""
+        ssh_manager = request.app.state.ssh_manager
         servers: list[dict[str, Any]] = []
         for name in settings.list_servers():
             config = settings.get_server_config(name)
@@ -374,17 +360,73 @@ def create_app() -> FastAPI:
                         "host": config.host,
                         "port": config.port,
                         "username": config.username,
-                        "connected": await request.app.state.ssh_manager.is_connected(
-                            name
-                        ),
+                        "jump_host": config.jump_host,
+                        "connected": await ssh_manager.is_connected(name),
+                        "circuit": ssh_manager.circuit_stats(name),
                     }
                 )
         return JSONResponse({"servers": servers})
 
+    @app.get("/api/connections", response_class=JSONResponse)
+    async def get_connection_stats(request: Request) -> JSONResponse:
+        """Get open SSH connection counts, pool usage and eviction counters."""
+        return JSONResponse(request.app.state.ssh_manager.connection_stats())
+
+    @app.get("/api/cache", response_class=JSONResponse)
+    async def get_cache_stats(request: Request) -> JSONResponse:
+        """Get probe result cache size and hit/miss counters."""
+        return JSONResponse(request.app.state.ssh_manager.cache.stats())
+
+    @app.delete("/api/cache", response_class=JSONResponse)
+    async def clear_cache(request: Request, server: str | None = None) -> JSONResponse:
+        """Drop cached probe results, for one server or all of them."""
+        dropped = request.app.state.ssh_manager.invalidate_cache(server)
+        return JSONResponse({"dropped": dropped})
+
+    @app.get("/api/warmup", response_class=JSONResponse)
+    async def get_warmup(request: Request) -> JSONResponse:
+        """Get the progress of the startup connection warm-up."""
+        return JSONResponse(request.app.state.ssh_manager.warmup_stats())
+
+    @app.post("/api/config/reload", response_class=JSONResponse)
+    async def reload_config(request: Request) -> JSONResponse:
+        """Reload the config file now and apply the server changes."""
+        try:
+            changes = await request.app.state.ssh_manager.reload_config(force=True)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return JSONResponse(
+                {"success": False, "message": f"Could not reload config: {e}"},
+                status_code=400,
+            )
+        return JSONResponse({"success": True, **changes})
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics(request: Request) -> PlainTextResponse:
+        """Expose metrics in the Prometheus text format."""
+        return PlainTextResponse(
+            request.app.state.ssh_manager.metrics.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+    @app.get("/api/debug/tasks", response_class=JSONResponse)
+    async def get_tasks(request: Request) -> JSONResponse:
+        """List live background tasks with their age, owner and bytes handled."""
+        stats = request.app.state.ssh_manager.tasks.stats()
+        # Tasks not started through the registry, e.g. request handlers
+        stats["asyncio_tasks"] = len(asyncio.all_tasks())
+        return JSONResponse(stats)
+
+    @app.get("/api/followers", response_class=JSONResponse)
+    async def get_followers(request: Request) -> JSONResponse:
+        """Get the shared log followers and their subscriber counts."""
+        return JSONResponse(
+            {"followers": request.app.state.connection_manager.hub.stats()}
+        )
+
     @app.get("/api/servers/{server_name}/info", response_class=JSONResponse)
     async def get_server_info(server_name: str, request: Request) -> JSONResponse:
         """Get system information for a server."""
-        if server_name not in settings.list_servers():
+        if not settings.has_server(server_name):
             raise HTTPException(status_code=404, detail="Server not found")
 
         try:
@@ -396,7 +438,7 @@ def create_app() -> FastAPI:
     @app.post("/api/servers/{server_name}/connect", response_class=JSONResponse)
     async def connect_server(server_name: str, request: Request) -> JSONResponse:
         """Connect to a server."""
-        if server_name not in settings.list_servers():
+        if not settings.has_server(server_name):
             return JSONResponse(
                 {
                     "success": False,
@@ -426,7 +468,7 @@ def create_app() -> FastAPI:
     @app.post("/api/servers/{server_name}/disconnect", response_class=JSONResponse)
     async def disconnect_server(server_name: str, request: Request) -> JSONResponse:
         """Disconnect from a server."""
-        if server_name not in settings.list_servers():
+        if not settings.has_server(server_name):
             return JSONResponse(
                 {
                     "success": False,
@@ -457,29 +499,159 @@ def create_app() -> FastAPI:
         command_request: CommandRequest, request: Request
     ) -> JSONResponse:
         """Execute a command on a remote server."""
-        if command_request.server not in settings.list_servers():
+        if not settings.has_server(command_request.server):
             raise HTTPException(status_code=404, detail="Server not found")
 
+        ssh_manager = request.app.state.ssh_manager
         try:
-            output = await request.app.state.ssh_manager.execute_command(
+            result = await ssh_manager.execute_command_capture(
                 command_request.server,
                 command_request.command,
                 timeout=command_request.timeout,
             )
             return JSONResponse(
                 {
-                    "output": output,
+                    "output": result["output"],
                     "server": command_request.server,
                     "command": command_request.command,
+                    "total_bytes": result["total_bytes"],
+                    "truncated": result["truncated"],
+                    "spill_id": result["spill_id"],
                 }
             )
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e)) from e
+        finally:
+            # The command may have changed what cached probes report
+            ssh_manager.invalidate_cache(command_request.server)
+
+    @app.post("/api/execute/raw")
+    async def execute_command_raw(
+        command_request: CommandRequest, request: Request
+    ) -> StreamingResponse:
+        """Execute a command, streaming its stdout as raw bytes.
+
+        Suited to binary output such as ``tar czf - dir``. A command that
+        fails after its output has started ends the response early.
+        """
+        if not settings.has_server(command_request.server):
+            raise HTTPException(status_code=404, detail="Server not found")
+
+        ssh_manager = request.app.state.ssh_manager
+        chunks = ssh_manager.stream_command_bytes(
+            command_request.server,
+            command_request.command,
+            timeout=command_request.timeout,
+        )
+        # Read the first chunk up front so early failures map to a status code
+        try:
+            first = await anext(chunks, b"")
+        except Exception as e:
+            ssh_manager.invalidate_cache(command_request.server)
+            raise HTTPException(status_code=500, detail=str(e)) from e
+
+        async def stream_chunks() -> AsyncGenerator[bytes]:
+            try:
+                if first:
+                    yield first
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+                ssh_manager.invalidate_cache(command_request.server)
+
+        return StreamingResponse(stream_chunks(), media_type="application/octet-stream")
+
+    @app.get("/api/outputs/{spill_id}")
+    async def get_output(
+        spill_id: str,
+        request: Request,
+        offset: int = Query(0, ge=0),
+        length: int | None = Query(None, ge=0),
+    ) -> StreamingResponse:
+        """Read back command output that was spilled to disk.
+
+        Returns ``length`` bytes from ``offset`` if given, and otherwise
+        streams the rest of the output.
+        """
+        spills = request.app.state.ssh_manager.spills
+        try:
+            total = spills.get(spill_id).size
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail="Output not found") from e
+
+        async def stream_page() -> AsyncGenerator[bytes]:
+            yield await asyncio.to_thread(spills.read, spill_id, offset, length)
+
+        chunks = (
+            stream_page() if length is not None else spills.stream(spill_id, offset)
+        )
+        return StreamingResponse(
+            chunks,
+            media_type="text/plain; charset=utf-8",
+            headers={"X-Total-Bytes": str(total)},
+        )
+
+    @app.delete("/api/outputs/{spill_id}", response_class=JSONResponse)
+    async def delete_output(spill_id: str, request: Request) -> JSONResponse:
+        """Delete spilled command output before it expires."""
+        if not request.app.state.ssh_manager.spills.remove(spill_id):
+            raise HTTPException(status_code=404, detail="Output not found")
+        return JSONResponse({"success": True})
+
+    @app.post("/api/execute/fanout")
+    async def execute_fanout(
+        fanout_request: FanoutRequest, request: Request
+    ) -> StreamingResponse:
+        """Execute a command on many servers, streaming results as they finish.
+
+        The response is newline-delimited JSON: one ``result`` object per
+        server in completion order, followed by a ``summary`` object.
+        """
+        try:
+            server_names = settings.expand_servers(
+                fanout_request.servers, fanout_request.groups
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        if not server_names:
+            raise HTTPException(status_code=400, detail="No servers selected")
+
+        ssh_manager = request.app.state.ssh_manager
+
+        async def stream_results() -> AsyncGenerator[str]:
+            succeeded = failed = 0
+            results = ssh_manager.execute_fanout(
+                server_names, fanout_request.command, timeout=fanout_request.timeout
+            )
+            try:
+                async for result in results:
+                    if result["success"]:
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    yield json.dumps({"type": "result", **result}) + "\n"
+            finally:
+                await results.aclose()
+            yield (
+                json.dumps(
+                    {
+                        "type": "summary",
+                        "command": fanout_request.command,
+                        "total": len(server_names),
+                        "succeeded": succeeded,
+                        "failed": failed,
+                    }
+                )
+                + "\n"
+            )
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
     @app.get("/api/servers/{server_name}/services", response_class=JSONResponse)
     async def get_services(server_name: str, request: Request) -> JSONResponse:
         """Get list of running services for a server."""
-        if server_name not in settings.list_servers():
+        if not settings.has_server(server_name):
             raise HTTPException(status_code=404, detail="Server not found")
 
         try:
@@ -490,10 +662,72 @@ def create_app() -> FastAPI:
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e)) from e
 
+    @app.get("/api/servers/{server_name}/file")
+    async def stream_file(
+        server_name: str,
+        request: Request,
+        path: str,
+        *,
+        offset: int = Query(0, ge=0),
+        length: int | None = Query(None, ge=0),
+        tail: int | None = Query(None, ge=0, description="Read only the last N bytes"),
+    ) -> StreamingResponse:
+        """Stream a byte range of a remote file without buffering it."""
+        if not settings.has_server(server_name):
+            raise HTTPException(status_code=404, detail="Server not found")
+
+        chunks = request.app.state.ssh_manager.stream_file(
+            server_name, path, offset=offset, length=length, tail_bytes=tail
+        )
+        # Read the first chunk up front so open errors map to a status code
+        try:
+            first = await anext(chunks, b"")
+        except asyncssh.SFTPNoSuchFile as e:
+            raise HTTPException(status_code=404, detail="File not found") from e
+        except asyncssh.SFTPPermissionDenied as e:
+            raise HTTPException(status_code=403, detail="Permission denied") from e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e)) from e
+
+        async def stream_chunks() -> AsyncGenerator[bytes]:
+            try:
+                if first:
+                    yield first
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+
+        return StreamingResponse(stream_chunks(), media_type="application/octet-stream")
+
+    @app.put("/api/servers/{server_name}/file", response_class=JSONResponse)
+    async def upload_file(
+        server_name: str,
+        request: Request,
+        path: str,
+        resume: bool = False,
+        verify: bool = True,
+    ) -> JSONResponse:
+        """Upload the request body to a remote file as it arrives."""
+        if not settings.has_server(server_name):
+            raise HTTPException(status_code=404, detail="Server not found")
+
+        try:
+            result = await request.app.state.ssh_manager.upload_file(
+                server_name, path, request.stream(), resume=resume, verify=verify
+            )
+            return JSONResponse(result)
+        except asyncssh.SFTPNoSuchFile as e:
+            raise HTTPException(status_code=404, detail="Directory not found") from e
+        except asyncssh.SFTPPermissionDenied as e:
+            raise HTTPException(status_code=403, detail="Permission denied") from e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e)) from e
+
     @app.get("/server/{server_name}", response_class=HTMLResponse)
     async def server_detail(request: Request, server_name: str) -> HTMLResponse:
         """Server detail page."""
-        if server_name not in settings.list_servers():
+        if not settings.has_server(server_name):
             raise HTTPException(status_code=404, detail="Server not found")
 
         config = settings.get_server_config(server_name)
@@ -545,7 +779,7 @@ def create_app() -> FastAPI:
                 elif message["type"] == "stop_log_tail":
                     try:
                         connection_manager.stop_log_tail(
-                            server_name, message["file_path"]
+                            server_name, message["file_path"], websocket
                         )
                         # Send confirmation message
                         await connection_manager.send_personal_message(
@@ -597,7 +831,7 @@ def create_app() -> FastAPI:
                 elif message["type"] == "stop_service_log_monitor":
                     try:
                         connection_manager.stop_service_monitor(
-                            server_name, message["service_name"]
+                            server_name, message["service_name"], websocket
                         )
                         # Send confirmation message
                         await connection_manager.send_personal_message(
@@ -622,8 +856,9 @@ def create_app() -> FastAPI:
                             websocket,
                         )
                 elif message["type"] == "execute_command":
+                    ssh_manager = websocket.app.state.ssh_manager
                     try:
-                        output = await websocket.app.state.ssh_manager.execute_command(
+                        result = await ssh_manager.execute_command_capture(
                             server_name, message["command"]
                         )
                         await connection_manager.send_personal_message(
@@ -631,7 +866,10 @@ def create_app() -> FastAPI:
                                 {
                                     "type": "command_output",
                                     "command": message["command"],
-                                    "output": output,
+                                    "output": result["output"],
+                                    "total_bytes": result["total_bytes"],
+                                    "truncated": result["truncated"],
+                                    "spill_id": result["spill_id"],
                                 }
                             ),
                             websocket,
@@ -640,6 +878,8 @@ def create_app() -> FastAPI:
                         await connection_manager.send_personal_message(
                             json.dumps({"type": "error", "message": str(e)}), websocket
                         )
+                    finally:
+                        ssh_manager.invalidate_cache(server_name)
 
         except WebSocketDisconnect:
             connection_manager.disconnect(websocket)
@@ -0,0 +1,56 @@
+"""Test the per-host circuit breaker."""
+
+from __future__ import annotations
+
+import pytest
+
+from ssh_remote_control.breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_opens_at_threshold() -> None:
+    """Test that the circuit opens only after threshold failures."""
+    breaker = CircuitBreaker(threshold=2, base_delay=60)
+    breaker.record_failure(OSError("Connection refused"))
+    assert breaker.state == "closed"
+    breaker.check("web-1")
+
+    breaker.record_failure(OSError("Connection refused"))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError, match="Circuit open for web-1"):
+        breaker.check("web-1")
+
+    stats = breaker.stats()
+    assert stats["state"] == "open"
+    assert stats["failures"] == 2
+    assert 30 <= stats["retry_in"] <= 60
+    assert stats["last_error"] == "Connection refused"
+
+
+def test_half_open_after_delay() -> None:
+    """Test that the circuit lets a probe through once the delay has passed."""
+    breaker = CircuitBreaker(base_delay=60)
+    breaker.record_failure(TimeoutError())
+    assert breaker.last_error == "TimeoutError"
+
+    breaker.retry_at = 0
+    assert breaker.state == "half_open"
+    breaker.check("web-1")
+
+
+def test_backoff_grows_with_jitter_up_to_max(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test exponential backoff, jitter bounds and the delay cap."""
+    monkeypatch.setattr("ssh_remote_control.breaker.time.monotonic", lambda: 0.0)
+    monkeypatch.setattr("ssh_remote_control.breaker.random.random", lambda: 1.0)
+    breaker = CircuitBreaker(base_delay=5, max_delay=30)
+
+    delays = []
+    for _ in range(5):
+        breaker.record_failure(OSError())
+        delays.append(breaker.retry_at)
+    assert delays == [5, 10, 20, 30, 30]
+
+    monkeypatch.setattr("ssh_remote_control.breaker.random.random", lambda: 0.0)
+    breaker.record_failure(OSError())
+    assert breaker.retry_at == 15
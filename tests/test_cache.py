@@ -0,0 +1,131 @@
+"""Test the probe result cache."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from ssh_remote_control.cache import ResultCache
+
+
+class Loader:
+    """Counts loads and lets tests control when they finish."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self) -> dict[str, Any]:
+        self.calls += 1
+        await self.release.wait()
+        return {"calls": self.calls}
+
+
+@pytest.mark.asyncio
+async def test_caches_until_ttl_expires() -> None:
+    """Test that results are reused within the TTL and reloaded after it."""
+    cache = ResultCache()
+    load = Loader()
+
+    assert await cache.get(("info", "web-1"), 60, load) == {"calls": 1}
+    assert await cache.get(("info", "web-1"), 60, load) == {"calls": 1}
+    assert await cache.get(("info", "web-2"), 60, load) == {"calls": 2}
+
+    cache._entries[("info", "web-1")] = (0.0, {"calls": 1})
+    assert await cache.get(("info", "web-1"), 60, load) == {"calls": 3}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_returns_copies() -> None:
+    """Test that callers cannot modify the cached result."""
+    cache = ResultCache()
+    result = await cache.get(("info", "web-1"), 60, Loader())
+    result["calls"] = 99
+
+    assert await cache.get(("info", "web-1"), 60, Loader()) == {"calls": 1}
+
+
+@pytest.mark.asyncio
+async def test_single_flight() -> None:
+    """Test that concurrent requests for one key share a single load."""
+    cache = ResultCache()
+    load = Loader()
+    load.release.clear()
+
+    waiters = [
+        asyncio.create_task(cache.get(("info", "web-1"), 0, load)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    load.release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert load.calls == 1
+    assert results == [{"calls": 1}] * 5
+    assert cache.stats()["coalesced"] == 4
+    # A TTL of 0 coalesces but does not keep the result
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached() -> None:
+    """Test that every waiter sees a failed load and the next call retries."""
+    cache = ResultCache()
+    attempts = 0
+
+    async def flaky() -> str:
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0)
+        if attempts == 1:
+            raise ConnectionError("down")
+        return "up"
+
+    results = await asyncio.gather(
+        cache.get(("info", "web-1"), 60, flaky),
+        cache.get(("info", "web-1"), 60, flaky),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert await cache.get(("info", "web-1"), 60, flaky) == "up"
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction() -> None:
+    """Test that the least recently used entry is evicted when full."""
+    cache = ResultCache(max_entries=2)
+    load = Loader()
+    await cache.get(("info", "a"), 60, load)
+    await cache.get(("info", "b"), 60, load)
+    await cache.get(("info", "a"), 60, load)
+    await cache.get(("info", "c"), 60, load)
+
+    assert list(cache._entries) == [("info", "a"), ("info", "c")]
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate() -> None:
+    """Test invalidation by server and operation, including in-flight loads."""
+    cache = ResultCache()
+    load = Loader()
+    await cache.get(("info", "web-1"), 60, load)
+    await cache.get(("services", "web-1", True), 60, load)
+    await cache.get(("info", "web-2"), 60, load)
+
+    assert cache.invalidate("web-1", "info") == 1
+    assert cache.invalidate("web-1") == 1
+    assert list(cache._entries) == [("info", "web-2")]
+
+    # A load that started before the invalidation is not cached
+    load.release.clear()
+    pending = asyncio.create_task(cache.get(("info", "web-1"), 60, load))
+    await asyncio.sleep(0)
+    cache.invalidate("web-1")
+    load.release.set()
+    await pending
+    assert ("info", "web-1") not in cache._entries
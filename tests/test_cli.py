@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 import tempfile
-from collections.abc import Generator
+from collections.abc import AsyncIterator, Generator
 from pathlib import Path
 from typing import Any
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import typer
@@ -146,6 +146,68 @@ def test_execute_command_invalid_server(runner: CliRunner) -> None:
             mock_asyncio_run.assert_called_once()
 
 
+def test_fanout_command(runner: CliRunner, mock_settings: MagicMock) -> None:
+    """Test fanout command prints each server's result."""
+    mock_settings.expand_servers.return_value = ["test-server"]
+
+    async def fake_fanout(*_args: Any, **_kwargs: Any) -> AsyncIterator[dict[str, Any]]:
+        yield {
+            "server": "test-server",
+            "success": True,
+            "output": "up 3 days\n",
+            "error": None,
+            "duration": 0.25,
+        }
+
+    with patch("ssh_remote_control.cli.SSHConnectionManager") as mock_manager_class:
+        mock_manager = MagicMock()
+        mock_manager.execute_fanout = fake_fanout
+        mock_manager.close_all = AsyncMock()
+        mock_manager_class.return_value = mock_manager
+
+        result: typer.testing.Result = runner.invoke(
+            app, ["fanout", "uptime", "--group", "all"]
+        )
+
+    assert result.exit_code == 0
+    assert "up 3 days" in result.output
+    assert "1 succeeded, 0 failed" in result.output
+    mock_settings.expand_servers.assert_called_once_with([], ["all"])
+
+
+def test_upload_command(runner: CliRunner, mock_settings: MagicMock) -> None:
+    """Test upload command passes the local file to the manager."""
+    with (
+        tempfile.TemporaryDirectory() as temp_dir,
+        patch("ssh_remote_control.cli.SSHConnectionManager") as mock_manager_class,
+    ):
+        local_path = Path(temp_dir) / "artifact.bin"
+        local_path.write_bytes(b"payload")
+        mock_manager = MagicMock()
+        mock_manager.upload_file = AsyncMock(
+            return_value={
+                "path": "/tmp/artifact.bin",
+                "size": 7,
+                "resumed_from": 0,
+                "sha256": "abc123",
+                "verified": True,
+            }
+        )
+        mock_manager.close_all = AsyncMock()
+        mock_manager_class.return_value = mock_manager
+
+        result: typer.testing.Result = runner.invoke(
+            app, ["upload", "test-server", str(local_path), "/tmp/artifact.bin"]
+        )
+
+    assert result.exit_code == 0
+    assert "Uploaded 7 bytes" in result.output
+    args, kwargs = mock_manager.upload_file.call_args
+    assert args == ("test-server", "/tmp/artifact.bin", local_path)
+    assert kwargs["resume"] is False
+    assert kwargs["verify"] is True
+
+
 def test_init_config_command(runner: CliRunner) -> None:
     """Test init-config command."""
     with tempfile.TemporaryDirectory() as temp_dir:
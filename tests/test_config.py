@@ -10,6 +10,7 @@ from unittest.mock import patch
 
 import pytest
 import yaml
+from pydantic import ValidationError
 
 from ssh_remote_control.config import ServerConfig, Settings
 
@@ -171,6 +172,53 @@ def test_validate_server_config(settings_with_config: Settings) -> None:
     assert settings.validate_server_config("non-existent") is False
 
 
+def test_expand_servers(settings_with_config: Settings) -> None:
+    """Test resolving servers and groups for fan-out."""
+    settings = settings_with_config
+    settings.ssh_servers["other-server"] = {"host": "other", "username": "u"}
+    settings.server_groups = {"web": ["other-server", "test-server"]}
+
+    assert settings.expand_servers(["test-server"], ["web"]) == [
+        "test-server",
+        "other-server",
+    ]
+    assert settings.expand_servers(groups=["all"]) == ["test-server", "other-server"]
+
+    with pytest.raises(ValueError, match="non-existent, group:db"):
+        settings.expand_servers(["non-existent"], ["db"])
+
+
+def test_jump_chain(settings_with_config: Settings) -> None:
+    """Test resolving jump hosts and rejecting loops and unknown hosts."""
+    settings = settings_with_config
+    settings.ssh_servers["bastion"] = {"host": "bastion", "username": "u"}
+    settings.ssh_servers["test-server"]["jump_host"] = "bastion"
+
+    assert settings.jump_chain("test-server") == ["bastion"]
+    assert settings.jump_chain("bastion") == []
+
+    settings.ssh_servers["bastion"]["jump_host"] = "test-server"
+    with pytest.raises(ValueError, match="test-server -> bastion -> test-server"):
+        settings.jump_chain("test-server")
+
+    settings.ssh_servers["bastion"]["jump_host"] = "missing"
+    with pytest.raises(ValueError, match="missing for test-server is not configured"):
+        settings.jump_chain("test-server")
+
+
+def test_warmup_targets(settings_with_config: Settings) -> None:
+    """Test resolving warm-up servers, groups and the "*" wildcard."""
+    settings = settings_with_config
+    settings.ssh_servers["other-server"] = {"host": "other", "username": "u"}
+    settings.server_groups = {"web": ["other-server"]}
+
+    settings.warmup_servers = ["web", "test-server", "other-server", "missing"]
+    assert settings.warmup_targets() == ["other-server", "test-server", "missing"]
+
+    settings.warmup_servers = ["*"]
+    assert settings.warmup_targets() == ["test-server", "other-server"]
+
+
 def test_config_file_precedence() -> None:
     """Test that config file takes precedence over defaults."""
     config_data = {"debug": True, "log_level": "error"}
@@ -208,3 +256,93 @@ def test_invalid_config_file() -> None:
         os.unlink(temp_file)
         if "SSH_REMOTE_CONTROL_CONFIG" in os.environ:
             del os.environ["SSH_REMOTE_CONTROL_CONFIG"]
+
+
+def test_server_configs_are_cached(settings_with_config: Settings) -> None:
+    """Test that servers are validated once and re-validated only on change."""
+    settings = settings_with_config
+    config = settings.get_server_config("test-server")
+    assert config is not None
+    assert settings.get_server_config("test-server") is config
+    assert settings.servers["test-server"] is config
+
+    settings.ssh_servers["test-server"]["port"] = 2222
+    changed = settings.get_server_config("test-server")
+    assert changed is not None and changed is not config
+    assert changed.port == 2222
+
+    with pytest.raises(ValidationError):
+        changed.port = 22  # type: ignore[misc]
+    with pytest.raises(TypeError):
+        settings.servers["other"] = changed  # type: ignore[index]
+
+
+def test_refresh_servers(settings_with_config: Settings) -> None:
+    """Test re-indexing only the servers that were added, changed or removed."""
+    settings = settings_with_config
+    settings.ssh_servers["other-server"] = {"host": "other", "username": "u"}
+    settings.ssh_servers["broken"] = {"host": "broken"}
+    assert settings.refresh_servers() == ["other-server", "broken"]
+    assert settings.list_servers() == ("test-server", "other-server", "broken")
+    assert settings.has_server("broken")
+    assert settings.get_server_config("broken") is None
+    assert "broken" not in settings.servers
+
+    unchanged = settings.get_server_config("test-server")
+    del settings.ssh_servers["other-server"]
+    settings.ssh_servers["broken"]["username"] = "u"
+    assert settings.refresh_servers() == ["broken", "other-server"]
+    assert settings.get_server_config("test-server") is unchanged
+    assert settings.list_servers() == ("test-server", "broken")
+
+    settings.ssh_servers = {"new": {"host": "new", "username": "u"}}
+    assert settings.list_servers() == ("new",)
+    assert not settings.has_server("test-server")
+
+
+def test_reload_config(settings_with_config: Settings, temp_config_file: str) -> None:
+    """Test reloading the config file and diffing its servers."""
+    settings = settings_with_config
+    assert not settings.config_changed()
+    unchanged = settings.get_server_config("test-server")
+
+    config_data: dict[str, Any] = {
+        "log_level": "warning",
+        "ssh_servers": {
+            "test-server": {
+                "host": "localhost",
+                "port": 22,
+                "username": "testuser",
+                "key_file": "/tmp/test_key",
+            },
+            "new-server": {"host": "new", "username": "u"},
+        },
+    }
+    with open(temp_config_file, "w", encoding="utf-8") as f:
+        yaml.dump(config_data, f)
+    assert settings.config_changed()
+
+    changes = settings.reload()
+    assert changes == {"added": ["new-server"], "removed": [], "changed": []}
+    assert not settings.config_changed()
+    assert settings.log_level == "warning"
+    assert settings.get_server_config("test-server") is unchanged
+
+    config_data["ssh_servers"] = {"test-server": {"host": "moved", "username": "u"}}
+    with open(temp_config_file, "w", encoding="utf-8") as f:
+        yaml.dump(config_data, f)
+    changes = settings.reload()
+    assert changes == {
+        "added": [],
+        "removed": ["new-server"],
+        "changed": ["test-server"],
+    }
+    config = settings.get_server_config("test-server")
+    assert config is not None and config.host == "moved"
+
+    with open(temp_config_file, "w", encoding="utf-8") as f:
+        f.write("")
+    with pytest.raises(ValueError, match="empty or not a mapping"):
+        settings.reload()
+    assert settings.list_servers() == ("test-server",)
+    assert not settings.config_changed()
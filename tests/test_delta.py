@@ -0,0 +1,100 @@
+"""Test block-checksum delta transfer."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from ssh_remote_control.delta import (
+    REBUILD_SCRIPT,
+    SIGNATURE_SCRIPT,
+    compute_delta,
+    delta_stats,
+    encode_delta,
+    parse_signature,
+    weak_checksum,
+)
+
+
+def run_script(script: str, *args: str, stdin: bytes = b"") -> bytes:
+    """Run one of the remote scripts with the local interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        input=stdin,
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def sync_locally(path: Path, content: bytes, block_size: int = 0) -> dict[str, int]:
+    """Apply content to path through the signature and rebuild scripts."""
+    signature = run_script(SIGNATURE_SCRIPT, str(path), str(block_size)).decode()
+    remote_size, block_size, lookup = parse_signature(signature)
+    ops = compute_delta(content, remote_size, block_size, lookup)
+    payload = encode_delta(ops, hashlib.sha256(content).hexdigest())
+    run_script(REBUILD_SCRIPT, str(path), str(block_size), stdin=payload)
+    return delta_stats(ops, len(content))
+
+
+def test_weak_checksum_matches_signature_script(tmp_path: Path) -> None:
+    """Test the local weak checksum agrees with the remote script."""
+    path = tmp_path / "file"
+    path.write_bytes(b"abcdefgh" * 3)
+
+    signature = run_script(SIGNATURE_SCRIPT, str(path), "8").decode()
+    _, _, lookup = parse_signature(signature)
+
+    assert list(lookup) == [weak_checksum(b"abcdefgh")]
+
+
+def test_delta_sends_only_changed_blocks(tmp_path: Path) -> None:
+    """Test an edit in the middle of a file is sent as a small literal."""
+    path = tmp_path / "big.conf"
+    original = os.urandom(200_000)
+    path.write_bytes(original)
+    updated = b"prefix" + original[:100_000] + b"edited" + original[100_050:]
+
+    stats = sync_locally(path, updated)
+
+    assert path.read_bytes() == updated
+    assert stats["literal_bytes"] < 2_000
+    assert stats["copied_bytes"] == len(updated) - stats["literal_bytes"]
+    assert [p.name for p in tmp_path.iterdir()] == ["big.conf"]
+
+
+def test_delta_unchanged_file_is_one_copy(tmp_path: Path) -> None:
+    """Test an unchanged file, including a short final block, is all copies."""
+    path = tmp_path / "same"
+    content = os.urandom(10_000)
+    path.write_bytes(content)
+
+    signature = run_script(SIGNATURE_SCRIPT, str(path), "4096").decode()
+    remote_size, block_size, lookup = parse_signature(signature)
+
+    assert compute_delta(content, remote_size, block_size, lookup) == [(0, 3)]
+
+
+def test_delta_shrinks_and_preserves_mode(tmp_path: Path) -> None:
+    """Test the rebuilt file replaces a longer original and keeps its mode."""
+    path = tmp_path / "script.sh"
+    path.write_bytes(b"#!/bin/sh\n" + b"echo hello\n" * 500)
+    path.chmod(0o750)
+
+    sync_locally(path, b"#!/bin/sh\necho hello\n", block_size=64)
+
+    assert path.read_bytes() == b"#!/bin/sh\necho hello\n"
+    assert path.stat().st_mode & 0o777 == 0o750
+
+
+def test_encode_delta_splits_long_literals() -> None:
+    """Test literal runs are framed in bounded pieces."""
+    payload = encode_delta([b"x" * ((1 << 20) + 5), (2, 1)], "0" * 64)
+
+    assert payload.count(b"L\x00") == 2
+    assert payload.endswith(
+        b"C" + (2).to_bytes(8, "big") + (1).to_bytes(4, "big") + b"E"
+    )
@@ -0,0 +1,225 @@
+"""Test the shared follower hub."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from ssh_remote_control.hub import FollowerHub, Publish
+
+KEY = ("test-server", "log", "/var/log/syslog")
+
+
+class FakeFollower:
+    """Records starts of a fake remote follower and lets tests publish."""
+
+    def __init__(self) -> None:
+        self.starts = 0
+        self.publish: Publish | None = None
+        self.process = MagicMock()
+        self.exited = asyncio.Event()
+
+        async def wait() -> None:
+            await self.exited.wait()
+
+        self.process.wait = wait
+
+    async def start(self, publish: Publish) -> Any:
+        self.starts += 1
+        self.publish = publish
+        return self.process
+
+    async def emit(self, *messages: str) -> None:
+        assert self.publish is not None
+        for message in messages:
+            await self.publish(message)
+        # Let delivery tasks run
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+
+def collector() -> tuple[list[str], Publish]:
+    """Create a subscriber callback that records what it receives."""
+    received: list[str] = []
+
+    async def callback(message: str) -> None:
+        received.append(message)
+
+    return received, callback
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_follower() -> None:
+    """Test that many subscribers to one key start one remote follower."""
+    hub = FollowerHub()
+    follower = FakeFollower()
+    first, first_callback = collector()
+    second, second_callback = collector()
+
+    await hub.subscribe(KEY, "tab-1", first_callback, follower.start)
+    await hub.subscribe(KEY, "tab-2", second_callback, follower.start)
+    await follower.emit("a", "b")
+
+    assert follower.starts == 1
+    assert first == ["a", "b"]
+    assert second == ["a", "b"]
+    assert hub.stats()[0]["subscribers"] == 2
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_gets_history() -> None:
+    """Test that a new subscriber first receives recent messages."""
+    hub = FollowerHub(history_size=2)
+    follower = FakeFollower()
+    _, first_callback = collector()
+    late, late_callback = collector()
+
+    await hub.subscribe(KEY, "tab-1", first_callback, follower.start)
+    await follower.emit("a", "b", "c")
+    await hub.subscribe(KEY, "tab-2", late_callback, follower.start)
+    await follower.emit("d")
+
+    assert late == ["b", "c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_last_unsubscribe_stops_follower() -> None:
+    """Test that the remote process stops only when the last subscriber leaves."""
+    hub = FollowerHub()
+    follower = FakeFollower()
+    _, callback = collector()
+
+    await hub.subscribe(KEY, "tab-1", callback, follower.start)
+    await hub.subscribe(KEY, "tab-2", callback, follower.start)
+
+    hub.unsubscribe(KEY, "tab-1")
+    follower.process.terminate.assert_not_called()
+
+    hub.unsubscribe_all("tab-2")
+    follower.process.terminate.assert_called_once()
+    follower.process.close.assert_called_once()
+    assert hub.stats() == []
+
+
+@pytest.mark.asyncio
+async def test_delivered_bytes_are_encoded_size() -> None:
+    """Test that delivery tasks count multibyte messages in bytes."""
+    hub = FollowerHub()
+    follower = FakeFollower()
+    _, callback = collector()
+
+    await hub.subscribe(KEY, "tab-1", callback, follower.start)
+    await follower.emit("café", "日本")
+
+    tasks = hub.tasks.stats()["tasks"]
+    assert [task["bytes"] for task in tasks if task["owner"] == "tab-1"] == [11]
+
+
+@pytest.mark.asyncio
+async def test_failing_subscriber_is_removed() -> None:
+    """Test that a subscriber whose callback raises is dropped."""
+    hub = FollowerHub()
+    follower = FakeFollower()
+    healthy, healthy_callback = collector()
+
+    async def broken(_message: str) -> None:
+        raise RuntimeError("socket closed")
+
+    await hub.subscribe(KEY, "broken", broken, follower.start)
+    await hub.subscribe(KEY, "healthy", healthy_callback, follower.start)
+    await follower.emit("a", "b")
+
+    assert healthy == ["a", "b"]
+    assert not hub.is_subscribed(KEY, "broken")
+    assert hub.is_subscribed(KEY, "healthy")
+
+
+@pytest.mark.asyncio
+async def test_exited_follower_is_restarted_on_subscribe() -> None:
+    """Test that a follower whose process exits is started again when needed."""
+    hub = FollowerHub()
+    follower = FakeFollower()
+    _, callback = collector()
+
+    await hub.subscribe(KEY, "tab-1", callback, follower.start)
+    follower.exited.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert hub.stats() == []
+
+    follower.exited.clear()
+    await hub.subscribe(KEY, "tab-1", callback, follower.start)
+    assert follower.starts == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_start_is_not_kept() -> None:
+    """Test that a follower that fails to start is forgotten."""
+    hub = FollowerHub()
+    _, callback = collector()
+
+    async def failing_start(_publish: Publish) -> Any:
+        raise ConnectionError("unreachable")
+
+    with pytest.raises(ConnectionError):
+        await hub.subscribe(KEY, "tab-1", callback, failing_start)
+
+    assert hub.stats() == []
+
+
+@pytest.mark.asyncio
+async def test_failed_start_reaches_waiting_subscribers() -> None:
+    """Test that subscribers who joined during a failed start get its error."""
+    hub = FollowerHub()
+    _, callback = collector()
+    release = asyncio.Event()
+
+    async def failing_start(_publish: Publish) -> Any:
+        await release.wait()
+        raise ConnectionError("unreachable")
+
+    first = asyncio.create_task(hub.subscribe(KEY, "tab-1", callback, failing_start))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(hub.subscribe(KEY, "tab-2", callback, failing_start))
+    await asyncio.sleep(0)
+    assert not second.done()
+    release.set()
+
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    assert [str(result) for result in results] == ["unreachable", "unreachable"]
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert hub.stats() == []
+    await asyncio.sleep(0)
+    assert len(hub.tasks) == 0
+
+
+@pytest.mark.asyncio
+async def test_stopping_follower_cancels_owned_tasks() -> None:
+    """Test that tasks registered under a follower stop with it."""
+    hub = FollowerHub()
+    follower = FakeFollower()
+    stream_task: asyncio.Task[None] | None = None
+
+    async def start(publish: Publish) -> Any:
+        nonlocal stream_task
+        stream_task = hub.tasks.spawn(
+            asyncio.sleep(3600), name="stream", owner=hub.follower_owner(KEY)
+        )
+        return await follower.start(publish)
+
+    _, callback = collector()
+    await hub.subscribe(KEY, "tab-1", callback, start, owner="websocket:1")
+    assert hub.tasks.stats()["by_owner"] == {
+        "websocket:1": 1,
+        "follower:test-server:log:/var/log/syslog": 2,
+    }
+
+    hub.unsubscribe(KEY, "tab-1")
+    assert stream_task is not None
+    await asyncio.gather(stream_task, return_exceptions=True)
+    assert stream_task.cancelled()
+    await asyncio.sleep(0)
+    assert len(hub.tasks) == 0
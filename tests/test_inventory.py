@@ -0,0 +1,294 @@
+"""Test inventory loaders and the inventory cache."""
+
+from __future__ import annotations
+
+import getpass
+import os
+import textwrap
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from ssh_remote_control.config import Settings
+from ssh_remote_control.inventory import (
+    Inventory,
+    InventoryCache,
+    expand_host_pattern,
+    load_ansible_ini,
+    load_ansible_yaml,
+    load_ssh_config,
+)
+
+
+def write(path: Path, text: str) -> Path:
+    """Write dedented text to a file, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(text))
+    return path
+
+
+def test_expand_host_pattern() -> None:
+    """Test numeric, zero-padded, letter and stepped host ranges."""
+    assert expand_host_pattern("web") == ["web"]
+    assert expand_host_pattern("web[01:03].example.com") == [
+        "web01.example.com",
+        "web02.example.com",
+        "web03.example.com",
+    ]
+    assert expand_host_pattern("db-[a:c]") == ["db-a", "db-b", "db-c"]
+    assert expand_host_pattern("n[1:5:2]") == ["n1", "n3", "n5"]
+    assert expand_host_pattern("r[1:2]-[a:b]") == ["r1-a", "r1-b", "r2-a", "r2-b"]
+    with pytest.raises(ValueError, match="Invalid host range"):
+        expand_host_pattern("bad[a:10]")
+
+
+def test_load_ssh_config(tmp_path: Path) -> None:
+    """Test Host blocks, Include globs, wildcards and first-value-wins."""
+    config = write(
+        tmp_path / "config",
+        """
+        Host bastion
+            HostName bastion.example.com
+            Port 2222
+
+        Include conf.d/*.conf
+
+        Host web1 web2
+            HostName %h.example.com
+            ProxyJump admin@bastion:2222
+            IdentityFile ~/.ssh/web_key
+
+        Host *.corp !skip.corp
+            User corpuser
+
+        Match host app.corp
+            User ignored
+
+        Host *
+            User everyone
+            Compression yes
+            Ciphers aes128-gcm@openssh.com,aes256-ctr
+            MACs +hmac-sha1
+        """,
+    )
+    write(tmp_path / "conf.d" / "db.conf", "Host db1\n  HostName=10.0.0.5\n")
+    write(tmp_path / "conf.d" / "corp.conf", "Host app.corp skip.corp\n")
+
+    inventory = Inventory()
+    load_ssh_config(config, inventory)
+
+    assert list(inventory.servers) == [
+        "bastion",
+        "app.corp",
+        "skip.corp",
+        "db1",
+        "web1",
+        "web2",
+    ]
+    assert inventory.servers["bastion"] == {
+        "host": "bastion.example.com",
+        "username": "everyone",
+        "port": 2222,
+        "compression": True,
+        "encryption_algs": ["aes128-gcm@openssh.com", "aes256-ctr"],
+    }
+    assert inventory.servers["web2"]["host"] == "web2.example.com"
+    assert inventory.servers["web2"]["jump_host"] == "bastion"
+    assert inventory.servers["web2"]["key_file"] == os.path.expanduser("~/.ssh/web_key")
+    assert inventory.servers["db1"]["host"] == "10.0.0.5"
+    assert inventory.servers["app.corp"]["username"] == "corpuser"
+    assert inventory.servers["skip.corp"]["username"] == "everyone"
+    assert "mac_algs" not in inventory.servers["db1"]
+    assert sorted(inventory.files) == sorted(
+        str(path)
+        for path in (
+            config,
+            tmp_path / "conf.d" / "corp.conf",
+            tmp_path / "conf.d" / "db.conf",
+        )
+    )
+
+
+def test_ssh_config_include_loop(tmp_path: Path) -> None:
+    """Test that recursive includes are rejected."""
+    config = write(tmp_path / "config", "Include config\n")
+    with pytest.raises(ValueError, match="Too many nested Include"):
+        load_ssh_config(config, Inventory())
+
+
+def test_load_ansible_ini(tmp_path: Path) -> None:
+    """Test INI hosts, ranges, group variables and nested groups."""
+    hosts = write(
+        tmp_path / "hosts.ini",
+        """
+        lonely ansible_host=10.1.1.1
+
+        [web]
+        web[01:02].example.com ansible_user=deploy
+        web-special ansible_host=1.2.3.4 ansible_port=2200  # comment
+
+        [db]
+        db-a ansible_ssh_private_key_file=~/.ssh/db
+
+        [prod:children]
+        web
+        db
+
+        [prod:vars]
+        ansible_user = produser
+        jump_host=bastion
+
+        [all:vars]
+        ansible_port=22
+        """,
+    )
+    inventory = Inventory()
+    load_ansible_ini(hosts, inventory)
+
+    assert inventory.servers["lonely"] == {
+        "host": "10.1.1.1",
+        "username": getpass.getuser(),
+        "port": "22",
+    }
+    assert inventory.servers["web01.example.com"] == {
+        "host": "web01.example.com",
+        "username": "deploy",
+        "port": "22",
+        "jump_host": "bastion",
+    }
+    assert inventory.servers["web-special"]["username"] == "produser"
+    assert inventory.servers["web-special"]["port"] == "2200"
+    assert inventory.servers["db-a"]["key_file"] == os.path.expanduser("~/.ssh/db")
+    assert inventory.groups == {
+        "prod": ["web01.example.com", "web02.example.com", "web-special", "db-a"],
+        "db": ["db-a"],
+        "web": ["web01.example.com", "web02.example.com", "web-special"],
+    }
+
+
+def test_load_ansible_yaml(tmp_path: Path) -> None:
+    """Test YAML inventories with nested children and variables."""
+    hosts = write(
+        tmp_path / "hosts.yaml",
+        """
+        all:
+          vars:
+            ansible_user: root
+          hosts:
+            solo:
+          children:
+            east:
+              children:
+                cache:
+                  hosts:
+                    redis[1:2]:
+                      ansible_port: 6379
+                  vars:
+                    ansible_user: cacheuser
+        """,
+    )
+    inventory = Inventory()
+    load_ansible_yaml(hosts, inventory)
+
+    assert inventory.servers == {
+        "solo": {"host": "solo", "username": "root"},
+        "redis1": {"host": "redis1", "username": "cacheuser", "port": 6379},
+        "redis2": {"host": "redis2", "username": "cacheuser", "port": 6379},
+    }
+    assert inventory.groups == {
+        "east": ["redis1", "redis2"],
+        "cache": ["redis1", "redis2"],
+    }
+
+
+def test_ansible_group_cycle(tmp_path: Path) -> None:
+    """Test that groups nesting each other are rejected."""
+    hosts = write(tmp_path / "hosts.ini", "[a:children]\nb\n[b:children]\na\n")
+    with pytest.raises(ValueError, match="Group cycle"):
+        load_ansible_ini(hosts, Inventory())
+
+
+def test_inventory_cache(tmp_path: Path) -> None:
+    """Test reuse while files are unchanged, and reloading when they change."""
+    write(tmp_path / "inv" / "a.ini", "a1\n")
+    pattern = str(tmp_path / "inv" / "*.ini")
+    cache = InventoryCache(str(tmp_path / "cache"))
+
+    inventory = cache.load("ansible_ini", pattern)
+    assert list(inventory.servers) == ["a1"]
+    assert cache.load("ansible_ini", pattern) is inventory
+    assert not cache.changed()
+
+    # A fresh cache reads the parsed inventory from the cache directory
+    restarted = InventoryCache(str(tmp_path / "cache"))
+    assert restarted.load("ansible_ini", pattern).servers == inventory.servers
+    (cache_file,) = (tmp_path / "cache").iterdir()
+    # Cached host variables may include passwords
+    assert cache_file.stat().st_mode & 0o777 == 0o600
+
+    write(tmp_path / "inv" / "b.ini", "b1\n")
+    assert cache.changed()
+    assert list(cache.load("ansible_ini", pattern).servers) == ["a1", "b1"]
+
+    write(tmp_path / "inv" / "a.ini", "a1\na2\n")
+    assert cache.changed()
+    assert list(cache.load("ansible_ini", pattern).servers) == ["a1", "a2", "b1"]
+
+    with pytest.raises(ValueError, match="Unknown inventory type"):
+        cache.load("csv", pattern)
+
+
+def test_inventory_cache_failed_load(tmp_path: Path) -> None:
+    """Test that a broken file is not retried until it changes."""
+    hosts = write(tmp_path / "hosts.ini", "bad[a:10]\n")
+    cache = InventoryCache()
+    with pytest.raises(ValueError):
+        cache.load("ansible_ini", str(hosts))
+    assert not cache.changed()
+
+    write(hosts, "good\n")
+    assert cache.changed()
+    assert list(cache.load("ansible_ini", str(hosts)).servers) == ["good"]
+    assert not cache.changed()
+
+
+@pytest.fixture
+def inventory_settings(tmp_path: Path) -> Generator[Path, None, None]:
+    """Point Settings at a config file using an inventory."""
+    write(tmp_path / "hosts.ini", "[web]\nweb1\nweb2 ansible_port=2200\n")
+    config = write(
+        tmp_path / "config.yaml",
+        f"""
+        inventory_sources:
+          - {{type: ansible_ini, path: {tmp_path / "hosts.ini"}}}
+        ssh_servers:
+          web2:
+            host: web2.internal
+            username: admin
+        """,
+    )
+    os.environ["SSH_REMOTE_CONTROL_CONFIG"] = str(config)
+    yield tmp_path
+    del os.environ["SSH_REMOTE_CONTROL_CONFIG"]
+
+
+def test_settings_inventory(inventory_settings: Path) -> None:
+    """Test that inventory servers and groups feed server lookups."""
+    settings = Settings()
+
+    assert settings.list_servers() == ("web2", "web1")
+    web2 = settings.get_server_config("web2")
+    assert web2 is not None
+    assert (web2.host, web2.port, web2.username) == ("web2.internal", 2200, "admin")
+    assert settings.expand_servers(groups=["web"]) == ["web1", "web2"]
+    assert not settings.config_changed()
+
+    write(inventory_settings / "hosts.ini", "[web]\nweb2 ansible_port=2200\nweb3\n")
+    assert settings.config_changed()
+    assert settings.reload() == {
+        "added": ["web3"],
+        "removed": ["web1"],
+        "changed": [],
+    }
+    assert settings.server_groups == {"web": ["web2", "web3"]}
@@ -0,0 +1,63 @@
+"""Test the in-process metrics registry."""
+
+from __future__ import annotations
+
+import pytest
+
+from ssh_remote_control.metrics import MetricsRegistry
+
+
+def test_counter_renders_per_label_set() -> None:
+    """Test that counters keep one series per label set."""
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors.", ("server", "operation"))
+    errors.inc("web-1", "execute")
+    errors.inc("web-1", "execute", amount=2)
+    errors.inc("db-1", "read_file")
+
+    assert errors.value("web-1", "execute") == 3
+    assert registry.render() == (
+        "# HELP errors_total Errors.\n"
+        "# TYPE errors_total counter\n"
+        'errors_total{server="web-1",operation="execute"} 3\n'
+        'errors_total{server="db-1",operation="read_file"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    """Test that histogram buckets, sum and count follow the text format."""
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("server",), (0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, "web-1")
+
+    assert latency.count("web-1") == 4
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{server="web-1",le="0.1"} 2',
+        'latency_seconds_bucket{server="web-1",le="1"} 3',
+        'latency_seconds_bucket{server="web-1",le="+Inf"} 4',
+        'latency_seconds_sum{server="web-1"} 3.65',
+        'latency_seconds_count{server="web-1"} 4',
+    ]
+
+
+def test_gauge_reads_callback_and_escapes_labels() -> None:
+    """Test that gauges are read at render time with escaped label values."""
+    registry = MetricsRegistry()
+    queued = {"a": 0}
+    registry.gauge(
+        "queued", "Queued.", lambda: [(('say "hi"',), queued["a"])], ("name",)
+    )
+
+    queued["a"] = 5
+    assert 'queued{name="say \\"hi\\""} 5' in registry.render()
+
+
+def test_register_returns_existing_metric() -> None:
+    """Test that registering a name twice returns the same metric."""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.")
+    assert registry.counter("requests_total", "Requests.") is counter
+    with pytest.raises(ValueError, match="already a counter"):
+        registry.histogram("requests_total", "Requests.")
@@ -0,0 +1,232 @@
+"""Test per-server SSH connection pooling."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from ssh_remote_control.pool import ConnectionPool
+
+
+def make_connection(closed: bool = False) -> MagicMock:
+    """Create a mock SSH connection."""
+    conn = MagicMock()
+    conn.is_closed.return_value = closed
+    return conn
+
+
+def make_pool(
+    max_connections: int = 2, max_channels: int = 2
+) -> tuple[ConnectionPool, list[MagicMock]]:
+    """Create a pool whose factory records the connections it opens."""
+    opened: list[MagicMock] = []
+
+    async def factory() -> MagicMock:
+        conn = make_connection()
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool(
+        "test-server",
+        factory,  # type: ignore[arg-type]
+        max_connections=max_connections,
+        max_channels=max_channels,
+    )
+    return pool, opened
+
+
+@pytest.mark.asyncio
+async def test_acquire_prefers_least_loaded_connection() -> None:
+    """Test that channels are spread across existing connections."""
+    pool, opened = make_pool(max_channels=4)
+    first = make_connection()
+    second = make_connection()
+    pool.add(first)
+    pool.add(second)
+
+    leases = [await pool.acquire() for _ in range(4)]
+
+    assert [lease.connection for lease in leases].count(first) == 2
+    assert [lease.connection for lease in leases].count(second) == 2
+    assert opened == []
+    assert pool.channels_in_use == 4
+
+
+@pytest.mark.asyncio
+async def test_acquire_opens_connection_when_full() -> None:
+    """Test that a new connection is opened once existing ones are full."""
+    pool, opened = make_pool(max_connections=2, max_channels=1)
+    pool.add(make_connection())
+
+    await pool.acquire()
+    lease = await pool.acquire()
+
+    assert opened == [lease.connection]
+    assert pool.stats()["connections"] == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_free_slot() -> None:
+    """Test that callers queue instead of failing when the pool is saturated."""
+    pool, _ = make_pool(max_connections=1, max_channels=1)
+    pool.add(make_connection())
+    lease = await pool.acquire()
+
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    assert pool.stats()["waiters"] == 1
+
+    await pool.release(lease)
+    second = await asyncio.wait_for(waiter, timeout=1)
+
+    assert second.connection is lease.connection
+    assert pool.channels_in_use == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_connection_frees_slot() -> None:
+    """Test that a failed connection attempt does not leak a pending slot."""
+    attempts = 0
+
+    async def factory() -> MagicMock:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionError("refused")
+        return make_connection()
+
+    pool = ConnectionPool("test-server", factory, max_connections=1)  # type: ignore[arg-type]
+
+    with pytest.raises(ConnectionError):
+        await pool.acquire()
+
+    lease = await pool.acquire()
+    assert lease.channels == 1
+    assert attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_closed_connections_are_replaced() -> None:
+    """Test that closed connections are pruned before scheduling."""
+    pool, opened = make_pool(max_connections=1)
+    pool.add(make_connection(closed=True))
+
+    lease = await pool.acquire()
+
+    assert lease.connection is opened[0]
+    assert pool.connections == [opened[0]]
+
+
+@pytest.mark.asyncio
+async def test_fill_opens_min_connections() -> None:
+    """Test that fill opens connections up to the configured minimum."""
+    opened: list[MagicMock] = []
+
+    async def factory() -> MagicMock:
+        conn = make_connection()
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool(
+        "test-server",
+        factory,  # type: ignore[arg-type]
+        min_connections=3,
+        max_connections=4,
+    )
+    pool.add(make_connection())
+
+    await pool.fill()
+
+    assert len(opened) == 2
+    assert pool.stats()["connections"] == 3
+
+
+@pytest.mark.asyncio
+async def test_sftp_session_is_cached() -> None:
+    """Test that one SFTP session is shared and counted as a channel."""
+    pool, _ = make_pool(max_channels=2)
+    conn = make_connection()
+    conn.start_sftp_client = AsyncMock(return_value=MagicMock())
+    pool.add(conn)
+
+    async with pool.sftp() as first, pool.sftp() as second:
+        assert first is second
+        assert pool.busy
+
+    conn.start_sftp_client.assert_called_once()
+    assert pool.stats()["sftp_sessions"] == 1
+    assert pool.channels_in_use == 1
+    assert not pool.busy
+
+
+@pytest.mark.asyncio
+async def test_sftp_session_rebuilt_after_loss() -> None:
+    """Test that a lost SFTP session is replaced on the next use."""
+    pool, _ = make_pool()
+    conn = make_connection()
+    broken, fresh = MagicMock(), MagicMock()
+    conn.start_sftp_client = AsyncMock(side_effect=[broken, fresh])
+    pool.add(conn)
+
+    with pytest.raises(ConnectionResetError):
+        async with pool.sftp():
+            raise ConnectionResetError("lost")
+
+    broken.exit.assert_called_once()
+    assert pool.channels_in_use == 0
+
+    async with pool.sftp() as sftp:
+        assert sftp is fresh
+
+
+@pytest.mark.asyncio
+async def test_sftp_session_follows_reconnect() -> None:
+    """Test that a new session is started when its connection closes."""
+    pool, opened = make_pool(max_connections=1)
+    conn = make_connection()
+    conn.start_sftp_client = AsyncMock(return_value=MagicMock())
+    pool.add(conn)
+
+    async with pool.sftp():
+        pass
+    conn.is_closed.return_value = True
+
+    async def factory() -> MagicMock:
+        replacement = make_connection()
+        replacement.start_sftp_client = AsyncMock(return_value=MagicMock())
+        opened.append(replacement)
+        return replacement
+
+    pool._factory = factory  # type: ignore[assignment]
+    async with pool.sftp():
+        pass
+
+    opened[0].start_sftp_client.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_shell_is_cached_and_replaced_when_closed() -> None:
+    """Test that one shell is shared and a closed one is restarted."""
+    pool, _ = make_pool(max_channels=2)
+    pool.add(make_connection())
+    first, second = MagicMock(closed=False), MagicMock(closed=False)
+
+    with patch(
+        "ssh_remote_control.pool.PersistentShell.start",
+        AsyncMock(side_effect=[first, second]),
+    ):
+        async with pool.shell() as a, pool.shell() as b:
+            assert a is b is first
+            busy_while_held = pool.busy
+        assert pool.stats()["shells"] == 1
+        assert pool.channels_in_use == 1
+        assert (busy_while_held, pool.busy) == (True, False)
+
+        first.closed = True
+        async with pool.shell() as c:
+            assert c is second
+
+    assert pool.channels_in_use == 1
@@ -2,13 +2,27 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import re
+import subprocess
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from ssh_remote_control.breaker import CircuitOpenError
 from ssh_remote_control.config import Settings
-from ssh_remote_control.server import SSHConnectionManager
+from ssh_remote_control.server import (
+    SYSTEM_INFO_COMMANDS,
+    SSHConnectionManager,
+    build_fact_script,
+    parse_fact_output,
+)
+from ssh_remote_control.shell import ShellResult
 
 
 @pytest.fixture
@@ -88,6 +102,33 @@ async def test_successful_connection(
     assert call_args["client_keys"] == ["/tmp/test_key"]
 
 
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect", new_callable=AsyncMock)
+async def test_transport_options(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that transport settings reach asyncssh, with per-server overrides."""
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+    mock_conn.run = AsyncMock(return_value=MagicMock(exit_status=0, stdout="ok"))
+    mock_connect.return_value = mock_conn
+    ssh_manager.settings.ssh_encryption_algs = ["aes128-gcm@openssh.com"]
+    ssh_manager.settings.ssh_window_size = 8 * 1024 * 1024
+    ssh_manager.settings.ssh_servers["test-server"].update(
+        {"compression": True, "max_packet_size": 65536}
+    )
+
+    await ssh_manager.execute_command("test-server", "true")
+
+    connect_kwargs = mock_connect.call_args.kwargs
+    assert connect_kwargs["compression_algs"][0] == "zlib@openssh.com"
+    assert connect_kwargs["encryption_algs"] == ["aes128-gcm@openssh.com"]
+    assert "mac_algs" not in connect_kwargs
+    run_kwargs = mock_conn.run.call_args.kwargs
+    assert run_kwargs["window"] == 8 * 1024 * 1024
+    assert run_kwargs["max_pktsize"] == 65536
+
+
 @pytest.mark.asyncio
 @patch("ssh_remote_control.server.asyncssh.connect", new_callable=AsyncMock)
 @patch("ssh_remote_control.server.asyncio.Lock")
@@ -241,6 +282,18 @@ async def test_execute_command_with_timeout(
     assert result == "output"
 
 
+def _framed_fact_output(command: str, results: dict[str, tuple[str, int]]) -> str:
+    """Build the output a remote shell would produce for a fact script."""
+    marker = re.search(r"(__SRC_FACT_[0-9a-f]+__)", command).group(1)  # type: ignore[union-attr]
+    lines = []
+    for key, (output, status) in results.items():
+        lines.append(f"{marker} begin {key}")
+        lines.append(output)
+        lines.append("")
+        lines.append(f"{marker} end {key} {status}")
+    return "\n".join(lines) + "\n"
+
+
 @pytest.mark.asyncio
 @patch("ssh_remote_control.server.asyncssh.connect")
 async def test_get_system_info(
@@ -251,28 +304,25 @@ async def test_get_system_info(
     mock_conn = MagicMock()
     mock_conn.is_closed.return_value = False
 
-    # Mock different command results
     command_results = {
-        "hostname": "test-host",
-        "uptime": "up 1 day",
-        "df -h": "filesystem info",
-        "free -h": "memory info",
-        "cat /proc/cpuinfo | grep 'model name' | head -1": "cpu info",
-        "cat /proc/loadavg": "load info",
-        "uname -r": "kernel info",
+        "hostname": ("test-host", 0),
+        "uptime": ("up 1 day", 0),
+        "disk_usage": ("filesystem info", 0),
+        "memory": ("memory info", 0),
+        "cpu_info": ("cpu info", 0),
+        "load_average": ("load info", 0),
+        "kernel": ("kernel info", 0),
     }
+    commands: list[str] = []
 
-    def mock_run(command: str, timeout: int | None = None) -> Any:
+    async def async_mock_run(command: str, timeout: int | None = None) -> Any:
+        commands.append(command)
         result = AsyncMock()
         result.exit_status = 0
-        result.stdout = command_results.get(command, "N/A")
+        result.stdout = _framed_fact_output(command, command_results)
         result.stderr = ""
         return result
 
-    # Make run method async
-    async def async_mock_run(command: str, timeout: int | None = None) -> Any:
-        return mock_run(command, timeout)
-
     mock_conn.run = async_mock_run
 
     async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
@@ -287,6 +337,587 @@ async def test_get_system_info(
     assert info["uptime"] == "up 1 day"
     assert info["disk_usage"] == "filesystem info"
     assert info["memory"] == "memory info"
+    assert info["kernel"] == "kernel info"
+    # All probes share a single round trip
+    assert len(commands) == 1
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_get_system_info_partial_failure(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that a failing probe is reported as N/A without losing the others."""
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+
+    async def async_mock_run(command: str, timeout: int | None = None) -> Any:
+        result = AsyncMock()
+        result.exit_status = 0
+        result.stdout = _framed_fact_output(
+            command, {"hostname": ("test-host", 0), "memory": ("", 127)}
+        )
+        result.stderr = ""
+        return result
+
+    mock_conn.run = async_mock_run
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+
+    info = await ssh_manager.get_system_info("test-server")
+
+    assert info["hostname"] == "test-host"
+    assert info["memory"] == "N/A"
+    assert info["kernel"] == "N/A"
+    assert set(info) == set(SYSTEM_INFO_COMMANDS)
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_get_system_info_connection_failure(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that every key is N/A when the batched command fails."""
+    mock_connect.side_effect = ConnectionError("unreachable")
+
+    info = await ssh_manager.get_system_info("test-server")
+
+    assert info == dict.fromkeys(SYSTEM_INFO_COMMANDS, "N/A")
+
+
+def test_fact_script_round_trip() -> None:
+    """Test that a fact script runs in sh and parses back into its keys."""
+    marker = "__SRC_FACT_0123456789abcdef__"
+    script = build_fact_script(
+        {
+            "greeting": "echo hello; echo world",
+            "no_newline": "printf partial",
+            "failing": "echo ignored; false",
+            "reads_stdin": "cat",
+        },
+        marker,
+    )
+
+    output = subprocess.run(
+        ["sh", "-c", script],
+        input="should not be consumed\n",
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    facts = parse_fact_output(output, marker)
+    assert facts == {
+        "greeting": "hello\nworld",
+        "no_newline": "partial",
+        "reads_stdin": "",
+    }
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_get_running_services_bulk(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that running services are inventoried in two round trips."""
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+    commands: list[str] = []
+
+    async def async_mock_run(command: str, timeout: int | None = None) -> Any:
+        commands.append(command)
+        result = AsyncMock()
+        result.exit_status = 0
+        result.stderr = ""
+        if command.startswith("systemctl list-units"):
+            result.stdout = (
+                "cron.service loaded active running Regular background jobs\n"
+                "ssh.service loaded active running OpenBSD Secure Shell server\n"
+                "gone.service loaded active running Unit that vanished\n"
+            )
+        else:
+            marker = re.search(r"(__SRC_PS_[0-9a-f]+__)", command).group(1)  # type: ignore[union-attr]
+            result.stdout = (
+                "Id=cron.service\nActiveState=active\nSubState=running\n"
+                "LoadState=loaded\nMainPID=812\n"
+                "Description=Regular background program processing daemon\n"
+                "UnitFileState=enabled\n\n"
+                "Id=ssh.service\nActiveState=active\nSubState=running\n"
+                "LoadState=loaded\nMainPID=0\nDescription=OpenBSD Secure Shell\n"
+                f"UnitFileState=disabled\n{marker}\n"
+                "    1 11520\n  812  2048\n"
+            )
+        return result
+
+    mock_conn.run = async_mock_run
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+
+    services = await ssh_manager.get_running_services("test-server")
+
+    assert len(commands) == 2
+    assert [service["name"] for service in services] == ["cron", "ssh", "gone"]
+    assert services[0] == {
+        "name": "cron",
+        "active": True,
+        "enabled": True,
+        "status": "active",
+        "pid": 812,
+        "memory": "2.0MB",
+        "description": "Regular background program processing daemon",
+    }
+    assert services[1]["enabled"] is False
+    assert services[1]["pid"] is None
+    assert services[1]["memory"] is None
+    assert services[2]["status"] == "unknown"
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_stream_holds_channel_until_closed(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that a streaming process keeps its pool slot until it closes."""
+    closed = asyncio.Event()
+    mock_process = MagicMock()
+    mock_process.wait_closed = AsyncMock(side_effect=closed.wait)
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+    mock_conn.create_process = AsyncMock(return_value=mock_process)
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+
+    process = await ssh_manager.execute_command_stream("test-server", "tail -f x")
+    await asyncio.sleep(0)
+
+    assert process is mock_process
+    assert ssh_manager.pool_stats()["test-server"]["channels"] == 1
+
+    closed.set()
+    await asyncio.sleep(0)
+    assert ssh_manager.pool_stats()["test-server"]["channels"] == 0
+
+
+class FakeStreamProcess:
+    """A streaming process whose stdout yields fixed lines."""
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.stdout = self._stdout()
+        self.wait = AsyncMock()
+        self.wait_closed = AsyncMock()
+
+    async def _stdout(self) -> AsyncIterator[str]:
+        for line in self.lines:
+            yield line
+
+
+def patch_stream_process(
+    ssh_manager: SSHConnectionManager, lines: list[str]
+) -> MagicMock:
+    """Make execute_command_stream start a FakeStreamProcess."""
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+    mock_conn.create_process = AsyncMock(return_value=FakeStreamProcess(lines))
+    ssh_manager._create_connection = AsyncMock(return_value=mock_conn)  # type: ignore[method-assign]
+    return mock_conn
+
+
+@pytest.mark.asyncio
+async def test_stream_output_batches(ssh_manager: SSHConnectionManager) -> None:
+    """Test that streamed lines are delivered in batches with drop counts."""
+    patch_stream_process(ssh_manager, [f"{i}\n" for i in range(5)])
+    ssh_manager.settings.stream_batch_size = 2
+    received: list[tuple[list[str], int]] = []
+    done = asyncio.Event()
+
+    async def batch_callback(lines: list[str], dropped: int) -> None:
+        received.append((lines, dropped))
+        if sum(len(batch) for batch, _ in received) == 5:
+            done.set()
+
+    await ssh_manager.tail_file(
+        "test-server", "/var/log/app.log", batch_callback=batch_callback
+    )
+    await asyncio.wait_for(done.wait(), 1)
+
+    assert [lines for lines, _ in received] == [["0\n", "1\n"], ["2\n", "3\n"], ["4\n"]]
+    assert all(dropped == 0 for _, dropped in received)
+
+
+@pytest.mark.asyncio
+async def test_stream_bytes_metric_counts_encoded_bytes(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that multibyte output is counted in bytes, not characters."""
+    patch_stream_process(ssh_manager, ["café\n", "日本\n"])
+    received: list[str] = []
+    done = asyncio.Event()
+
+    async def batch_callback(lines: list[str], dropped: int) -> None:
+        received.extend(lines)
+        if len(received) == 2:
+            done.set()
+
+    await ssh_manager.tail_file(
+        "test-server", "/var/log/app.log", batch_callback=batch_callback
+    )
+    await asyncio.wait_for(done.wait(), 1)
+
+    assert ssh_manager._stream_lines.value("test-server") == 2
+    assert ssh_manager._stream_bytes.value("test-server") == 13
+
+
+@pytest.mark.asyncio
+async def test_monitor_service_logs_single_follow(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that service logs come from one journalctl call with no repeats."""
+    mock_conn = patch_stream_process(ssh_manager, ["started\n", "\n"])
+    received: list[dict[str, Any]] = []
+    done = asyncio.Event()
+
+    async def callback(log_json: str) -> None:
+        received.append(json.loads(log_json))
+        done.set()
+
+    await ssh_manager.monitor_service_logs("test-server", "nginx", callback, lines=5)
+    await asyncio.wait_for(done.wait(), 1)
+
+    mock_conn.create_process.assert_awaited_once()
+    command = mock_conn.create_process.call_args.args[0]
+    assert command == "journalctl -u nginx -n 5 -f --no-pager"
+    assert [entry["line"] for entry in received] == ["started"]
+    assert received[0]["service"] == "nginx"
+
+
+def test_stream_rejects_unknown_overflow_policy(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that a bad overflow policy fails before a channel is opened."""
+    ssh_manager.settings.stream_overflow_policy = "newest"
+
+    async def callback(line: str) -> None:
+        pass
+
+    with pytest.raises(ValueError, match="overflow policy"):
+        asyncio.run(ssh_manager.execute_command_stream("test-server", "x", callback))
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_evict_idle_connections(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that servers unused for the idle timeout are disconnected."""
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+    mock_conn.wait_closed = AsyncMock()
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+    ssh_manager.settings.ssh_idle_timeout = 60
+
+    await ssh_manager.connect("test-server")
+    await ssh_manager.evict_idle()
+    assert "test-server" in ssh_manager.connections
+
+    # Pretend the server was last used well before the idle timeout
+    ssh_manager._last_used["test-server"] -= 120
+    for entry in ssh_manager._pools["test-server"]._entries:
+        entry.last_used -= 120
+    await ssh_manager.evict_idle()
+
+    assert "test-server" not in ssh_manager.connections
+    assert "test-server" not in ssh_manager._connection_locks
+    mock_conn.close.assert_called_once()
+    assert ssh_manager.connection_stats()["evictions"] == {"idle": 1, "lru": 0}
+    await ssh_manager.close_all()
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_lru_connection_limit(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that the least recently used idle server is evicted over the cap."""
+    opened: dict[str, MagicMock] = {}
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        conn = MagicMock()
+        conn.is_closed.return_value = False
+        conn.wait_closed = AsyncMock()
+        opened[kwargs["host"]] = conn
+        return conn
+
+    mock_connect.side_effect = mock_connect_impl
+    ssh_manager.settings.ssh_servers = {
+        name: {"host": name, "username": "testuser"} for name in ("a", "b", "c")
+    }
+    ssh_manager.settings.ssh_max_open_connections = 2
+
+    await ssh_manager.connect("a")
+    await ssh_manager.connect("b")
+    await ssh_manager.connect("a")
+    await ssh_manager.connect("c")
+
+    assert set(ssh_manager.connections) == {"a", "c"}
+    opened["b"].close.assert_called_once()
+    assert ssh_manager.eviction_counts["lru"] == 1
+    await ssh_manager.close_all()
+
+
+@pytest.mark.asyncio
+async def test_execute_fanout_yields_as_completed(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that fan-out results arrive in completion order under the cap."""
+    delays = {"slow": 0.05, "fast": 0.0, "broken": 0.01}
+    running = 0
+    peak = 0
+
+    async def fake_execute(
+        server_name: str, command: str, timeout: int | None = None
+    ) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(delays[server_name])
+            if server_name == "broken":
+                raise ConnectionError("unreachable")
+            return f"{command} on {server_name}"
+        finally:
+            running -= 1
+
+    ssh_manager.settings.fanout_max_concurrency = 2
+    with patch.object(ssh_manager, "execute_command", side_effect=fake_execute):
+        results = [
+            result
+            async for result in ssh_manager.execute_fanout(
+                ["slow", "fast", "broken", "fast"], "uptime"
+            )
+        ]
+
+    assert [result["server"] for result in results] == ["fast", "broken", "slow"]
+    assert results[0]["output"] == "uptime on fast"
+    assert results[1]["success"] is False
+    assert results[1]["error"] == "unreachable"
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_fanout_busy_host_does_not_hold_slot(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that commands queued for a busy host leave global slots free."""
+    finished: list[str] = []
+
+    async def fake_execute(
+        server_name: str, command: str, timeout: int | None = None
+    ) -> str:
+        await asyncio.sleep(0.05 if server_name == "busy" else 0)
+        finished.append(server_name)
+        return command
+
+    async def fanout(server_names: list[str]) -> None:
+        async for _result in ssh_manager.execute_fanout(server_names, "uptime"):
+            pass
+
+    ssh_manager.settings.fanout_max_concurrency = 2
+    ssh_manager.settings.fanout_per_host_concurrency = 1
+    with patch.object(ssh_manager, "execute_command", side_effect=fake_execute):
+        first = asyncio.create_task(fanout(["busy"]))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, fanout(["busy", "idle"]))
+
+    assert finished == ["idle", "busy", "busy"]
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_warm_up_connects_in_parallel(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that warm-up connects servers concurrently and records failures."""
+    ssh_manager.settings.ssh_servers["other-server"] = {
+        "host": "other",
+        "username": "testuser",
+    }
+    in_flight = 0
+    peak = 0
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if kwargs["host"] == "other":
+            raise OSError("Connection refused")
+        mock_conn = MagicMock()
+        mock_conn.is_closed.return_value = False
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+    assert ssh_manager.warmup_stats()["state"] == "idle"
+
+    stats = await ssh_manager.warm_up(
+        ["test-server", "other-server", "missing-server"], concurrency=2
+    )
+
+    assert peak == 2
+    assert stats["state"] == "done"
+    assert stats["total"] == 3
+    assert stats["connected"] == 1
+    assert stats["failed"] == 2
+    assert stats["pending"] == 0
+    assert stats["servers"]["test-server"] == "connected"
+    assert stats["errors"]["other-server"] == "Connection refused"
+    assert "No configuration found" in stats["errors"]["missing-server"]
+    assert "test-server" in ssh_manager.connections
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_circuit_breaker_fails_fast(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that callers queued behind a failed connect do not retry it."""
+    attempts = 0
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        if attempts == 1:
+            raise OSError("Connection refused")
+        mock_conn = MagicMock()
+        mock_conn.is_closed.return_value = False
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+
+    results = await asyncio.gather(
+        *(ssh_manager.connect("test-server") for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert attempts == 1
+    assert isinstance(results[0], OSError)
+    assert all(isinstance(result, CircuitOpenError) for result in results[1:])
+    assert ssh_manager.circuit_stats("test-server")["state"] == "open"
+
+    # Once the backoff has passed, one probe is let through and closes it
+    ssh_manager._breakers["test-server"].retry_at = 0
+    assert ssh_manager.circuit_stats("test-server")["state"] == "half_open"
+    await ssh_manager.connect("test-server")
+    assert attempts == 2
+    assert "test-server" not in ssh_manager._breakers
+    assert ssh_manager.circuit_stats("test-server")["state"] == "closed"
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_jump_host_tunnel_is_shared(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that servers behind a bastion share one connection to it."""
+    servers = ssh_manager.settings.ssh_servers
+    servers["bastion"] = {"host": "bastion", "username": "testuser"}
+    servers["test-server"]["jump_host"] = "bastion"
+    servers["other-server"] = {
+        "host": "other",
+        "username": "testuser",
+        "jump_host": "bastion",
+    }
+    connections: dict[str, MagicMock] = {}
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        mock_conn = MagicMock()
+        mock_conn.is_closed.return_value = False
+        mock_conn.wait_closed = AsyncMock()
+        connections[kwargs["host"]] = mock_conn
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+
+    await asyncio.gather(
+        ssh_manager.connect("test-server"), ssh_manager.connect("other-server")
+    )
+
+    hosts = [call.kwargs["host"] for call in mock_connect.call_args_list]
+    assert sorted(hosts) == ["bastion", "localhost", "other"]
+    tunnels = [call.kwargs.get("tunnel") for call in mock_connect.call_args_list]
+    assert tunnels.count(connections["bastion"]) == 2
+
+    # The bastion stays up while servers behind it are connected
+    ssh_manager.settings.ssh_idle_timeout = 60
+    ssh_manager._last_used["bastion"] = 0
+    await ssh_manager.evict_idle()
+    assert "bastion" in ssh_manager.connections
+
+    await ssh_manager.disconnect("test-server")
+    await ssh_manager.disconnect("other-server")
+    await ssh_manager.evict_idle()
+    assert "bastion" not in ssh_manager.connections
+
+
+@pytest.mark.asyncio
+async def test_jump_host_cycle_rejected(ssh_manager: SSHConnectionManager) -> None:
+    """Test that a jump host loop fails instead of deadlocking."""
+    servers = ssh_manager.settings.ssh_servers
+    servers["bastion"] = {
+        "host": "bastion",
+        "username": "u",
+        "jump_host": "test-server",
+    }
+    servers["test-server"]["jump_host"] = "bastion"
+
+    with pytest.raises(ValueError, match="Jump host cycle"):
+        await asyncio.wait_for(ssh_manager.connect("test-server"), 1)
+
+
+@pytest.mark.asyncio
+async def test_probe_results_cached_and_invalidated(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that concurrent probes share one command and writes invalidate."""
+    calls = 0
+
+    async def fake_fetch(_server_name: str, _bulk: bool) -> list[dict[str, Any]]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [{"name": "nginx", "active": True}]
+
+    with patch.object(ssh_manager, "_fetch_running_services", fake_fetch):
+        results = await asyncio.gather(
+            *(ssh_manager.get_running_services("test-server") for _ in range(5))
+        )
+        assert calls == 1
+        assert all(result == results[0] for result in results)
+
+        await ssh_manager.get_running_services("test-server")
+        assert calls == 1
+
+        patch_sftp_file(ssh_manager, b"")
+        await ssh_manager.upload_file(
+            "test-server", "/etc/motd", b"hello", verify=False
+        )
+        await ssh_manager.get_running_services("test-server")
+        assert calls == 2
 
 
 @pytest.mark.asyncio
@@ -366,3 +997,533 @@ async def test_list_connected_servers(ssh_manager: SSHConnectionManager) -> None
     assert "server1" in connected
     assert "server2" not in connected
     assert len(connected) == 1
+
+
+class FakeRemoteFile:
+    """Minimal stand-in for an open SFTP file serving bytes from memory."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.reads: list[tuple[int, int]] = []
+
+    async def __aenter__(self) -> FakeRemoteFile:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    async def stat(self) -> MagicMock:
+        return MagicMock(size=len(self.data))
+
+    async def read(self, size: int, offset: int) -> bytes:
+        self.reads.append((offset, size))
+        return self.data[offset : offset + size]
+
+    async def write(self, data: bytes, offset: int) -> int:
+        buffer = bytearray(self.data)
+        buffer[offset : offset + len(data)] = data
+        self.data = bytes(buffer)
+        return len(data)
+
+    async def truncate(self, size: int) -> None:
+        self.data = self.data[:size]
+
+
+def patch_sftp_file(ssh_manager: SSHConnectionManager, data: bytes) -> FakeRemoteFile:
+    """Serve ``data`` for any file opened through the manager's SFTP session."""
+    remote_file = FakeRemoteFile(data)
+    sftp = MagicMock()
+    sftp.open.return_value = remote_file
+    sftp.stat = AsyncMock(return_value=MagicMock(size=len(data)))
+
+    @asynccontextmanager
+    async def fake_sftp(_server_name: str) -> AsyncIterator[MagicMock]:
+        yield sftp
+
+    # The manager only lives for one test, so the patch is never undone
+    patch.object(ssh_manager, "_sftp", fake_sftp).start()
+    return remote_file
+
+
+@pytest.mark.asyncio
+async def test_stream_file_range(ssh_manager: SSHConnectionManager) -> None:
+    """Test that a byte range is read in pipelined chunks."""
+    remote_file = patch_sftp_file(ssh_manager, bytes(range(100)))
+
+    chunks = [
+        chunk
+        async for chunk in ssh_manager.stream_file(
+            "test-server", "/var/log/big.log", offset=10, length=25, chunk_size=10
+        )
+    ]
+
+    assert chunks == [bytes(range(10, 20)), bytes(range(20, 30)), bytes(range(30, 35))]
+    assert remote_file.reads == [(10, 10), (20, 10), (30, 5)]
+
+
+@pytest.mark.asyncio
+async def test_stream_file_tail(ssh_manager: SSHConnectionManager) -> None:
+    """Test reading only the last N bytes of a file."""
+    patch_sftp_file(ssh_manager, b"line one\nline two\n")
+
+    chunks = [
+        chunk
+        async for chunk in ssh_manager.stream_file(
+            "test-server", "/var/log/big.log", tail_bytes=9
+        )
+    ]
+
+    assert b"".join(chunks) == b"line two\n"
+
+
+@pytest.mark.asyncio
+async def test_stream_file_text_split_character(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that multi-byte characters split across chunks decode intact."""
+    patch_sftp_file(ssh_manager, "héllo wörld".encode())
+
+    chunks = [
+        chunk
+        async for chunk in ssh_manager.stream_file_text(
+            "test-server", "/tmp/file.txt", chunk_size=2
+        )
+    ]
+
+    assert "".join(chunks) == "héllo wörld"
+
+
+@pytest.mark.asyncio
+async def test_upload_file_with_progress(ssh_manager: SSHConnectionManager) -> None:
+    """Test a chunked upload reports progress and verifies the checksum."""
+    remote_file = patch_sftp_file(ssh_manager, b"")
+    content = b"0123456789" * 5
+    ssh_manager.execute_command = AsyncMock(  # type: ignore[method-assign]
+        return_value=f"{hashlib.sha256(content).hexdigest()}  /tmp/out.bin\n"
+    )
+    updates: list[tuple[int, int | None]] = []
+
+    async def progress(done: int, total: int | None) -> None:
+        updates.append((done, total))
+
+    result = await ssh_manager.upload_file(
+        "test-server", "/tmp/out.bin", content, progress=progress, chunk_size=16
+    )
+
+    assert remote_file.data == content
+    assert updates == [(16, 50), (32, 50), (48, 50), (50, 50)]
+    assert result["verified"] is True
+    assert result["size"] == 50
+
+
+@pytest.mark.asyncio
+async def test_upload_file_resume(ssh_manager: SSHConnectionManager) -> None:
+    """Test resuming sends only the bytes missing on the remote side."""
+    content = b"abcdefghijklmnopqrstuvwxyz"
+    remote_file = patch_sftp_file(ssh_manager, content[:10])
+    written: list[tuple[bytes, int]] = []
+    original_write = remote_file.write
+
+    async def record_write(data: bytes, offset: int) -> int:
+        written.append((data, offset))
+        return await original_write(data, offset)
+
+    remote_file.write = record_write  # type: ignore[method-assign]
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield content[:8]
+        yield content[8:]
+
+    result = await ssh_manager.upload_file(
+        "test-server", "/tmp/out.bin", chunks(), resume=True, verify=False
+    )
+
+    assert written == [(content[10:], 10)]
+    assert remote_file.data == content
+    assert result["resumed_from"] == 10
+
+
+@pytest.mark.asyncio
+async def test_upload_file_checksum_mismatch(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that a remote checksum mismatch is reported."""
+    patch_sftp_file(ssh_manager, b"")
+    ssh_manager.execute_command = AsyncMock(  # type: ignore[method-assign]
+        return_value="0000  /tmp/out.bin\n"
+    )
+
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        await ssh_manager.upload_file("test-server", "/tmp/out.bin", b"payload")
+
+
+@pytest.mark.asyncio
+async def test_sync_file_falls_back_to_upload(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that a missing remote file is uploaded in full."""
+    conn = MagicMock()
+    conn.run = AsyncMock(return_value=MagicMock(exit_status=3, stdout=b""))
+
+    @asynccontextmanager
+    async def fake_channel(_server_name: str) -> AsyncIterator[MagicMock]:
+        yield conn
+
+    with (
+        patch.object(ssh_manager, "_channel", fake_channel),
+        patch.object(ssh_manager, "upload_file") as upload_file,
+    ):
+        result = await ssh_manager.sync_file(
+            "test-server", "/etc/app.conf", "key=value\n"
+        )
+
+    upload_file.assert_awaited_once_with("test-server", "/etc/app.conf", b"key=value\n")
+    assert result["method"] == "full"
+    assert result["sent_bytes"] == 10
+
+
+@pytest.mark.asyncio
+async def test_execute_command_uses_persistent_shell(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that commands run in the pooled shell when enabled."""
+    ssh_manager.settings.ssh_persistent_shell = True
+    shell = MagicMock()
+    shell.run = AsyncMock(return_value=ShellResult(0, "hello\n", ""))
+    pool = MagicMock()
+
+    @asynccontextmanager
+    async def fake_shell() -> AsyncIterator[MagicMock]:
+        yield shell
+
+    pool.shell = fake_shell
+    ssh_manager.connect = AsyncMock()  # type: ignore[method-assign]
+    ssh_manager._pools["test-server"] = pool
+
+    assert await ssh_manager.execute_command("test-server", "echo hello") == "hello\n"
+    shell.run.assert_awaited_once_with("echo hello", None)
+
+    shell.run.return_value = ShellResult(2, "", "bad option\n")
+    with pytest.raises(RuntimeError, match="exit code 2: bad option"):
+        await ssh_manager.execute_command("test-server", "ls --bad")
+
+
+def test_persistent_shell_server_override(ssh_manager: SSHConnectionManager) -> None:
+    """Test that a server's persistent_shell setting overrides the default."""
+    ssh_manager.settings.ssh_persistent_shell = True
+    ssh_manager.settings.ssh_servers["test-server"]["persistent_shell"] = False
+
+    assert not ssh_manager._uses_persistent_shell("test-server")
+
+
+class FakeReader:
+    """A byte stream returning fixed chunks, then b"" at EOF."""
+
+    def __init__(self, chunks: list[bytes]) -> None:
+        self.chunks = list(chunks)
+
+    async def read(self, _n: int = -1) -> bytes:
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class FakeCaptureProcess:
+    """A process whose stdout and stderr yield fixed chunks."""
+
+    def __init__(
+        self, stdout: list[bytes], stderr: Sequence[bytes] = (), exit_status: int = 0
+    ) -> None:
+        self.stdout = FakeReader(stdout)
+        self.stderr = FakeReader(list(stderr))
+        self.wait = AsyncMock(return_value=MagicMock(exit_status=exit_status))
+        self.close = MagicMock()
+
+
+def patch_capture_process(
+    ssh_manager: SSHConnectionManager, process: FakeCaptureProcess
+) -> MagicMock:
+    """Make execute_command_capture start the given process."""
+    mock_conn = MagicMock()
+    mock_conn.is_closed.return_value = False
+    mock_conn.wait_closed = AsyncMock()
+    mock_conn.create_process = AsyncMock(return_value=process)
+    ssh_manager._create_connection = AsyncMock(return_value=mock_conn)  # type: ignore[method-assign]
+    return mock_conn
+
+
+@pytest.mark.asyncio
+async def test_execute_command_capture_spills(
+    ssh_manager: SSHConnectionManager, tmp_path: Any
+) -> None:
+    """Test that large output is spilled and readable by its spill id."""
+    ssh_manager.spills.directory = str(tmp_path)
+    ssh_manager.settings.command_output_memory_limit = 4
+    process = FakeCaptureProcess([b"line 1\n", b"line 2\n"])
+    mock_conn = patch_capture_process(ssh_manager, process)
+
+    result = await ssh_manager.execute_command_capture("test-server", "cat big")
+
+    assert mock_conn.create_process.call_args.kwargs["encoding"] is None
+    assert result["output"] == "line"
+    assert result["total_bytes"] == 14
+    assert result["truncated"] is False
+    assert result["exit_status"] == 0
+    assert ssh_manager.spills.read(result["spill_id"]) == b"line 1\nline 2\n"
+    process.close.assert_called_once()
+
+    await ssh_manager.close_all()
+    assert ssh_manager.spills.stats()["files"] == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_command_capture_stops_at_max_bytes(
+    ssh_manager: SSHConnectionManager, tmp_path: Any
+) -> None:
+    """Test that a command is stopped once max_bytes of output are kept."""
+    ssh_manager.spills.directory = str(tmp_path)
+    ssh_manager.settings.command_output_memory_limit = 2
+    ssh_manager.settings.command_output_max_bytes = 5
+    process = FakeCaptureProcess([b"abc", b"def", b"ghi"])
+    patch_capture_process(ssh_manager, process)
+
+    result = await ssh_manager.execute_command_capture("test-server", "yes")
+
+    assert result["truncated"] is True
+    assert result["exit_status"] is None
+    assert ssh_manager.spills.read(result["spill_id"]) == b"abcde"
+    process.wait.assert_not_called()
+    process.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_execute_command_capture_bypasses_persistent_shell(
+    ssh_manager: SSHConnectionManager, tmp_path: Any
+) -> None:
+    """Test that capture streams over a channel when a shell is configured."""
+    ssh_manager.spills.directory = str(tmp_path)
+    ssh_manager.settings.ssh_persistent_shell = True
+    ssh_manager.settings.command_output_memory_limit = 2
+    ssh_manager.settings.command_output_max_bytes = 5
+    process = FakeCaptureProcess([b"abc", b"def", b"ghi"])
+    patch_capture_process(ssh_manager, process)
+
+    with patch.object(ssh_manager, "_run_in_shell") as run_in_shell:
+        result = await ssh_manager.execute_command_capture("test-server", "yes")
+
+    run_in_shell.assert_not_called()
+    assert result["truncated"] is True
+    assert result["exit_status"] is None
+    assert ssh_manager.spills.read(result["spill_id"]) == b"abcde"
+    process.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_execute_command_capture_failure(
+    ssh_manager: SSHConnectionManager, tmp_path: Any
+) -> None:
+    """Test that a failed command raises with stderr and leaves no spill file."""
+    ssh_manager.spills.directory = str(tmp_path)
+    ssh_manager.settings.command_output_memory_limit = 1
+    process = FakeCaptureProcess([b"partial"], [b"no such file"], exit_status=2)
+    patch_capture_process(ssh_manager, process)
+
+    with pytest.raises(RuntimeError, match="exit code 2: no such file"):
+        await ssh_manager.execute_command_capture("test-server", "cat missing")
+    assert ssh_manager.spills.stats()["files"] == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_command_bytes(ssh_manager: SSHConnectionManager) -> None:
+    """Test that bytes mode returns stdout without decoding it."""
+    payload = bytes(range(256))
+    mock_conn = patch_capture_process(ssh_manager, FakeCaptureProcess([]))
+    mock_conn.run = AsyncMock(
+        return_value=MagicMock(exit_status=0, stdout=payload, stderr=b"")
+    )
+
+    assert await ssh_manager.execute_command_bytes("test-server", "cat x") == payload
+    assert mock_conn.run.call_args.kwargs["encoding"] is None
+
+    mock_conn.run.return_value = MagicMock(exit_status=1, stdout=b"", stderr=b"bad")
+    with pytest.raises(RuntimeError, match="exit code 1: bad"):
+        await ssh_manager.execute_command_bytes("test-server", "false")
+
+
+def test_command_output_decodes_bytes() -> None:
+    """Test that bytes stdout is decoded rather than turned into its repr."""
+    result = MagicMock(exit_status=0, stdout=b"caf\xc3\xa9\n")
+    assert SSHConnectionManager._command_output(result) == "café\n"
+
+
+@pytest.mark.asyncio
+async def test_stream_command_bytes(ssh_manager: SSHConnectionManager) -> None:
+    """Test that raw chunks are yielded as read and failures raise at the end."""
+    process = FakeCaptureProcess([b"\x00\x01", b"\xff"])
+    mock_conn = patch_capture_process(ssh_manager, process)
+
+    chunks = [
+        chunk async for chunk in ssh_manager.stream_command_bytes("test-server", "x")
+    ]
+    assert chunks == [b"\x00\x01", b"\xff"]
+    process.close.assert_called_once()
+
+    process = FakeCaptureProcess([b"partial"], [b"broken pipe"], exit_status=141)
+    mock_conn.create_process.return_value = process
+    received: list[bytes] = []
+    with pytest.raises(RuntimeError, match="exit code 141: broken pipe"):
+        async for chunk in ssh_manager.stream_command_bytes("test-server", "y"):
+            received.append(chunk)
+    assert received == [b"partial"]
+
+
+@pytest.mark.asyncio
+async def test_stream_tasks_cancelled_by_owner(
+    ssh_manager: SSHConnectionManager,
+) -> None:
+    """Test that a stream's tasks are registered and stop with their owner."""
+    process = FakeStreamProcess(["first\n"])
+    process.close = MagicMock()  # type: ignore[attr-defined]
+    received = asyncio.Event()
+
+    async def endless_stdout() -> AsyncIterator[str]:
+        yield "first\n"
+        await asyncio.Event().wait()
+
+    process.stdout = endless_stdout()
+    mock_conn = patch_stream_process(ssh_manager, [])
+    mock_conn.create_process.return_value = process
+    mock_conn.wait_closed = AsyncMock()
+
+    async def callback(line: str) -> None:
+        received.set()
+
+    await ssh_manager.tail_file("test-server", "/var/log/app.log", callback, owner="t")
+    await asyncio.wait_for(received.wait(), 1)
+    tasks = [
+        task for task in ssh_manager.tasks.stats()["tasks"] if task["owner"] == "t"
+    ]
+    assert {task["name"] for task in tasks} == {"stream-output", "stream-reader"}
+    assert sum(task["bytes"] for task in tasks) == len("first\n")
+
+    assert ssh_manager.tasks.cancel_owner("t") == 2
+    for _ in range(5):
+        await asyncio.sleep(0)
+    process.close.assert_called()  # type: ignore[attr-defined]
+    assert ssh_manager.tasks.owned_by("t") == []
+    await ssh_manager.close_all()
+
+
+@pytest.mark.asyncio
+async def test_operation_metrics(ssh_manager: SSHConnectionManager) -> None:
+    """Test that connects, channel leases and operations are measured."""
+    mock_conn = patch_capture_process(ssh_manager, FakeCaptureProcess([]))
+    mock_conn.run = AsyncMock(
+        side_effect=[
+            MagicMock(exit_status=0, stdout="ok", stderr=""),
+            MagicMock(exit_status=1, stdout="", stderr="bad"),
+        ]
+    )
+
+    await ssh_manager.execute_command("test-server", "true")
+    # The server name may also be passed by keyword
+    with pytest.raises(RuntimeError):
+        await ssh_manager.execute_command(server_name="test-server", command="false")
+
+    assert ssh_manager._connect_seconds.count("test-server") == 1
+    assert ssh_manager._channel_wait_seconds.count("test-server") == 2
+    assert ssh_manager._operation_seconds.count("test-server", "execute") == 2
+    assert ssh_manager._operation_errors.value("test-server", "execute") == 1
+    text = ssh_manager.metrics.render()
+    assert "ssh_open_connections 1" in text
+    assert 'ssh_pool_channels{server="test-server"} 0' in text
+    await ssh_manager.close_all()
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_apply_config_changes(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that only removed and changed servers lose their connections."""
+    servers = ssh_manager.settings.ssh_servers
+    servers["changed"] = {"host": "changed", "username": "u"}
+    servers["removed"] = {"host": "removed", "username": "u"}
+    opened: dict[str, MagicMock] = {}
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        mock_conn = MagicMock()
+        mock_conn.is_closed.return_value = False
+        mock_conn.wait_closed = AsyncMock()
+        opened[kwargs["host"]] = mock_conn
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+    for server_name in ("test-server", "changed", "removed"):
+        await ssh_manager.connect(server_name)
+    # A channel in use holds the changed server's drain until it is released
+    pool, entry = await ssh_manager._acquire_channel("changed")
+
+    servers["changed"]["host"] = "changed-2"
+    del servers["removed"]
+    await ssh_manager.apply_config_changes(
+        {"added": [], "removed": ["removed"], "changed": ["changed"]}
+    )
+    await asyncio.sleep(0.01)
+
+    assert ssh_manager.connections["test-server"] is opened["localhost"]
+    opened["localhost"].close.assert_not_called()
+    assert "removed" not in ssh_manager.connections
+    opened["removed"].close.assert_called_once()
+    assert ssh_manager.connections["changed"] is opened["changed-2"]
+    opened["changed"].close.assert_not_called()
+
+    await pool.release(entry)
+    await asyncio.sleep(0.2)
+    opened["changed"].close.assert_called_once()
+    assert ssh_manager.tasks.count_named("drain") == 0
+
+
+@pytest.mark.asyncio
+@patch("ssh_remote_control.server.asyncssh.connect")
+async def test_apply_config_changes_twice(
+    mock_connect: MagicMock, ssh_manager: SSHConnectionManager
+) -> None:
+    """Test that a server changed again mid-reconnect ends on its last config."""
+    server = ssh_manager.settings.ssh_servers["test-server"]
+    changes = {"added": [], "removed": [], "changed": ["test-server"]}
+    opened: dict[str, MagicMock] = {}
+
+    async def mock_connect_impl(*args: Any, **kwargs: Any) -> MagicMock:
+        await asyncio.sleep(0.05)
+        mock_conn = MagicMock()
+        mock_conn.is_closed.return_value = False
+        mock_conn.wait_closed = AsyncMock()
+        opened[kwargs["host"]] = mock_conn
+        return mock_conn
+
+    mock_connect.side_effect = mock_connect_impl
+    await ssh_manager.connect("test-server")
+
+    # Two reloads before the first reconnect has started
+    server["host"] = "v1"
+    await ssh_manager.apply_config_changes(changes)
+    server["host"] = "v2"
+    await ssh_manager.apply_config_changes(changes)
+    await asyncio.sleep(0.1)
+
+    assert ssh_manager.connections["test-server"] is opened["v2"]
+    opened["localhost"].close.assert_called_once()
+
+    # A reload while the reconnect is still connecting with the old config
+    server["host"] = "v3"
+    await ssh_manager.apply_config_changes(changes)
+    await asyncio.sleep(0.01)
+    server["host"] = "v4"
+    await ssh_manager.apply_config_changes(changes)
+    await asyncio.sleep(0.1)
+
+    assert ssh_manager.connections["test-server"] is opened["v4"]
+    assert "v3" not in opened
+    opened["v2"].close.assert_called_once()
+    assert ssh_manager._reconnects == {}
+    assert ssh_manager.tasks.count_named("reconnect") == 0
+    await ssh_manager.close_all()
@@ -0,0 +1,117 @@
+"""Test the persistent remote shell."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from ssh_remote_control.shell import PersistentShell
+
+
+class LocalProcess:
+    """Adapt a local ``sh`` subprocess to the SSH process interface."""
+
+    def __init__(self, process: asyncio.subprocess.Process) -> None:
+        assert process.stdin and process.stdout and process.stderr
+        self.process = process
+        self.stdin = process.stdin
+        self.stdout = process.stdout
+        self.stderr = process.stderr
+
+    def close(self) -> None:
+        if self.process.returncode is None:
+            self.process.kill()
+
+
+@pytest.fixture
+async def shell() -> AsyncIterator[PersistentShell]:
+    """Run a persistent shell on a local sh process."""
+    process = await asyncio.create_subprocess_exec(
+        "sh",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    persistent = PersistentShell(LocalProcess(process))  # type: ignore[arg-type]
+    yield persistent
+    persistent.close()
+    await process.wait()
+
+
+@pytest.mark.asyncio
+async def test_run_separates_streams_and_status(shell: PersistentShell) -> None:
+    """Test stdout, stderr and exit status are returned per command."""
+    result = await shell.run("printf 'no newline'; echo oops >&2; exit 3")
+
+    assert result.exit_status == 3
+    assert result.stdout == "no newline"
+    assert result.stderr == "oops\n"
+
+
+@pytest.mark.asyncio
+async def test_pipelined_commands_keep_their_output(shell: PersistentShell) -> None:
+    """Test concurrent callers each receive their own command's output."""
+    results = await asyncio.gather(
+        *(shell.run(f"echo out{i}; echo err{i} >&2") for i in range(20))
+    )
+
+    assert [r.stdout for r in results] == [f"out{i}\n" for i in range(20)]
+    assert [r.stderr for r in results] == [f"err{i}\n" for i in range(20)]
+    assert shell.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_large_output(shell: PersistentShell) -> None:
+    """Test multi-megabyte output on both streams is framed intact."""
+    size = 8 * 1024 * 1024
+    command = f"head -c {size} /dev/zero | tr '\\0' x; head -c {size} /dev/zero >&2"
+    first, second = await asyncio.gather(shell.run(command), shell.run("echo next"))
+
+    assert first.stdout == "x" * size
+    assert first.stderr == "\0" * size
+    assert second.stdout == "next\n"
+
+
+@pytest.mark.asyncio
+async def test_commands_do_not_leak_state(shell: PersistentShell) -> None:
+    """Test that cd and variables stay inside each command's subshell."""
+    await shell.run("cd /; LEAK=1")
+    result = await shell.run("echo ${LEAK:-unset}; pwd")
+
+    assert result.stdout.splitlines()[0] == "unset"
+    assert result.stdout.splitlines()[1] != "/"
+
+
+@pytest.mark.asyncio
+async def test_commands_cannot_read_queued_input(shell: PersistentShell) -> None:
+    """Test that a command reading stdin does not swallow later commands."""
+    first, second = await asyncio.gather(shell.run("cat"), shell.run("echo next"))
+
+    assert first.stdout == ""
+    assert second.stdout == "next\n"
+
+
+@pytest.mark.asyncio
+async def test_timeout_closes_shell(shell: PersistentShell) -> None:
+    """Test that a timed out command closes the busy shell."""
+    queued = asyncio.ensure_future(shell.run("echo queued"))
+
+    with pytest.raises(TimeoutError):
+        await shell.run("sleep 5", timeout=0.1)
+
+    assert shell.closed
+    with pytest.raises(ConnectionError):
+        await queued
+    with pytest.raises(ConnectionError):
+        await shell.run("echo later")
+
+
+@pytest.mark.asyncio
+async def test_shell_exit_fails_pending_commands(shell: PersistentShell) -> None:
+    """Test that commands waiting on a shell that exits get an error."""
+    with pytest.raises(ConnectionError, match="exited"):
+        await shell.run("kill -9 $$")
+
+    assert shell.closed
@@ -0,0 +1,112 @@
+"""Test bounded output capture and the spill store."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from ssh_remote_control.spill import OutputCapture, SpillStore
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> SpillStore:
+    """Create a spill store in a temporary directory."""
+    return SpillStore(str(tmp_path), ttl=60, max_files=2)
+
+
+@pytest.mark.asyncio
+async def test_small_output_stays_in_memory(store: SpillStore) -> None:
+    """Test that output within the memory limit is not spilled."""
+    capture = OutputCapture(10, 100, store)
+    await capture.write(b"hello")
+    capture.finish()
+
+    assert capture.result() == {
+        "output": "hello",
+        "total_bytes": 5,
+        "stored_bytes": 5,
+        "truncated": False,
+        "spill_id": None,
+    }
+    assert store.stats()["files"] == 0
+
+
+@pytest.mark.asyncio
+async def test_large_output_spills_to_disk(store: SpillStore) -> None:
+    """Test that output beyond the memory limit is written whole to a file."""
+    capture = OutputCapture(4, 100, store)
+    for chunk in (b"abc", b"defg", b"hij"):
+        await capture.write(chunk)
+    capture.finish()
+
+    result = capture.result()
+    assert result["output"] == "abcd"
+    assert result["total_bytes"] == 10
+    assert result["truncated"] is False
+    assert store.read(result["spill_id"]) == b"abcdefghij"
+    assert store.read(result["spill_id"], offset=3, length=4) == b"defg"
+    assert [chunk async for chunk in store.stream(result["spill_id"], 2, 3)] == [
+        b"cde",
+        b"fgh",
+        b"ij",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_output_truncated_at_max_bytes(store: SpillStore) -> None:
+    """Test that output beyond max_bytes is counted but dropped."""
+    capture = OutputCapture(2, 6, store)
+    await capture.write(b"abcd")
+    full_before_cap = capture.full
+    await capture.write(b"efgh")
+    assert (full_before_cap, capture.full) == (False, True)
+    capture.finish()
+
+    result = capture.result()
+    assert result["truncated"] is True
+    assert result["total_bytes"] == 8
+    assert result["stored_bytes"] == 6
+    assert store.read(result["spill_id"]) == b"abcdef"
+
+
+@pytest.mark.asyncio
+async def test_discard_removes_file(store: SpillStore) -> None:
+    """Test that discarding a capture deletes its spill file."""
+    capture = OutputCapture(1, 100, store)
+    await capture.write(b"abc")
+    assert capture.spill is not None
+    path = capture.spill.path
+
+    capture.discard()
+    assert not os.path.exists(path)
+    assert capture.result()["spill_id"] is None
+
+
+def test_store_evicts_oldest_and_expired(store: SpillStore) -> None:
+    """Test that the store keeps at most max_files and drops expired files."""
+    first, second, third = store.create(), store.create(), store.create()
+    with pytest.raises(KeyError):
+        store.get(first.id)
+    assert not os.path.exists(first.path)
+
+    second.created_at -= 120
+    store.expire()
+    with pytest.raises(KeyError):
+        store.read(second.id)
+    assert store.get(third.id) is third
+
+    assert store.remove(third.id) is True
+    assert store.remove(third.id) is False
+    assert store.stats()["files"] == 0
+
+
+@pytest.mark.asyncio
+async def test_output_truncated_at_chunk_boundary(store: SpillStore) -> None:
+    """Test that reaching max_bytes exactly still marks the output truncated."""
+    capture = OutputCapture(2, 4, store)
+    await capture.write(b"abcd")
+
+    assert capture.full
+    assert capture.result()["truncated"] is True
@@ -0,0 +1,117 @@
+"""Test the bounded line pipeline used for streaming output."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ssh_remote_control.streaming import LinePipeline
+
+
+async def collect(
+    pipeline: LinePipeline, max_batch: int = 200, max_delay: float = 0.01
+) -> list[tuple[list[str], int]]:
+    """Read every batch from a pipeline until it is closed."""
+    return [batch async for batch in pipeline.batches(max_batch, max_delay)]
+
+
+def test_unknown_policy() -> None:
+    """Test that an unknown overflow policy is rejected."""
+    with pytest.raises(ValueError, match="Unknown overflow policy"):
+        LinePipeline(policy="newest")
+
+
+@pytest.mark.asyncio
+async def test_batches_by_size() -> None:
+    """Test that queued lines are split into batches of at most max_batch."""
+    pipeline = LinePipeline()
+    for i in range(5):
+        await pipeline.put(f"line {i}")
+    pipeline.close()
+
+    batches = await collect(pipeline, max_batch=2)
+
+    assert [lines for lines, _ in batches] == [
+        ["line 0", "line 1"],
+        ["line 2", "line 3"],
+        ["line 4"],
+    ]
+    assert all(dropped == 0 for _, dropped in batches)
+
+
+@pytest.mark.asyncio
+async def test_batch_flushed_after_delay() -> None:
+    """Test that a partial batch is sent once max_delay has passed."""
+    pipeline = LinePipeline()
+    batches = pipeline.batches(max_batch=100, max_delay=0.01)
+
+    await pipeline.put("first")
+    lines, dropped = await asyncio.wait_for(anext(batches), 1)
+
+    assert lines == ["first"]
+    assert dropped == 0
+    pipeline.close()
+    await batches.aclose()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_reports_dropped() -> None:
+    """Test that drop_oldest keeps the newest lines and counts the rest."""
+    pipeline = LinePipeline(max_lines=3, policy="drop_oldest")
+    for i in range(10):
+        await pipeline.put(str(i))
+    pipeline.close()
+
+    batches = await collect(pipeline)
+
+    assert batches == [(["7", "8", "9"], 7)]
+    assert pipeline.dropped == 7
+
+
+@pytest.mark.asyncio
+async def test_sample_keeps_every_nth_line() -> None:
+    """Test that sample keeps one of every sample_every overflowing lines."""
+    pipeline = LinePipeline(max_lines=2, policy="sample", sample_every=4)
+    for i in range(10):
+        await pipeline.put(str(i))
+    pipeline.close()
+
+    batches = await collect(pipeline)
+
+    # Lines 2-9 overflow; 5 and 9 are sampled in, each evicting the oldest
+    assert batches == [(["5", "9"], 8)]
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_consumer() -> None:
+    """Test that block holds the producer until the consumer catches up."""
+    pipeline = LinePipeline(max_lines=2, policy="block")
+    await pipeline.put("a")
+    await pipeline.put("b")
+
+    producer = asyncio.create_task(pipeline.put("c"))
+    await asyncio.sleep(0.01)
+    assert not producer.done()
+
+    batches = pipeline.batches(max_batch=2, max_delay=0)
+    assert await anext(batches) == (["a", "b"], 0)
+    await asyncio.wait_for(producer, 1)
+    pipeline.close()
+    assert await anext(batches) == (["c"], 0)
+    await batches.aclose()
+    assert pipeline.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_close_releases_blocked_producer() -> None:
+    """Test that closing the pipeline unblocks a waiting producer."""
+    pipeline = LinePipeline(max_lines=1, policy="block")
+    await pipeline.put("a")
+    producer = asyncio.create_task(pipeline.put("b"))
+    await asyncio.sleep(0)
+
+    pipeline.close()
+    await asyncio.wait_for(producer, 1)
+
+    assert await collect(pipeline) == [(["a"], 0)]
@@ -0,0 +1,71 @@
+"""Test the background task registry."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ssh_remote_control.tasks import TaskRegistry
+
+
+async def sleeper(registry: TaskRegistry, size: int = 0) -> None:
+    registry.record_bytes(size)
+    await asyncio.sleep(3600)
+
+
+@pytest.mark.asyncio
+async def test_tracks_tasks_until_they_finish() -> None:
+    """Test that tasks are listed with their owner and bytes, then forgotten."""
+    registry = TaskRegistry()
+    event = asyncio.Event()
+    waiter = registry.spawn(event.wait(), name="waiter", owner="websocket:1")
+    registry.spawn(sleeper(registry, 42), name="reader", owner="stream:web-1:1")
+    await asyncio.sleep(0)
+
+    stats = registry.stats()
+    assert stats["running"] == 2
+    assert stats["by_owner"] == {"websocket:1": 1, "stream:web-1:1": 1}
+    assert [task["bytes"] for task in stats["tasks"]] == [0, 42]
+
+    event.set()
+    await waiter
+    assert len(registry) == 1
+    await registry.cancel_all()
+    assert len(registry) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_owner_only_cancels_its_tasks() -> None:
+    """Test that cancelling an owner leaves other owners' tasks running."""
+    registry = TaskRegistry()
+    first = registry.spawn(sleeper(registry), name="a", owner="websocket:1")
+    second = registry.spawn(sleeper(registry), name="b", owner="websocket:1")
+    other = registry.spawn(sleeper(registry), name="c", owner="websocket:2")
+
+    assert registry.cancel_owner("websocket:1") == 2
+    await asyncio.gather(first, second, return_exceptions=True)
+
+    assert first.cancelled() and second.cancelled()
+    assert not other.done()
+    assert registry.owned_by("websocket:1") == []
+    await registry.cancel_all()
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_counted_and_logged(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that a task raising an exception is reported rather than lost."""
+    registry = TaskRegistry()
+
+    async def fail() -> None:
+        raise RuntimeError("boom")
+
+    task = registry.spawn(fail(), name="failing", owner="manager")
+    with pytest.raises(RuntimeError):
+        await task
+    await asyncio.sleep(0)
+
+    assert registry.stats()["failed"] == 1
+    assert "Background task failing failed" in caplog.text
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import asyncssh
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from ssh_remote_control.config import Settings
+from ssh_remote_control.spill import SpillStore
 from ssh_remote_control.web_server import create_app
 
 
@@ -49,6 +55,12 @@ def test_api_servers_route(client: TestClient) -> None:
     """Test API servers endpoint."""
     with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
         mock_ssh_manager.is_connected = AsyncMock(return_value=False)
+        mock_ssh_manager.circuit_stats.return_value = {
+            "state": "open",
+            "failures": 1,
+            "retry_in": 4.2,
+            "last_error": "Connection refused",
+        }
 
         response = client.get("/api/servers")
         assert response.status_code == 200
@@ -59,6 +71,17 @@ def test_api_servers_route(client: TestClient) -> None:
         assert data["servers"][0]["name"] == "test-server"
         assert data["servers"][0]["host"] == "localhost"
         assert data["servers"][0]["connected"] is False
+        assert data["servers"][0]["circuit"]["state"] == "open"
+
+
+def test_api_connection_stats_route(client: TestClient) -> None:
+    """Test API connection stats endpoint."""
+    response = client.get("/api/connections")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["open_connections"] == 0
+    assert data["evictions"] == {"idle": 0, "lru": 0}
 
 
 @pytest.mark.asyncio
@@ -132,7 +155,16 @@ async def test_api_disconnect_server(client: TestClient) -> None:
 async def test_api_execute_command(client: TestClient) -> None:
     """Test API command execution."""
     with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
-        mock_ssh_manager.execute_command = AsyncMock(return_value="command output")
+        mock_ssh_manager.execute_command_capture = AsyncMock(
+            return_value={
+                "output": "command output",
+                "total_bytes": 14,
+                "stored_bytes": 14,
+                "truncated": False,
+                "spill_id": None,
+                "exit_status": 0,
+            }
+        )
 
         response = client.post(
             "/api/execute",
@@ -145,11 +177,124 @@ async def test_api_execute_command(client: TestClient) -> None:
         assert data["server"] == "test-server"
         assert data["command"] == "ls -la"
 
-        mock_ssh_manager.execute_command.assert_called_once_with(
+        assert data["truncated"] is False
+        assert data["spill_id"] is None
+
+        mock_ssh_manager.execute_command_capture.assert_called_once_with(
             "test-server", "ls -la", timeout=30
         )
 
 
+def test_api_execute_raw(client: TestClient) -> None:
+    """Test that raw command output is streamed as bytes."""
+
+    async def fake_stream(
+        server_name: str, command: str, timeout: int | None = None
+    ) -> AsyncIterator[bytes]:
+        yield b"\x1f\x8b"
+        yield b"\x00\xff"
+
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.stream_command_bytes = fake_stream
+
+        response = client.post(
+            "/api/execute/raw",
+            json={"server": "test-server", "command": "tar czf - /etc"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.content == b"\x1f\x8b\x00\xff"
+        mock_ssh_manager.invalidate_cache.assert_called_once_with("test-server")
+
+
+def test_metrics_endpoint(client: TestClient) -> None:
+    """Test that metrics are exposed in the Prometheus text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE ssh_operation_seconds histogram" in response.text
+    assert "websocket_connections 0" in response.text
+    assert 'websocket_send_queue_depth{stat="max"} 0' in response.text
+
+
+def test_api_debug_tasks(client: TestClient) -> None:
+    """Test listing live background tasks."""
+    response = client.get("/api/debug/tasks")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["running"] == len(data["tasks"])
+    assert data["asyncio_tasks"] >= 1
+    assert "by_owner" in data
+
+
+def test_api_outputs(client: TestClient, tmp_path: Any) -> None:
+    """Test reading back and deleting spilled command output."""
+    spills = SpillStore(str(tmp_path))
+    spill = spills.create()
+    spill.write(b"0123456789")
+    spill.finish()
+
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.spills = spills
+
+        response = client.get(f"/api/outputs/{spill.id}")
+        assert response.status_code == 200
+        assert response.text == "0123456789"
+        assert response.headers["x-total-bytes"] == "10"
+
+        response = client.get(f"/api/outputs/{spill.id}?offset=2&length=3")
+        assert response.text == "234"
+
+        assert client.delete(f"/api/outputs/{spill.id}").status_code == 200
+        assert client.get(f"/api/outputs/{spill.id}").status_code == 404
+        assert client.delete(f"/api/outputs/{spill.id}").status_code == 404
+
+
+def test_api_execute_fanout(client: TestClient) -> None:
+    """Test API fan-out execution streams one line per server."""
+
+    async def fake_fanout(
+        server_names: list[str], command: str, timeout: int | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        for name in server_names:
+            yield {
+                "server": name,
+                "success": True,
+                "output": "up",
+                "error": None,
+                "duration": 0.1,
+            }
+
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.execute_fanout = fake_fanout
+
+        response = client.post(
+            "/api/execute/fanout", json={"groups": ["all"], "command": "uptime"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["type"] == "result"
+        assert lines[0]["server"] == "test-server"
+        assert lines[-1] == {
+            "type": "summary",
+            "command": "uptime",
+            "total": 1,
+            "succeeded": 1,
+            "failed": 0,
+        }
+
+
+def test_api_execute_fanout_unknown_server(client: TestClient) -> None:
+    """Test API fan-out execution with an unknown server."""
+    response = client.post(
+        "/api/execute/fanout", json={"servers": ["non-existent"], "command": "ls"}
+    )
+    assert response.status_code == 404
+
+
 def test_api_execute_command_invalid_server(client: TestClient) -> None:
     """Test API command execution for non-existent server."""
     response = client.post(
@@ -177,7 +322,7 @@ def test_connection_manager_initialization() -> None:
 
     manager = ConnectionManager()
     assert manager.active_connections == []
-    assert manager.log_tasks == {}
+    assert manager.hub.stats() == []
 
 
 @pytest.mark.asyncio
@@ -220,6 +365,21 @@ async def test_connection_manager_send_message() -> None:
     mock_websocket.send_text.assert_called_once_with("test message")
 
 
+@pytest.mark.asyncio
+async def test_connection_manager_send_to_closed_socket() -> None:
+    """Test that a follower send to a closed WebSocket raises ConnectionError."""
+    from fastapi import WebSocketDisconnect
+
+    from ssh_remote_control.web_server import ConnectionManager
+
+    manager = ConnectionManager()
+    mock_websocket = AsyncMock()
+    mock_websocket.send_text.side_effect = WebSocketDisconnect(1001)
+
+    with pytest.raises(ConnectionError, match="1001"):
+        await manager._send(mock_websocket, "line")
+
+
 @pytest.mark.asyncio
 async def test_connection_manager_broadcast() -> None:
     """Test ConnectionManager broadcasting message."""
@@ -303,3 +463,143 @@ def test_app_debug_mode() -> None:
 
         app = create_app()
         assert app.debug is True
+
+
+def test_api_stream_file(client: TestClient) -> None:
+    """Test that file chunks are streamed to the client."""
+
+    async def fake_stream_file(
+        server_name: str, path: str, **kwargs: Any
+    ) -> AsyncIterator[bytes]:
+        assert kwargs == {"offset": 5, "length": None, "tail_bytes": None}
+        yield b"first "
+        yield b"second"
+
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.stream_file = fake_stream_file
+
+        response = client.get(
+            "/api/servers/test-server/file",
+            params={"path": "/var/log/syslog", "offset": 5},
+        )
+
+    assert response.status_code == 200
+    assert response.content == b"first second"
+
+
+def test_api_stream_file_missing(client: TestClient) -> None:
+    """Test that a missing remote file maps to 404."""
+
+    async def fake_stream_file(
+        server_name: str, path: str, **kwargs: Any
+    ) -> AsyncIterator[bytes]:
+        if path == "/missing":
+            raise asyncssh.SFTPNoSuchFile("No such file")
+        yield b""
+
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.stream_file = fake_stream_file
+
+        response = client.get(
+            "/api/servers/test-server/file", params={"path": "/missing"}
+        )
+
+    assert response.status_code == 404
+
+
+def test_api_upload_file(client: TestClient) -> None:
+    """Test that the request body is streamed into an upload."""
+    received: list[bytes] = []
+
+    async def fake_upload_file(
+        server_name: str, path: str, source: AsyncIterator[bytes], **kwargs: Any
+    ) -> dict[str, Any]:
+        async for chunk in source:
+            received.append(chunk)
+        assert kwargs == {"resume": True, "verify": True}
+        return {"path": path, "size": 7, "resumed_from": 0, "verified": True}
+
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.upload_file = fake_upload_file
+
+        response = client.put(
+            "/api/servers/test-server/file",
+            params={"path": "/tmp/out.bin", "resume": "true"},
+            content=b"payload",
+        )
+
+    assert response.status_code == 200
+    assert response.json()["size"] == 7
+    assert b"".join(received) == b"payload"
+
+
+def test_startup_warm_up(mock_settings: Settings) -> None:
+    """Test that configured servers are warmed up in the background."""
+    mock_settings.warmup_servers = ["*"]
+    with patch("ssh_remote_control.web_server.Settings") as mock_settings_class:
+        mock_settings_class.return_value = mock_settings
+        app = create_app()
+
+    warmed = asyncio.Event()
+
+    async def fake_warm_up(server_names: list[str]) -> dict[str, Any]:
+        assert server_names == ["test-server"]
+        warmed.set()
+        return {}
+
+    app.state.ssh_manager.warm_up = fake_warm_up
+    app.state.ssh_manager.warmup_stats = MagicMock(
+        return_value={"state": "running", "total": 1}
+    )
+    with TestClient(app) as client:
+        response = client.get("/api/warmup")
+        assert response.status_code == 200
+        assert response.json()["state"] == "running"
+    assert warmed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_shares_log_tail() -> None:
+    """Test that WebSockets watching the same log share one remote tail."""
+    from ssh_remote_control.web_server import ConnectionManager
+
+    manager = ConnectionManager()
+    ssh_manager = MagicMock()
+    process = MagicMock()
+    process.wait = asyncio.Event().wait
+    ssh_manager.tail_file = AsyncMock(return_value=process)
+    websockets = [MagicMock(), MagicMock()]
+    for websocket in websockets:
+        websocket.app.state.ssh_manager = ssh_manager
+        websocket.send_text = AsyncMock()
+        await manager.start_log_tail("test-server", "/var/log/syslog", websocket)
+
+    ssh_manager.tail_file.assert_awaited_once()
+    assert manager.hub.stats()[0]["subscribers"] == 2
+
+    manager.disconnect(websockets[0])
+    process.terminate.assert_not_called()
+    manager.stop_log_tail("test-server", "/var/log/syslog", websockets[1])
+    process.terminate.assert_called_once()
+
+
+def test_reload_config_endpoint(client: TestClient) -> None:
+    """Test reloading the configuration on request."""
+    with patch.object(client.app.state, "ssh_manager") as mock_ssh_manager:  # type: ignore[attr-defined]
+        mock_ssh_manager.reload_config = AsyncMock(
+            return_value={"added": ["new"], "removed": [], "changed": []}
+        )
+        response = client.post("/api/config/reload")
+        assert response.status_code == 200
+        assert response.json() == {
+            "success": True,
+            "added": ["new"],
+            "removed": [],
+            "changed": [],
+        }
+        mock_ssh_manager.reload_config.assert_awaited_once_with(force=True)
+
+        mock_ssh_manager.reload_config.side_effect = ValueError("No config file")
+        response = client.post("/api/config/reload")
+        assert response.status_code == 400
+        assert "No config file" in response.json()["message"]